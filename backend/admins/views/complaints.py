@@ -11,8 +11,9 @@ from django.shortcuts import get_object_or_404
 import entities.complaints as complaints_entity
 import serializer.complaints as complaints_serializer
 
+from geo.geocache import reverse_geocode
+from geo.locationiq import GeocodingError
 from loguru import logger
-import requests
 
 class DepartmentListComplaints(APIView):
     permission_classes = [IsAuthenticated]
@@ -162,24 +163,18 @@ class GeoTestAPIView(APIView):
                 status=status.HTTP_400_BAD_REQUEST
             )
 
-        # LocationIQ config
-        LOCATIONIQ_KEY = "pk.371a6630b5644f04659e2e3a616ca5c2"
-        url = "https://us1.locationiq.com/v1/reverse"
-
-        params = {
-            "key": LOCATIONIQ_KEY,
-            "lat": lat,
-            "lon": lng,
-            "format": "json"
-        }
-
         try:
-            response = requests.get(url, params=params, timeout=5)
-            response.raise_for_status()
-            data = response.json()
+            lat, lng = float(lat), float(lng)
+        except (TypeError, ValueError):
+            return Response(
+                {"error": "latitude and longitude must be numbers"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
 
-        except requests.RequestException as e:
-            logger.error("LocationIQ error: %s", str(e))
+        try:
+            data = reverse_geocode(lat, lng)
+        except GeocodingError as e:
+            logger.error("LocationIQ error: {}", str(e))
             return Response(
                 {"error": "Failed to resolve location"},
                 status=status.HTTP_502_BAD_GATEWAY
@@ -215,11 +210,11 @@ class GeoTestAPIView(APIView):
         # NAME
         name = address.get("suburb") or address.get("neighbourhood") or address.get("village")
         
-        # CODE
+        # CODE - the offline dataset (geo/offline.py) carries the real jurisdiction code
         state_code = state[:2].upper() if state else "XX"
         city_code = city[:5].upper() if city else "XXXXX"
         name_code = name[:3].upper() if name else "XXX"
-        code = f"{state_code}-{city_code}-{name_code}"
+        code = address.get("jurisdiction_code") or f"{state_code}-{city_code}-{name_code}"
         
         # LOCATION - now accessible from root data_json
         location = data_json.get("display_name") 
@@ -1,6 +1,7 @@
+import asyncio
 import json
 from loguru import logger
-from channels.generic.websocket import WebsocketConsumer
+from channels.generic.websocket import AsyncWebsocketConsumer
 
 from .stt_client import STTClient
 from .tts_client import TTSClient
@@ -10,20 +11,32 @@ from django.conf import settings
 STT_URL = settings.STT_URL
 TTS_URL = settings.TTS_URL
 TTT_URL = settings.TTT_URL
-class ChatConsumer(WebsocketConsumer):
-    def connect(self):
-        self.accept()
+class ChatConsumer(AsyncWebsocketConsumer):
+    """
+    Voice assistant session, entirely on the event loop: STT, TTT and TTS are grpc.aio
+    calls driven by asyncio tasks, no threads per session.
+    - receive() awaits STT's bounded audio queue, so a slow STT server slows the socket down
+    - final transcripts and typed questions are answered in order by one responder task, so
+      STT keeps streaming while TTT / TTS run
+    """
+
+    async def connect(self):
+        await self.accept()
         logger.info("[WS] Connected")
         # Speech-to-Text client
         self.stt = STTClient(url=STT_URL,on_result=self.on_stt_result)
         # Text-to-Speech client
         self.tts = TTSClient(url=TTS_URL,on_audio=self.on_tts_audio)
+        self.audio_format = None  # last (encoding, sample_rate) announced to the frontend
         self.ttt = TTTClient(url=TTT_URL)
+        self.questions = asyncio.Queue()  # (text, speak the answer)
+        self.responder = asyncio.create_task(self._respond())
 
-    def receive(self, text_data=None, bytes_data=None):
+    async def receive(self, text_data=None, bytes_data=None):
         if bytes_data:
-            self.stt.start()
-            self.stt.send_audio(bytes_data)
+            # Dropped unless recording: frames trailing a "finalize" must not open a new
+            # stream, each one holds a recognizer on the STT server
+            await self.stt.send_audio(bytes_data)
             return
         # Control messages
         if text_data:
@@ -31,53 +44,90 @@ class ChatConsumer(WebsocketConsumer):
             if msg.get("action") == "start_recording":
                 self.stt.start()
             elif msg.get("action") == "finalize":
-                self.stt.stop()
+                await self.stt.stop()
+            elif msg.get("action") == "audio_format":
+                self.negotiate_audio_format(msg.get("encodings", []))
             elif msg.get("type") == "text":
-                response_text = self.ttt.response(msg["text"])
-
-                self.send(text_data=json.dumps({
-                    "type": "response",
-                    "text": response_text
-                }))
+                # Answered by the responder too, audio and control messages keep flowing
+                self.questions.put_nowait((msg["text"], False))
 
 
-    def on_stt_result(self, text: str, is_final: bool):
+    async def on_stt_result(self, text: str, is_final: bool):
         # 1️⃣ Send STT transcript to frontend
-        self.send(text_data=json.dumps({
+        await self.send(text_data=json.dumps({
             "type": "transcript",
             "text": text,
             "final": is_final
         }))
 
-        # 2️⃣ Only act on final transcript
-        if not is_final or not text.strip():
-            return
+        # 2️⃣ Only act on final transcript, answered by the responder task
+        if is_final and text.strip():
+            self.questions.put_nowait((text, True))
+
+    async def _respond(self):
+        while True:
+            text, speak = await self.questions.get()
+            try:
+                await self.answer(text, speak)
+            except Exception as e:
+                logger.error(f"[WS] Response failed: {e}")
 
-        # 3️⃣ Get response from TTT
-        response_text = self.ttt.response(text)[:150]
+    async def answer(self, text: str, speak=True):
+        # 3️⃣ Get ranked services from TTT
+        results = await self.ttt.search(text)
+        response_text = self.choose_answer(results)
         logger.info(f"[WS] TTT response: {response_text}")
 
-        # 4️⃣ Send TTT response as TEXT to frontend
-        self.send(text_data=json.dumps({
+        # 4️⃣ Send TTT response as TEXT to frontend, the runners-up along with it
+        await self.send(text_data=json.dumps({
             "type": "response",
-            "text": response_text
+            "text": response_text,
+            "results": results,
         }))
 
-        # 5️⃣ Speak it using TTS
+        if not speak:  # typed questions get text only
+            return
+
+        # 5️⃣ Speak it using TTS: the server splits it into phrases (its cache unit) and starts
+        # on the first one right away, finishing before the next answer starts
         self.tts.start()
-        self.tts.send_text(response_text)
-        self.tts.stop()
+        await self.tts.send_text(response_text)
+        await self.tts.stop()
+        await self.tts.wait()
+
+    @staticmethod
+    def choose_answer(results):
+        """The answer among TTT's ranked services: the best fused one."""
+        return results[0]["text"] if results else ""
 
-    def on_tts_audio(self, pcm: bytes, is_final: bool):
-        if pcm:
-            self.send(bytes_data=pcm)
+    def negotiate_audio_format(self, encodings):
+        """
+        The frontend lists the encodings it can play; without this message it gets the
+        model's 24 kHz PCM16 as before.
+        """
+        encoding = next((e for e in settings.TTS_AUDIO_ENCODINGS if e in encodings), "pcm16")
+        self.tts.set_format(encoding, settings.TTS_AUDIO_SAMPLE_RATE)
+        logger.info(f"[WS] TTS audio format: {encoding} @ {settings.TTS_AUDIO_SAMPLE_RATE} Hz")
+
+    async def on_tts_audio(self, audio: bytes, is_final: bool, audio_format):
+        if audio:
+            # Tells the frontend how to play the binary frames that follow
+            if audio_format != self.audio_format:
+                self.audio_format = audio_format
+                await self.send(text_data=json.dumps({
+                    "type": "audio_format",
+                    "encoding": audio_format[0],
+                    "sample_rate": audio_format[1],
+                }))
+            await self.send(bytes_data=audio)
         if is_final:
             logger.info("[WS] TTS playback finished")
 
-    def disconnect(self, close_code):
+    async def disconnect(self, close_code):
         logger.info(f"[WS] Disconnected ({close_code})")
         try:
-            self.stt.close()
-            self.tts.close()
+            self.responder.cancel()
+            await self.stt.close()
+            await self.tts.close()
         except Exception as e:
             logger.error(f"[WS] Cleanup error: {e}")
@@ -0,0 +1,143 @@
+import asyncio
+import atexit
+import itertools
+import threading
+
+import grpc
+from django.conf import settings
+from loguru import logger
+
+# Process-wide gRPC channels for the model servers (STT, TTS, TTT, caption).
+# A URL may list replicas, "10.0.0.5:50051,10.0.0.6:50051": calls rotate over the
+# replicas whose connection isn't failing. Clients pick a channel per call (unary)
+# or per session (streams) and never close it themselves.
+CHANNEL_OPTIONS = [
+    # Keepalive pings only while calls are active, no more often than the servers'
+    # default min ping interval (5 min) allows, so they never answer with GOAWAY
+    ("grpc.keepalive_time_ms", settings.GRPC_KEEPALIVE_MS),
+    ("grpc.keepalive_timeout_ms", 20000),
+    ("grpc.http2.max_pings_without_data", 0),
+    # A DNS name resolving to several servers is balanced inside the channel too
+    ("grpc.lb_policy_name", "round_robin"),
+    ("grpc.enable_retries", 1),
+    ("grpc.max_send_message_length", 50 * 1024 * 1024),
+    ("grpc.max_receive_message_length", 50 * 1024 * 1024),
+]
+UNHEALTHY_STATES = (grpc.ChannelConnectivity.TRANSIENT_FAILURE, grpc.ChannelConnectivity.SHUTDOWN)
+
+def split_targets(url):
+    return [target.strip() for target in url.split(",") if target.strip()]
+
+class Replica:
+    """One model-server address and its channel, tracking the channel's connectivity state."""
+
+    def __init__(self, target, channel, aio=False):
+        self.target = target
+        self.channel = channel
+        self.aio = aio
+        self._state = grpc.ChannelConnectivity.IDLE
+        if not aio:
+            # Also starts connecting, so the first call doesn't pay the handshake
+            channel.subscribe(self._on_state, try_to_connect=True)
+
+    def _on_state(self, state):
+        if state != self._state:
+            log = logger.warning if state in UNHEALTHY_STATES else logger.debug
+            log(f"[GRPC] {self.target} -> {state.name}")
+        self._state = state
+
+    @property
+    def state(self):
+        if self.aio:
+            return self.channel.get_state(try_to_connect=False)
+        return self._state
+
+    @property
+    def healthy(self):
+        return self.state not in UNHEALTHY_STATES
+
+class ReplicaSet:
+    """Round robin over the replicas of one URL, skipping unhealthy ones."""
+
+    def __init__(self, replicas):
+        self.replicas = replicas
+        self._counter = itertools.count()
+
+    def pick(self):
+        start = next(self._counter)
+        count = len(self.replicas)
+        for offset in range(count):
+            replica = self.replicas[(start + offset) % count]
+            if replica.healthy:
+                return replica.channel
+        # Everything is down: hand one out anyway, the call fails / retries as usual
+        return self.replicas[start % count].channel
+
+class ChannelPool:
+    def __init__(self, options=CHANNEL_OPTIONS):
+        self.options = options
+        self._sets = {}  # url -> ReplicaSet of grpc.Channel
+        self._aio_sets = {}  # (event loop, url) -> ReplicaSet of grpc.aio.Channel
+        self._lock = threading.Lock()
+
+    def channel(self, url):
+        """Shared blocking channel for a model-server URL."""
+        replica_set = self._sets.get(url)
+        if replica_set is None:
+            with self._lock:
+                replica_set = self._sets.get(url)
+                if replica_set is None:
+                    replica_set = self._sets[url] = ReplicaSet([
+                        Replica(target, grpc.insecure_channel(target, options=self.options))
+                        for target in split_targets(url)
+                    ])
+                    logger.info(f"[GRPC] Opened channels for {url}")
+        return replica_set.pick()
+
+    def aio_channel(self, url):
+        """Shared grpc.aio channel for a URL; aio channels belong to the running event loop."""
+        key = (asyncio.get_running_loop(), url)
+        replica_set = self._aio_sets.get(key)
+        if replica_set is None:
+            with self._lock:
+                replica_set = self._aio_sets.get(key)
+                if replica_set is None:
+                    # Forget channels of event loops that are gone
+                    for stale in [k for k in self._aio_sets if k[0].is_closed()]:
+                        del self._aio_sets[stale]
+                    replica_set = self._aio_sets[key] = ReplicaSet([
+                        Replica(target, grpc.aio.insecure_channel(target, options=self.options), aio=True)
+                        for target in split_targets(url)
+                    ])
+        return replica_set.pick()
+
+    def health(self):
+        """{url: {target: connectivity state}} of the blocking channels opened so far."""
+        return {
+            url: {replica.target: replica.state.name for replica in replica_set.replicas}
+            for url, replica_set in self._sets.items()
+        }
+
+    def wait_ready(self, url, timeout=5.0):
+        """Try to connect every replica of a URL, {target: ready within timeout}."""
+        self.channel(url)
+        ready = {}
+        for replica in self._sets[url].replicas:
+            try:
+                grpc.channel_ready_future(replica.channel).result(timeout=timeout)
+                ready[replica.target] = True
+            except grpc.FutureTimeoutError:
+                ready[replica.target] = False
+        return ready
+
+    def close(self):
+        with self._lock:
+            for replica_set in self._sets.values():
+                for replica in replica_set.replicas:
+                    replica.channel.close()
+            self._sets.clear()
+            # aio channels die with their event loop
+            self._aio_sets.clear()
+
+grpc_pool = ChannelPool()
+atexit.register(grpc_pool.close)
@@ -1,52 +1,104 @@
+import asyncio
 import grpc
-import threading
-from queue import Queue
 from loguru import logger
 
+from .grpc_pool import grpc_pool
+
 from models.stt import stt_pb2_grpc
 from models.stt.stt_pb2 import AudioChunk, FINAL # type: ignore
+
+# Audio chunks buffered per stream before send_audio waits for the STT server (backpressure)
+MAX_QUEUED_CHUNKS = 64
+
 class STTClient:
 
     def __init__(self, url: str, on_result):
-        """on_result(text: str, is_final: bool)"""
-        self.channel = grpc.insecure_channel(url)
-        self.stub = stt_pb2_grpc.SpeechToTextStub(self.channel)
-        self.audio_queue = Queue()
+        """async on_result(text: str, is_final: bool)"""
+        self.url = url
         self.on_result = on_result
         self.active = False
+        self.audio_queue = None
+        self.call = None
+        self.reader = None
 
     def start(self):
+        """Open a grpc.aio StreamAudio call, an asyncio task reads its transcripts."""
         if self.active:
             return
         self.active = True
-        self.responses = self.stub.StreamAudio(self._audio_generator())
-        self.thread = threading.Thread(target=self._read_responses,daemon=True)
-        self.thread.start()
+        self.audio_queue = asyncio.Queue(maxsize=MAX_QUEUED_CHUNKS)
+        # Shared process-wide channel, one replica per stream
+        stub = stt_pb2_grpc.SpeechToTextStub(grpc_pool.aio_channel(self.url))
+        self.call = stub.StreamAudio(self._audio_generator(self.audio_queue))
+        self.reader = asyncio.create_task(self._read_responses(self.call))
         logger.info("[STT] Stream started")
 
-    def _audio_generator(self):
+    async def _audio_generator(self, audio_queue):
         while True:
-            chunk = self.audio_queue.get()
+            chunk = await audio_queue.get()
             yield chunk
             if chunk.end_of_stream:
                 break
 
-    def _read_responses(self):
+    async def _read_responses(self, call):
         try:
-            for res in self.responses:
+            # Sent once the server admits the stream (models/stt/server.py)
+            metadata = await call.initial_metadata()
+            queued_ms = int(metadata.get("stt-queue-ms", 0)) if metadata else 0
+            if queued_ms:
+                logger.warning(f"[STT] Stream queued {queued_ms}ms for a recognizer")
+            async for res in call:
                 is_final = res.type == FINAL
-                self.on_result(res.text, is_final)
+                await self.on_result(res.text, is_final)
+        except grpc.aio.AioRpcError as e:
+            if e.code() == grpc.StatusCode.RESOURCE_EXHAUSTED:
+                logger.error(f"[STT] Server busy, stream refused: {e.details()}")
+            elif e.code() != grpc.StatusCode.CANCELLED:
+                logger.error(f"[STT] Error: {e.details()}")
         except Exception as e:
             logger.error(f"[STT] Error: {e}")
+        finally:
+            # The server stopped reading: nothing will drain the queue anymore
+            if self.call is call:
+                self.active = False
+                self._release_writers()
+
+    def _release_writers(self):
+        """Empty the audio queue, so a send_audio / stop blocked on it returns."""
+        while not self.audio_queue.empty():
+            self.audio_queue.get_nowait()
 
-    def send_audio(self, pcm: bytes):
+    async def send_audio(self, pcm: bytes):
+        """
+        Waits while MAX_QUEUED_CHUNKS are pending, which pauses reading the websocket.
+        The wait ends when the stream does, the chunks queued then are dropped.
+        """
         if self.active:
-            self.audio_queue.put(AudioChunk(pcm=pcm, end_of_stream=False))
+            await self._enqueue(AudioChunk(pcm=pcm, end_of_stream=False))
 
-    def stop(self):
+    async def stop(self):
         if self.active:
-            self.audio_queue.put(AudioChunk(pcm=b"", end_of_stream=True))
             self.active = False
+            await self._enqueue(AudioChunk(pcm=b"", end_of_stream=True))
 
-    def close(self):
-        self.channel.close()
+    async def _enqueue(self, chunk):
+        """
+        Queue a chunk, waiting for room only as long as the stream lasts: a stream queued
+        on the server (models/stt/server.py) reads nothing until it is admitted or refused,
+        and a reader cancelled before it ran never drains the queue.
+        """
+        if not self.audio_queue.full():
+            self.audio_queue.put_nowait(chunk)
+            return
+        put = asyncio.ensure_future(self.audio_queue.put(chunk))
+        await asyncio.wait((put, self.reader), return_when=asyncio.FIRST_COMPLETED)
+        if not put.done():
+            put.cancel()
+
+    async def close(self):
+        """End this session's stream, the shared channel stays open."""
+        self.active = False
+        if self.call is not None:
+            self.call.cancel()
+        if self.reader is not None:
+            self.reader.cancel()
@@ -1,59 +1,92 @@
+import asyncio
 import grpc
-import threading
-from queue import Queue
 from loguru import logger
 
-from models.tts.tts_pb2 import TTSRequest # type: ignore
+from .grpc_pool import grpc_pool
+
+from models.tts.tts_pb2 import OPUS, PCM16, TTSRequest # type: ignore
 from models.tts import tts_pb2_grpc
 
+ENCODINGS = {"pcm16": PCM16, "opus": OPUS}
+ENCODING_NAMES = {value: name for name, value in ENCODINGS.items()}
+
 class TTSClient:
     
-    def __init__(self, url: str, on_audio):
-        """on_audio(pcm: bytes, is_final: bool)"""
-        self.channel = grpc.insecure_channel(url)
-        self.stub = tts_pb2_grpc.TextToSpeechStub(self.channel)
-        self.text_queue = Queue()
+    def __init__(self, url: str, on_audio, encoding: str = "pcm16", sample_rate: int = 0):
+        """
+        async on_audio(audio: bytes, is_final: bool, audio_format: (encoding, sample_rate))
+        audio_format is what the server produced, it may fall back to PCM16 (models/tts/encoding.py)
+        """
+        self.url = url
         self.on_audio = on_audio
+        self.encoding = encoding
+        self.sample_rate = sample_rate
         self.active = False
+        self.text_queue = None
+        self.call = None
+        self.reader = None
+
+    def set_format(self, encoding: str, sample_rate: int = 0):
+        """Output format of the next stream, sample_rate 0 = the model's."""
+        self.encoding = encoding
+        self.sample_rate = sample_rate
 
     def start(self):
+        """Open a grpc.aio StreamTTS call, an asyncio task forwards its audio."""
         if self.active:
             return
         self.active = True
-        self.responses = self.stub.StreamTTS(self._text_generator())
-        self.thread = threading.Thread(target=self._read_responses,daemon=True)
-        self.thread.start()
+        self.text_queue = asyncio.Queue()
+        # The first message picks the stream's audio format
+        self.text_queue.put_nowait(TTSRequest(encoding=ENCODINGS[self.encoding], sample_rate=self.sample_rate))
+        # Shared process-wide channel, one replica per stream
+        stub = tts_pb2_grpc.TextToSpeechStub(grpc_pool.aio_channel(self.url))
+        self.call = stub.StreamTTS(self._text_generator(self.text_queue))
+        self.reader = asyncio.create_task(self._read_responses(self.call))
         logger.info("[TTS] Stream started")
         
-    def _text_generator(self):
+    async def _text_generator(self, text_queue):
         """Feeds text into gRPC stream."""
         while True:
-            req = self.text_queue.get()
+            req = await text_queue.get()
             yield req
             if req.end_of_stream:
                 break
 
-    def _read_responses(self):
-        """Background thread reading audio chunks from TTS."""
+    async def _read_responses(self, call):
+        """Task forwarding audio chunks from TTS, each awaited before the next is read."""
         try:
-            for res in self.responses:
-                self.on_audio(res.audio, res.is_final)
+            async for res in call:
+                await self.on_audio(res.audio, res.is_final, (ENCODING_NAMES[res.encoding], res.sample_rate))
                 if res.is_final:
                     logger.info("[TTS] Final audio received")
                     break
+        except grpc.aio.AioRpcError as e:
+            if e.code() != grpc.StatusCode.CANCELLED:
+                logger.error(f"[TTS] Error: {e.details()}")
         except Exception as e:
             logger.error(f"[TTS] Error: {e}")
 
-    def send_text(self, text: str):
+    async def send_text(self, text: str):
         if not self.active:
             self.start()
-        self.text_queue.put(TTSRequest(text=text, end_of_stream=False))
+        await self.text_queue.put(TTSRequest(text=text, end_of_stream=False))
 
-    def stop(self):
+    async def stop(self):
         if self.active:
-            self.text_queue.put(TTSRequest(text="", end_of_stream=True))
             self.active = False
+            await self.text_queue.put(TTSRequest(text="", end_of_stream=True))
 
-    def close(self):
-        self.channel.close()
+    async def wait(self):
+        """Until the current stream has delivered all of its audio."""
+        if self.reader is not None:
+            await asyncio.shield(self.reader)
+
+    async def close(self):
+        """End this session's stream, the shared channel stays open."""
+        self.active = False
+        if self.call is not None:
+            self.call.cancel()
+        if self.reader is not None:
+            self.reader.cancel()
 
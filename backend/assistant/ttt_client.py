@@ -1,18 +1,55 @@
-import grpc
+from django.conf import settings
+from loguru import logger
 from models.ttt import ttt_pb2_grpc
+from models.ttt.answer_cache import AnswerCache, answer_key
 from models.ttt.ttt_pb2 import QueryRequest # type: ignore
+from .grpc_pool import grpc_pool
+
+# One per Django process, shared by every session: hot questions skip the round trip
+answer_cache = AnswerCache(max_entries=settings.TTT_CACHE_SIZE, ttl=settings.TTT_CACHE_TTL)
+
 class TTTClient:
 
-    def __init__(self, url: str):
-        """on_result(text: str, is_final: bool)"""
-        self.channel = grpc.insecure_channel(url)
-        self.stub = ttt_pb2_grpc.RetrieveContextStub(self.channel)
+    def __init__(self, url: str, timeout=settings.TTT_TIMEOUT, top_k=settings.TTT_TOP_K, cache=answer_cache):
+        self.url = url
+        self.timeout = timeout
+        self.top_k = top_k
+        self.cache = cache
+
+    async def search(self, query, top_k=None):
+        """Ranked services for a query, best first: [{"text", "score", "index", ...}]"""
+        top_k = top_k or self.top_k
+        key = answer_key(query, top_k)
+        cached = self.cache.get(key)
+        if cached is not None:
+            logger.debug(f"[TTT] Cache hit | {self.cache.stats()}")
+            return cached
+
+        request = QueryRequest(text=query, top_k=top_k)
+        # Picked per call so queries rotate over TTT replicas
+        stub = ttt_pb2_grpc.RetrieveContextStub(grpc_pool.aio_channel(self.url))
+        response = await stub.RetrieveText(request, timeout=self.timeout)
+        results = [
+            {
+                "text": r.text,
+                "score": r.score,
+                "index": r.service_index,
+                "keyword_rank": r.keyword_rank,
+                "semantic_rank": r.semantic_rank,
+            }
+            for r in response.results
+        ]
+        # A newer index on the servers drops the answers of the previous one; replicas still
+        # serving an older build during a rollout don't switch the cache back
+        self.cache.set_version(response.index_version, response.index_built_at)
+        self.cache.put(key, results, response.index_version)
+        return results
 
-    def response(self,query):
-        request = QueryRequest(text=query)
-        response = self.stub.RetrieveText(request)
-        return response.text
+    async def response(self,query):
+        """Text of the best service"""
+        results = await self.search(query, top_k=1)
+        return results[0]["text"] if results else ""
 
 
     def close(self):
-        self.channel.close()
+        """Nothing to release, the channel is shared."""
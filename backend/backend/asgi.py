@@ -24,3 +24,7 @@ application = ProtocolTypeRouter({
     ),
     # Just HTTP for now. (We can add other protocols later.)
 })
+
+# The offline geocoder dataset is parsed in the background, not by the first complaint
+from geo.offline import preload_offline_geocoder
+preload_offline_geocoder()
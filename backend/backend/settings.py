@@ -45,6 +45,7 @@ INSTALLED_APPS = [
     'django.contrib.messages',
     'django.contrib.staticfiles',
     'rest_framework',###
+    'adrf',###
     'rest_framework_simplejwt',###
     'drf_spectacular',###
     'schema_viewer',###
@@ -98,6 +99,9 @@ DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': BASE_DIR / 'db.sqlite3',
+        # seconds a writer waits for SQLite's write lock (held by a grouping batch, say)
+        # before "database is locked"
+        'OPTIONS': {'timeout': 20},
     }
 }
 
@@ -142,6 +146,44 @@ STT_URL = IP + ":50051"
 TTS_URL = IP + ":50052"
 ITT_URL = IP + ":50053"
 TTT_URL = IP + ":50054"
+# Any of the URLs above may list replicas ("host1:50051,host2:50051"), see assistant/grpc_pool.py
+GRPC_KEEPALIVE_MS = 300000  # keep >= the servers' 5 min default min ping interval
+TTT_TIMEOUT = 30  # seconds, the assistant gives up on a TTT answer after this
+TTT_TOP_K = 3  # ranked services asked from TTT, the best one is the answer (models/ttt/retrieve.py)
+# TTT answers remembered per Django process, keyed by normalized query (models/ttt/answer_cache.py).
+# A new index version seen in a response clears them, the TTL bounds how long that can take
+TTT_CACHE_SIZE = 1024
+TTT_CACHE_TTL = 300  # seconds
+# Assistant speech sent to the browser: the first of these it can play ("opus" needs WebCodecs),
+# see models/tts/encoding.py. 24 kHz PCM16 is ~48 KB/s per listener, 16 kHz Opus ~3 KB/s
+TTS_AUDIO_ENCODINGS = ["opus", "pcm16"]
+TTS_AUDIO_SAMPLE_RATE = 16000
+ITT_CACHE_SIZE = 512  # caption results remembered per Django process (keyed by image hash)
+ITT_IMAGE_TRANSFER = "pixels"  # "pixels" | "jpeg" | "original", see models/caption/transfer.py
+ITT_TIMEOUT = 30  # seconds, async views give up on the caption server after this
+# Caption classes (models/caption/backends.py CLASS_NAMES) -> Domain.name, for department routing
+CAPTION_CLASS_DOMAINS = {
+    "BBMP (garbage)": "Garbage",
+    "BBMP (pothole)": "Roads",
+    "BESCOM": "Electricity",
+    "BWSSB": "Water",
+}
+# Routing only uses its jurisdiction tiers when OFFLINE_GEOCODER_PATH (below) is set and the
+# dataset's jurisdiction codes match Jurisdiction.code; otherwise every complaint is routed
+# by class alone
+DEPARTMENT_ROUTING_TTL = 300  # seconds, signals invalidate sooner within a process
+### LocationIQ (async views share one connection pool)
+LOCATIONIQ_TIMEOUT = 5  # seconds
+LOCATIONIQ_MAX_CONNECTIONS = 20
+# Reverse-geocode cache (geo/geocache.py): one lookup per geohash cell
+GEOCACHE_PRECISION = 7  # ~150m cells
+GEOCACHE_TTL = 30 * 24 * 3600  # seconds
+GEOCACHE_SIZE = 10000  # cells kept in memory per process
+GEOCACHE_PATH = BASE_DIR / "geocache.sqlite3"  # shared sqlite tier, None for memory only
+# GeoJSON FeatureCollection of ward / pincode polygons answered without LocationIQ (geo/offline.py).
+# Feature properties: suburb|ward_name|name, city, state, postcode|pincode, jurisdiction_code|code
+# None (the default) disables it: LocationIQ only, and no jurisdiction-aware routing
+OFFLINE_GEOCODER_PATH = None  # e.g. BASE_DIR / "wards.geojson"
 
 ###  JWT
 from datetime import timedelta 
@@ -152,6 +194,13 @@ SIMPLE_JWT = {
     'SLIDING_TOKEN_REFRESH_LIFETIME_LATE_USER': timedelta(days=1),
     'SLIDING_TOKEN_LIFETIME_LATE_USER': timedelta(days=30),
 }
+### Complaint grouping
+# "inline" : group inside the complaint's post_save (adds the lookup to create latency)
+# "thread" : in-process background queue woken after commit (grouping/queue.py)
+# "worker" : leave complaints pending for `python manage.py run_grouping_worker`
+# On SQLite background batches are serialized on its write lock (grouping/batch.py);
+# "worker" keeps create latency lowest there, "inline" is an explicit opt-in
+COMPLAINT_GROUPING = "thread"
 ### Files
 MEDIA_ROOT = BASE_DIR / "media"
 MEDIA_URL = "/media/"
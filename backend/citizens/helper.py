@@ -1,95 +1,89 @@
 import logging
-from entities.governance import Department
-from .itt_client import itt
+from geo.geocache import areverse_geocode
+from geo.locationiq import GeocodingError, LOCATIONIQ_KEY
+from geo.offline import ajurisdiction_code
+from .routing import department_router
+from .itt_client import aitt
 import os
 from loguru import logger
-import requests
-LOCATIONIQ_KEY = "pk.371a6630b5644f04659e2e3a616ca5c2"
 
 if LOCATIONIQ_KEY is None or not LOCATIONIQ_KEY.strip():
     logger.warning("LOCATIONIQ_KEY is not set or contains only whitespace.")
 else:
     logger.success("Loaded LOCATIONIQ_KEY")
 
-def analyze_image(file_obj):
-    """Run AI analysis on image if applicable."""
+async def aanalyze_image(file_obj):
+    """Run AI analysis on image if applicable; the event loop keeps serving while inference runs."""
     if not file_obj :
         return None, None, 0.0
-    
+
     logger.debug("Running AI image analysis...")
-    image_bytes = file_obj.read()
-    caption, pred_dept, confidence, inference_time = itt.generate_caption_from_bytes(image_bytes)
-    
+    # Streams from the upload (temp file for large images) and sends a downscaled copy
+    caption, pred_dept, confidence, inference_time = await aitt.generate_caption_from_file(file_obj)
+
     logger.debug(f"Inference | caption='{caption}' | dept='{pred_dept}' | confidence={confidence:.2f} | time={inference_time:.3f}s")
     # Reset file pointer for Django to save
     file_obj.seek(0)
-    
+
     return caption, pred_dept, confidence
 
-def get_or_create_department(pred_dept):
+async def aget_or_create_department(pred_dept, latitude=None, longitude=None):
+    """
+    Route the predicted class to a department, in the complaint's jurisdiction when the
+    location resolves to one (citizens/routing.py, no query per request).
+    Fallback to the lowest-id department.
+    """
+    department = await department_router.aroute(pred_dept, await acomplaint_jurisdiction(latitude, longitude))
+    logger.debug(f"Routed department | class={pred_dept} | name={department.name if department else None}")
+    return department
+
+async def acomplaint_jurisdiction(latitude, longitude):
     """
-    Return a department similar to predicted_dept.
-    Fallback to default department (id=1).
+    Id of the Jurisdiction the offline geocoder puts the point in, None without a location,
+    a dataset, or a Jurisdiction row for the dataset's code.
     """
-    # To find match
-    if pred_dept:
-        department = (
-            Department.objects
-            .filter(name__icontains=pred_dept,)
-            .first()
-        )
-        if department:
-            logger.debug(f"Matched department | name = {department.name}")
-            return department
+    if latitude is None or longitude is None:
+        return None
+    return await department_router.ajurisdiction_id(await ajurisdiction_code(latitude, longitude))
+
+def location_from_response(location_data, latitude, longitude):
+    """Pick the fields the frontend uses out of a LocationIQ reverse-geocoding response."""
+    address = location_data.get("address", {})
+
+    city = address.get("city") or address.get("town") or address.get("village") or ""
+    pincode = address.get("postcode") or ""
+    state = address.get("state") or ""
+    address_line_2 = location_data.get("display_name") or ""
+    suburb = address.get("suburb") or address.get("neighbourhood") or address.get("village") or "Unknown"
+
+    logger.debug("Resolved location")
+
+    return {
+        "city": city,
+        "pincode": pincode,
+        "state": state,
+        "address_line_2": address_line_2,
+        "suburb": suburb,
+        "latitude": latitude,
+        "longitude": longitude
+    }
+
+def unknown_location(latitude, longitude):
+    return {
+        "city": "",
+        "pincode": "",
+        "state": "",
+        "address_line_2": "",
+        "suburb": "Unknown",
+        "latitude": latitude,
+        "longitude": longitude
+    }
 
-    # Fallback
-    default_department = Department.objects.get(id=1)
-    logger.debug(f"Falling back to default department | id=1 | name ={default_department.name}")
-    return default_department
+async def aresolve_location(latitude, longitude):
+    """Resolve detailed location using LocationIQ API (cached per geohash cell, see geo/geocache.py)."""
+    try:
+        return location_from_response(await areverse_geocode(latitude, longitude), latitude, longitude)
 
-def resolve_location(latitude, longitude):
-     """Resolve detailed location using LocationIQ API."""
-     url = "https://us1.locationiq.com/v1/reverse"
-     params = {
-         "key": LOCATIONIQ_KEY,
-         "lat": latitude,
-         "lon": longitude,
-         "format": "json"
-     }
-     
-     try:
-         response = requests.get(url, params=params, timeout=5)
-         response.raise_for_status()
-         location_data = response.json()
-         address = location_data.get("address", {})
-         
-         city = address.get("city") or address.get("town") or address.get("village") or ""
-         pincode = address.get("postcode") or ""
-         state = address.get("state") or ""
-         address_line_2 = location_data.get("display_name") or ""
-         suburb = address.get("suburb") or address.get("neighbourhood") or address.get("village") or "Unknown"
-         
-         logger.debug("Resolved location")
-         
-         return {
-             "city": city,
-             "pincode": pincode,
-             "state": state,
-             "address_line_2": address_line_2,
-             "suburb": suburb,
-             "latitude": latitude,
-             "longitude": longitude
-         }
-     
-     except requests.RequestException as e:
-         logger.error(f"LocationIQ error: {str(e)}")
-         return {
-             "city": "",
-             "pincode": "",
-             "state": "",
-             "address_line_2": "",
-             "suburb": "Unknown",
-             "latitude": latitude,
-             "longitude": longitude
-         }
- 
\ No newline at end of file
+    except GeocodingError as e:
+        logger.error(f"LocationIQ error: {str(e)}")
+        return unknown_location(latitude, longitude)
@@ -1,21 +1,91 @@
-import grpc
+import asyncio
+from loguru import logger
+from assistant.grpc_pool import grpc_pool
 from models.caption.caption_pb2 import ImageRequest # type: ignore
 from models.caption import caption_pb2_grpc
+from models.caption.result_cache import CaptionCache, stream_content_hash
+from models.caption.transfer import request_fields
 from django.conf import settings
 
 ITT_URL = settings.ITT_URL
+HASH_CHUNK_SIZE = 1024 * 1024
+
+def file_chunks(file_obj):
+    """Uploaded files (memory or temp file) are read in chunks, never as one bytes object."""
+    if hasattr(file_obj, "chunks"):
+        return file_obj.chunks(HASH_CHUNK_SIZE)
+    file_obj.seek(0)
+    return iter(lambda: file_obj.read(HASH_CHUNK_SIZE), b"")
+
+def prepare_request(cache, file_obj, transfer, classify_only):
+    """
+    CPU-bound part shared by both clients: hash the file in chunks, answer from the cache
+    or downscale it into an ImageRequest. The file position is left at the start.
+    Returns (digest, cached result or None, request or None).
+    """
+    digest = stream_content_hash(file_chunks(file_obj))
+    # A classify-only entry (cached[4] False) can't answer a caption request
+    cached = cache.get(digest, usable=lambda value: classify_only or value[4])
+    if cached is not None:
+        logger.debug(f"[ITT] Cache hit | {cache.stats()}")
+        return digest, (cached[0], cached[1], cached[2], 0.0), None
+
+    file_obj.seek(0)
+    try:
+        fields = request_fields(file_obj, transfer)
+    finally:
+        file_obj.seek(0)
+    return digest, None, ImageRequest(classify_only=classify_only, **fields)
+
+def remember_response(cache, digest, response, classify_only):
+    result = (response.caption, response.predicted_department, response.confidence, response.inference_time)
+    cache.put(digest, result + (not classify_only,))
+    return result
+
 class ITTClient:
-    def __init__(self, url=ITT_URL):
-        # ==larger message sizes (50MB)
-        options = [
-            ('grpc.max_send_message_length', 50 * 1024 * 1024),
-            ('grpc.max_receive_message_length', 50 * 1024 * 1024),
-        ]
-        self.channel = grpc.insecure_channel(url, options=options)
-        self.stub = caption_pb2_grpc.ImageCaptionServiceStub(self.channel)
-
-    def generate_caption_from_bytes(self, image_bytes: bytes):
-        response = self.stub.GenerateCaption(ImageRequest(image=image_bytes))
-        return response.caption, response.predicted_department, response.confidence, response.inference_time
-
-itt = ITTClient(ITT_URL)
\ No newline at end of file
+    def __init__(self, url=ITT_URL, cache_size=settings.ITT_CACHE_SIZE, transfer=settings.ITT_IMAGE_TRANSFER):
+        # Shared channel from the pool (50MB messages, keepalive, replicas)
+        self.url = url
+        # Re-uploads of the same photo are answered without a round trip
+        self.cache = CaptionCache(max_entries=cache_size)
+        self.transfer = transfer
+
+    def generate_caption_from_file(self, file_obj, classify_only: bool = False):
+        """
+        Caption an uploaded file (Django UploadedFile or any binary file object).
+        The file is hashed in chunks and downscaled while decoding, so a large temp file
+        is never read into memory whole.
+        classify_only skips caption decoding on the server (caption comes back empty).
+        """
+        digest, result, request = prepare_request(self.cache, file_obj, self.transfer, classify_only)
+        if result is not None:
+            return result
+        stub = caption_pb2_grpc.ImageCaptionServiceStub(grpc_pool.channel(self.url))
+        response = stub.GenerateCaption(request)
+        return remember_response(self.cache, digest, response, classify_only)
+
+class AsyncITTClient:
+    """
+    grpc.aio twin of ITTClient for async views: awaiting inference doesn't hold a worker thread.
+    Hashing / downscaling run in the default thread pool, the RPC itself on the event loop.
+    """
+
+    def __init__(self, url=ITT_URL, cache=None, transfer=settings.ITT_IMAGE_TRANSFER, timeout=settings.ITT_TIMEOUT):
+        self.url = url
+        self.cache = cache if cache is not None else CaptionCache(max_entries=settings.ITT_CACHE_SIZE)
+        self.transfer = transfer
+        self.timeout = timeout
+
+    async def generate_caption_from_file(self, file_obj, classify_only: bool = False):
+        digest, result, request = await asyncio.to_thread(
+            prepare_request, self.cache, file_obj, self.transfer, classify_only
+        )
+        if result is not None:
+            return result
+        stub = caption_pb2_grpc.ImageCaptionServiceStub(grpc_pool.aio_channel(self.url))
+        response = await stub.GenerateCaption(request, timeout=self.timeout)
+        return remember_response(self.cache, digest, response, classify_only)
+
+itt = ITTClient(ITT_URL)
+# Both clients answer from the same cache
+aitt = AsyncITTClient(ITT_URL, cache=itt.cache)
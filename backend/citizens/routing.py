@@ -0,0 +1,110 @@
+import threading
+import time
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from loguru import logger
+
+from entities.governance import Department, Jurisdiction
+
+class DepartmentRouter:
+    """
+    In-memory routing of a predicted image class (+ jurisdiction) to a department, replacing
+    the per-request `name__icontains` scan. Built from Department / Domain / Jurisdiction in
+    three queries, invalidated by signals/governance.py and rebuilt after `ttl` seconds
+    anyway so other processes pick changes up too.
+
+    Lookup order, each an O(1) dict hit:
+    1. department of the class's domain in the jurisdiction
+    2. department whose name contains the class in the jurisdiction (the old name match)
+    3. the same two ignoring the jurisdiction
+    4. lowest-id department of the jurisdiction, then lowest-id department overall
+    Ties go to the lowest department id.
+    """
+
+    def __init__(self, class_domains, ttl=300):
+        self.class_domains = {name: domain.lower() for name, domain in class_domains.items()}
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._index = None
+        self._built_at = 0.0
+
+    def invalidate(self):
+        self._index = None
+
+    def is_fresh(self, index=None):
+        """Whether `index` (default: the current one) can still be served."""
+        index = self._index if index is None else index
+        return index is not None and index is self._index and time.monotonic() - self._built_at < self.ttl
+
+    def current(self):
+        """The index tuple, read once so a concurrent invalidate() can't swap it mid-lookup."""
+        index = self._index
+        return index if self.is_fresh(index) else self.build()
+
+    def build(self):
+        """Rebuild unless fresh; returns the (jurisdictions, by_domain, by_name, by_jurisdiction) tuple."""
+        with self._lock:
+            index = self._index
+            if self.is_fresh(index):
+                return index
+            jurisdictions = dict(Jurisdiction.objects.values_list("code", "id"))
+            departments = list(Department.objects.order_by("id").prefetch_related("domains"))
+
+            by_domain = {}  # (domain, jurisdiction_id | None) -> department
+            by_name = {}  # (class, jurisdiction_id | None) -> department
+            by_jurisdiction = {}  # jurisdiction_id -> department
+            for department in departments:
+                for key in (department.jurisdiction_id, None):
+                    by_jurisdiction.setdefault(key, department)
+                    for domain in department.domains.all():
+                        by_domain.setdefault((domain.name.lower(), key), department)
+                    for class_name in self.class_domains:
+                        if class_name.lower() in department.name.lower():
+                            by_name.setdefault((class_name, key), department)
+
+            index = (jurisdictions, by_domain, by_name, by_jurisdiction)
+            self._built_at = time.monotonic()
+            self._index = index
+            logger.debug(f"[ROUTING] Built department index | departments={len(departments)} | jurisdictions={len(jurisdictions)}")
+            return index
+
+    def jurisdiction_id(self, jurisdiction_code):
+        """Id of the Jurisdiction with this code, None (logged) when no such row exists."""
+        if jurisdiction_code is None:
+            return None
+        index = self.current()
+        jurisdiction_id = index[0].get(jurisdiction_code)
+        if jurisdiction_id is None:
+            logger.warning(f"[ROUTING] No jurisdiction with code {jurisdiction_code!r}, routing without one")
+        return jurisdiction_id
+
+    async def ajurisdiction_id(self, jurisdiction_code):
+        if jurisdiction_code is not None and not self.is_fresh():
+            await sync_to_async(self.build)()
+        return self.jurisdiction_id(jurisdiction_code)
+
+    def route(self, predicted_class, jurisdiction_id=None):
+        """Department for a predicted class, None only when there are no departments at all."""
+        index = self.current()
+        _, by_domain, by_name, by_jurisdiction = index
+        domain = self.class_domains.get(predicted_class)
+
+        keys = (jurisdiction_id, None) if jurisdiction_id is not None else (None,)
+        for key in keys:
+            department = by_domain.get((domain, key)) or by_name.get((predicted_class, key))
+            if department is not None:
+                return department
+        for key in keys:
+            department = by_jurisdiction.get(key)
+            if department is not None:
+                return department
+        return None
+
+    async def aroute(self, predicted_class, jurisdiction_id=None):
+        """route for async views: only a rebuild touches the database."""
+        if not self.is_fresh():
+            await sync_to_async(self.build)()
+        return self.route(predicted_class, jurisdiction_id)
+
+department_router = DepartmentRouter(settings.CAPTION_CLASS_DOMAINS, ttl=settings.DEPARTMENT_ROUTING_TTL)
@@ -1,3 +1,5 @@
+from asgiref.sync import sync_to_async
+from adrf.views import APIView as AsyncAPIView
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework import status
@@ -19,38 +21,50 @@ class AllComplaintsView(APIView):
         serializer = self.serializer_class(complaints, many=True)
         return Response(serializer.data, status=status.HTTP_200_OK)
     
-class ImageCaptionAPIView(APIView):
+class ImageCaptionAPIView(AsyncAPIView):
+    """Async: the worker keeps serving other requests while the caption server runs inference."""
     permission_classes = [IsAuthenticated]
     parser_classes = [MultiPartParser, FormParser]
     serializer_class = complaints_serializer.ImageCaptionSerializer
 
-    def post(self, request):
+    def validate(self, request):
+        # request.data is parsed lazily, on first access: here, in the worker thread
         serializer = self.serializer_class(data=request.data)
         serializer.is_valid(raise_exception=True)
-        file = serializer.validated_data.get("file",None)
-        caption, dept_name, confidence = helper.analyze_image(file)
-        department = helper.get_or_create_department(dept_name)
+        return serializer.validated_data
+
+    async def post(self, request):
+        # Multipart parsing + PIL verification of the image are CPU work, keep them off the event loop
+        data = await sync_to_async(self.validate, thread_sensitive=False)(request)
+        file = data.get("file",None)
+        caption, dept_name, confidence = await helper.aanalyze_image(file)
+        department = await helper.aget_or_create_department(
+            dept_name,
+            data.get("latitude"),
+            data.get("longitude"),
+        )
         return Response({
             "caption": caption,
             "suggested_department": {
                 "id": department.id,
                 "name": department.name
-            },
+            } if department else None,
             "confidence": confidence
         })
 
-class ResolveLocationAPIView(APIView):
+class ResolveLocationAPIView(AsyncAPIView):
+    """Async: waiting on LocationIQ doesn't hold a worker thread."""
     permission_classes = [IsAuthenticated]
     serializer_class = complaints_serializer.ResolveLocationSerializer
 
-    def post(self, request):
+    async def post(self, request):
         serializer = self.serializer_class(data=request.data)
         serializer.is_valid(raise_exception=True)
 
         lat = serializer.validated_data.get("latitude")
         lon = serializer.validated_data.get("longitude")
 
-        location = helper.resolve_location(lat, lon)
+        location = await helper.aresolve_location(lat, lon)
         return Response(location)
 
 
@@ -5,4 +5,5 @@ class EntitiesConfig(AppConfig):
     name = 'entities'
     def ready(self):
         import signals.complaints
-        import signals.groups_status
\ No newline at end of file
+        import signals.groups_status
+        import signals.governance
\ No newline at end of file
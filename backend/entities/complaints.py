@@ -10,7 +10,11 @@ class ComplaintGroup(models.Model):
     # Representative location (centroid)
     centroid_latitude = models.FloatField()
     centroid_longitude = models.FloatField()
+    # Complaints folded into the running-mean centroid (grouping/centroids.py)
+    member_count = models.PositiveIntegerField(default=1)
     radius_meters = models.PositiveIntegerField(default=3000)
+    # Geohash cell of the centroid, kept in sync by signals/complaints.py (spatial lookup index)
+    geohash = models.CharField(max_length=12, blank=True, default="")
     grouped_status = models.CharField(
         max_length=20,
         choices=[
@@ -25,6 +29,10 @@ class ComplaintGroup(models.Model):
     updated_at = models.DateTimeField(auto_now=True)
     class Meta:
         db_table = "complaint_groups"
+        indexes = [
+            models.Index(fields=["department", "geohash"]),
+            models.Index(fields=["department", "radius_meters"]),
+        ]
     
     def __str__(self):
         return f"{self.department}-{self.grouped_status}-{self.centroid_latitude:.2f}:{self.centroid_longitude:.2f}"
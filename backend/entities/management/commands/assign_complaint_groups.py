@@ -0,0 +1,23 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from grouping.batch import assign_pending, pending_complaints
+
+class Command(BaseCommand):
+    help = "Group every complaint that has no group yet (CSV dumps, offline sync, bulk_create imports)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--limit", type=int, default=None, help="Only group the oldest N pending complaints")
+
+    def handle(self, *args, **options):
+        pending = pending_complaints().count()
+        if not pending:
+            self.stdout.write("No pending complaints")
+            return
+        start = time.perf_counter()
+        assigned, created = assign_pending(limit=options["limit"])
+        elapsed = time.perf_counter() - start
+        self.stdout.write(self.style.SUCCESS(
+            f"Grouped {assigned}/{pending} complaints in {elapsed:.2f}s | new groups={created}"
+        ))
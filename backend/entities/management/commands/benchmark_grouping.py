@@ -0,0 +1,78 @@
+import random
+import statistics
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from entities.complaints import ComplaintGroup
+from entities.governance import Department, Jurisdiction
+from grouping.index import find_nearest_group, find_nearest_group_linear, group_cell
+
+# Bengaluru-ish bounding box, wide enough to spread 100k groups over a city
+LAT_RANGE = (12.75, 13.20)
+LON_RANGE = (77.35, 77.85)
+
+class Command(BaseCommand):
+    help = (
+        "Compare per-complaint group lookup latency (the O(groups) part of complaint creation) "
+        "between the geohash cell index and the linear scan. Runs inside a rolled back transaction."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--sizes", nargs="+", type=int, default=[1000, 10000, 100000])
+        parser.add_argument("--samples", type=int, default=100, help="Complaint locations timed per size")
+        parser.add_argument("--seed", type=int, default=42)
+
+    def handle(self, *args, **options):
+        rng = random.Random(options["seed"])
+        with transaction.atomic():
+            jurisdiction = Jurisdiction.objects.create(name="bench", code="BENCH-GROUPING", location="bench")
+            department = Department.objects.create(name="bench", code="BENCH", contact_point="bench", jurisdiction=jurisdiction)
+            existing = 0
+            for size in sorted(options["sizes"]):
+                self._populate(department, size - existing, rng)
+                existing = size
+                self._run(department, size, options["samples"], rng)
+            transaction.set_rollback(True)
+
+    def _populate(self, department, count, rng):
+        groups = []
+        for _ in range(count):
+            lat = rng.uniform(*LAT_RANGE)
+            lon = rng.uniform(*LON_RANGE)
+            # bulk_create skips pre_save, so the cell is filled in here
+            groups.append(ComplaintGroup(
+                title="bench", department=department,
+                centroid_latitude=lat, centroid_longitude=lon,
+                geohash=group_cell(lat, lon),
+            ))
+        ComplaintGroup.objects.bulk_create(groups, batch_size=5000)
+
+    def _run(self, department, size, samples, rng):
+        points = [(rng.uniform(*LAT_RANGE), rng.uniform(*LON_RANGE)) for _ in range(samples)]
+        timings = {}
+        results = {}
+        for name, lookup in (("linear", find_nearest_group_linear), ("geohash", find_nearest_group)):
+            elapsed = []
+            found = []
+            for lat, lon in points:
+                start = time.perf_counter()
+                group = lookup(department, lat, lon)
+                elapsed.append(time.perf_counter() - start)
+                found.append(group.pk if group else None)
+            timings[name] = elapsed
+            results[name] = found
+
+        mismatches = sum(1 for a, b in zip(results["linear"], results["geohash"]) if a != b)
+        self.stdout.write(f"groups={size}")
+        for name, elapsed in timings.items():
+            elapsed_ms = sorted(e * 1000 for e in elapsed)
+            p99 = elapsed_ms[min(len(elapsed_ms) - 1, int(len(elapsed_ms) * 0.99))]
+            self.stdout.write(
+                f"  {name:<8} mean={statistics.mean(elapsed_ms):8.3f}ms "
+                f"p50={statistics.median(elapsed_ms):8.3f}ms p99={p99:8.3f}ms"
+            )
+        speedup = statistics.mean(timings["linear"]) / max(statistics.mean(timings["geohash"]), 1e-9)
+        style = self.style.SUCCESS if mismatches == 0 else self.style.ERROR
+        self.stdout.write(style(f"  speedup={speedup:.1f}x mismatches={mismatches}/{len(points)}"))
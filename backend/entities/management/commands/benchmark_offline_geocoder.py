@@ -0,0 +1,55 @@
+import random
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from geo.offline import OfflineGeocoder
+
+class Command(BaseCommand):
+    help = (
+        "Time offline reverse-geocoding lookups (geo/offline.py) on random points inside the "
+        "dataset's bounding box, and check the grid index against a scan of every region."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--path", default=settings.OFFLINE_GEOCODER_PATH, help="GeoJSON dataset (default: OFFLINE_GEOCODER_PATH)")
+        parser.add_argument("--samples", type=int, default=10000)
+        parser.add_argument("--seed", type=int, default=42)
+
+    def handle(self, *args, **options):
+        if not options["path"]:
+            raise CommandError("No dataset: pass --path or set OFFLINE_GEOCODER_PATH")
+
+        start = time.perf_counter()
+        geocoder = OfflineGeocoder.from_geojson(options["path"])
+        self.stdout.write(
+            f"loaded regions={len(geocoder.regions)} grid_cells={len(geocoder.grid)} "
+            f"in {time.perf_counter() - start:.2f}s"
+        )
+        if not geocoder.regions:
+            raise CommandError("The dataset has no Polygon / MultiPolygon features")
+
+        min_x = min(region.bbox[0] for region in geocoder.regions)
+        min_y = min(region.bbox[1] for region in geocoder.regions)
+        max_x = max(region.bbox[2] for region in geocoder.regions)
+        max_y = max(region.bbox[3] for region in geocoder.regions)
+        rng = random.Random(options["seed"])
+        points = [(rng.uniform(min_y, max_y), rng.uniform(min_x, max_x)) for _ in range(options["samples"])]
+
+        start = time.perf_counter()
+        found = [geocoder.region_at(lat, lon) for lat, lon in points]
+        elapsed = time.perf_counter() - start
+
+        # Regions are sorted smallest first, so the first containing one is the expected answer
+        mismatches = sum(
+            1 for (lat, lon), region in zip(points, found)
+            if region is not next((r for r in geocoder.regions if r.contains(lon, lat)), None)
+        )
+        covered = sum(1 for region in found if region is not None)
+        self.stdout.write(
+            f"lookups={len(points)} covered={covered} "
+            f"rate={len(points) / elapsed:,.0f}/s mean={elapsed / len(points) * 1e6:.1f}us"
+        )
+        style = self.style.SUCCESS if mismatches == 0 else self.style.ERROR
+        self.stdout.write(style(f"mismatches={mismatches}/{len(points)}"))
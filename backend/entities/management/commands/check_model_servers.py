@@ -0,0 +1,21 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from assistant.grpc_pool import grpc_pool
+
+class Command(BaseCommand):
+    help = "Connect to every model-server replica (STT, TTS, caption, TTT) through the shared channel pool."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--timeout", type=float, default=5.0, help="Seconds to wait per replica")
+
+    def handle(self, *args, **options):
+        services = {"stt": settings.STT_URL, "tts": settings.TTS_URL, "itt": settings.ITT_URL, "ttt": settings.TTT_URL}
+        down = 0
+        for name, url in services.items():
+            for target, ready in grpc_pool.wait_ready(url, timeout=options["timeout"]).items():
+                style = self.style.SUCCESS if ready else self.style.ERROR
+                self.stdout.write(style(f"{name:<4} {target:<24} {'ready' if ready else 'unreachable'}"))
+                down += not ready
+        if down:
+            self.stdout.write(self.style.WARNING(f"{down} replica(s) unreachable"))
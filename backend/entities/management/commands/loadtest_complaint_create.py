@@ -0,0 +1,112 @@
+import random
+import statistics
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import OperationalError
+from django.test import override_settings
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from citizens.views.complaints import ComplaintCreateAPIView
+from entities.citizens import CitizenProfile
+from entities.complaints import Complaint, ComplaintGroup
+from entities.governance import Department, Jurisdiction
+from entities.models import User
+from grouping.batch import pending_complaints
+from grouping.index import group_cell
+from grouping.queue import grouping_queue
+
+LAT_RANGE = (12.75, 13.20)
+LON_RANGE = (77.35, 77.85)
+
+class Command(BaseCommand):
+    help = (
+        "Measure POST /api/citizens/complaints/ latency for each COMPLAINT_GROUPING mode: inline "
+        "(old behaviour), thread (in-process queue grouping concurrently, so its lock waits "
+        "count) and worker (queued only). Requests commit like in production; everything the "
+        "test created is deleted afterwards."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--requests", type=int, default=300)
+        parser.add_argument("--groups", type=int, default=10000, help="Active groups in the department")
+        parser.add_argument("--seed", type=int, default=7)
+        parser.add_argument("--drain-timeout", type=float, default=120, help="Seconds to wait for the thread mode's queue")
+
+    def handle(self, *args, **options):
+        rng = random.Random(options["seed"])
+        factory = APIRequestFactory()
+        view = ComplaintCreateAPIView.as_view()
+
+        jurisdiction = Jurisdiction.objects.create(name="load", code="LOADTEST", location="load")
+        department = Department.objects.create(name="load", code="LOAD", contact_point="load", jurisdiction=jurisdiction)
+        user = User.objects.create(username="loadtest-citizen", email="loadtest@example.com")
+        try:
+            CitizenProfile.objects.create(user=user)
+            groups = []
+            for _ in range(options["groups"]):
+                lat, lon = rng.uniform(*LAT_RANGE), rng.uniform(*LON_RANGE)
+                groups.append(ComplaintGroup(
+                    title="load", department=department,
+                    centroid_latitude=lat, centroid_longitude=lon, geohash=group_cell(lat, lon),
+                ))
+            ComplaintGroup.objects.bulk_create(groups, batch_size=5000)
+
+            for mode in ("inline", "thread", "worker"):
+                with override_settings(COMPLAINT_GROUPING=mode):
+                    latencies, errors = self._post(view, factory, user, department, rng, mode, options["requests"])
+                    self._report(mode, latencies, errors)
+                    if mode == "thread":
+                        self._wait_for_queue(department, options["drain_timeout"])
+                # Worker mode leaves its complaints pending, nothing groups them here
+        finally:
+            Complaint.objects.filter(department=department).delete()
+            ComplaintGroup.objects.filter(department=department).delete()
+            department.delete()
+            user.delete()
+            jurisdiction.delete()
+
+    def _post(self, view, factory, user, department, rng, mode, count):
+        latencies = []
+        errors = 0
+        for i in range(count):
+            request = factory.post("/api/citizens/complaints/", {
+                "department": department.id,
+                "title": f"load {mode} {i}",
+                "description": "load test",
+                "latitude": rng.uniform(*LAT_RANGE),
+                "longitude": rng.uniform(*LON_RANGE),
+            }, format="json")
+            force_authenticate(request, user=user)
+            start = time.perf_counter()
+            try:
+                response = view(request)
+            except OperationalError as e:  # "database is locked" behind a grouping batch
+                errors += 1
+                self.stderr.write(f"{mode}: {e}")
+                continue
+            latencies.append((time.perf_counter() - start) * 1000)
+            assert response.status_code == 201, response.data
+        return latencies, errors
+
+    def _wait_for_queue(self, department, timeout):
+        start = time.perf_counter()
+        pending = pending_complaints().filter(department=department)
+        grouping_queue.notify()
+        while pending.exists():
+            if time.perf_counter() - start > timeout:
+                self.stderr.write(f"thread: {pending.count()} complaints still pending after {timeout:.0f}s")
+                return
+            time.sleep(0.1)
+        self.stdout.write(f"thread  queue drained {time.perf_counter() - start:.2f}s after the last request")
+
+    def _report(self, mode, latencies, errors):
+        if not latencies:
+            self.stdout.write(f"{mode:<7} all {errors} requests failed")
+            return
+        latencies.sort()
+        p99 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))]
+        self.stdout.write(
+            f"{mode:<7} n={len(latencies)} mean={statistics.mean(latencies):7.2f}ms "
+            f"p50={statistics.median(latencies):7.2f}ms p99={p99:7.2f}ms errors={errors}"
+        )
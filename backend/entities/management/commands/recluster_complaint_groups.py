@@ -0,0 +1,42 @@
+from django.core.management.base import BaseCommand
+
+from entities.complaints import ComplaintGroup
+from grouping.index import ACTIVE_STATUSES
+from grouping.recluster import recluster_department
+
+class Command(BaseCommand):
+    help = (
+        "Recompute group centroids from their complaints and merge overlapping groups "
+        "(DBSCAN over group centroids, per department and status). Complaints are streamed in chunks."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--eps", type=float, default=500.0, help="Merge distance between centroids in meters")
+        parser.add_argument("--min-members", type=int, default=1, help="Complaints needed around a core group")
+        parser.add_argument("--department", type=int, default=None, help="Only this department id")
+        parser.add_argument("--dry-run", action="store_true", help="Report merges without writing")
+
+    def handle(self, *args, **options):
+        departments = (
+            ComplaintGroup.objects
+            .filter(grouped_status__in=ACTIVE_STATUSES, department__isnull=False)
+            .values_list("department_id", flat=True)
+            .distinct()
+        )
+        if options["department"]:
+            departments = [options["department"]]
+
+        total_groups = total_merged = 0
+        for department_id in departments:
+            for status in ACTIVE_STATUSES:
+                groups, merged = recluster_department(
+                    department_id, status,
+                    eps_meters=options["eps"],
+                    min_members=options["min_members"],
+                    dry_run=options["dry_run"],
+                )
+                total_groups += groups
+                total_merged += merged
+
+        prefix = "[dry-run] " if options["dry_run"] else ""
+        self.stdout.write(self.style.SUCCESS(f"{prefix}groups={total_groups} merged={total_merged}"))
@@ -0,0 +1,32 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+from loguru import logger
+
+from grouping.queue import BATCH_SIZE, drain
+
+class Command(BaseCommand):
+    help = "Group pending complaints (group_id IS NULL) in batches, polling for new ones."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=BATCH_SIZE)
+        parser.add_argument("--interval", type=float, default=1.0, help="Seconds between polls when idle")
+        parser.add_argument("--once", action="store_true", help="Drain the queue once and exit")
+
+    def handle(self, *args, **options):
+        logger.info(f"[GROUPING] Worker started | batch_size={options['batch_size']}")
+        skipped = set()  # complaints that fail on their own are retried after a restart
+        while True:
+            try:
+                grouped = drain(options["batch_size"], skipped)
+                if grouped:
+                    logger.info(f"[GROUPING] Grouped {grouped} complaints")
+            except Exception as e:
+                # Nothing was written for the failed batch, its rows are still pending
+                logger.error(f"[GROUPING] Batch failed, retrying: {e}")
+            finally:
+                close_old_connections()
+            if options["once"]:
+                return
+            time.sleep(options["interval"])
@@ -0,0 +1,30 @@
+from math import radians, cos, sin, asin, sqrt
+import numpy as np
+from .geohash import EARTH_RADIUS_M
+
+def haversine(lat1, lon1, lat2, lon2):
+    """Calculate distance between two lat/lng points in meters."""
+    R = EARTH_RADIUS_M
+    lat1, lon1, lat2, lon2 = map(radians, [lat1, lon1, lat2, lon2]) # map(function, iterable, ...)
+    dlat = lat2 - lat1
+    dlon = lon2 - lon1
+    a = sin(dlat / 2)**2 + cos(lat1) * cos(lat2) * sin(dlon / 2)**2
+    c = 2 * asin(sqrt(a))
+    return R * c
+
+def haversine_np(lat1, lon1, lat2, lon2):
+    """Same formula as `haversine`, element-wise over broadcastable NumPy arrays."""
+    lat1, lon1, lat2, lon2 = (np.radians(np.asarray(v, dtype=np.float64)) for v in (lat1, lon1, lat2, lon2))
+    dlat = lat2 - lat1
+    dlon = lon2 - lon1
+    a = np.sin(dlat / 2)**2 + np.cos(lat1) * np.cos(lat2) * np.sin(dlon / 2)**2
+    c = 2 * np.arcsin(np.sqrt(a))
+    return EARTH_RADIUS_M * c
+
+def haversine_matrix(lat1, lon1, lat2, lon2):
+    """Pairwise distances in meters between N points and M points, shape (N, M)."""
+    lat1 = np.asarray(lat1, dtype=np.float64)[:, None]
+    lon1 = np.asarray(lon1, dtype=np.float64)[:, None]
+    lat2 = np.asarray(lat2, dtype=np.float64)[None, :]
+    lon2 = np.asarray(lon2, dtype=np.float64)[None, :]
+    return haversine_np(lat1, lon1, lat2, lon2)
@@ -0,0 +1,259 @@
+import asyncio
+import json
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+
+from django.conf import settings
+from loguru import logger
+
+from geo import geohash, locationiq, offline
+
+class ReverseGeocodeCache:
+    """
+    Reverse-geocoding results keyed by geohash cell: everyone inside the same cell
+    (~150m at precision 7) shares one lookup, made at the cell centre.
+
+    - Memory tier: OrderedDict LRU bounded by `max_entries`
+    - Disk tier (optional): sqlite file bounded by `max_disk_entries`, shared by every
+      process and kept across restarts
+    - Entries expire `ttl` seconds after they were fetched
+    - Concurrent misses for the same cell wait for the single lookup in flight
+    - Values must be JSON serialisable, failed lookups are not cached
+    """
+
+    def __init__(self, precision=7, ttl=30 * 24 * 3600, max_entries=10000, disk_path=None, max_disk_entries=200000):
+        self.precision = precision
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.max_disk_entries = max_disk_entries
+        self._entries = OrderedDict()  # cell -> (expires_at, value)
+        self._lock = threading.Lock()  # memory tier and counters, taken on the event loop too
+        self._disk_lock = threading.Lock()  # sqlite connection, never taken on the event loop
+        self._inflight = {}  # cell -> concurrent Future (sync callers)
+        self._ainflight = {}  # cell -> asyncio Task (async callers)
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self._disk_path = str(disk_path) if disk_path else None
+        self._db = None
+
+    def cell(self, latitude, longitude):
+        return geohash.encode(float(latitude), float(longitude), self.precision)
+
+    def lookup(self, latitude, longitude, fetch):
+        """
+        Cached result for the cell containing (latitude, longitude).
+        On a miss fetch(cell_lat, cell_lng) is called once, other threads asking for
+        the same cell meanwhile wait for it. fetch's exceptions propagate to all of them.
+        """
+        cell = self.cell(latitude, longitude)
+        value = self.get(cell)
+        if value is not None:
+            return value
+
+        with self._lock:
+            future = self._inflight.get(cell)
+            owner = future is None
+            if owner:
+                future = self._inflight[cell] = Future()
+                self.misses += 1
+            else:
+                self.coalesced += 1
+        if not owner:
+            return future.result()
+
+        try:
+            value = fetch(*geohash.center(cell))
+            self.put(cell, value)
+            future.set_result(value)
+            return value
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        finally:
+            with self._lock:
+                self._inflight.pop(cell, None)
+
+    async def alookup(self, latitude, longitude, afetch):
+        """
+        lookup for async callers, afetch is a coroutine function. Only the memory tier is
+        read on the event loop, the sqlite tier runs in a thread.
+        """
+        cell = self.cell(latitude, longitude)
+        value = self.get_memory(cell)
+        if value is None and self._disk_path:
+            value = await asyncio.to_thread(self.get_disk, cell)
+        if value is not None:
+            return value
+
+        task = self._ainflight.get(cell)
+        if task is None or task.get_loop() is not asyncio.get_running_loop():
+            self.misses += 1
+            task = asyncio.ensure_future(self._afill(cell, afetch))
+            self._ainflight[cell] = task
+            task.add_done_callback(lambda done: self._aforget(cell, done))
+        else:
+            self.coalesced += 1
+        # shield: a caller that goes away doesn't cancel the lookup the others wait for
+        return await asyncio.shield(task)
+
+    def _aforget(self, cell, task):
+        # A task of another loop may have replaced this one meanwhile, leave that one alone
+        if self._ainflight.get(cell) is task:
+            del self._ainflight[cell]
+
+    async def _afill(self, cell, afetch):
+        value = await afetch(*geohash.center(cell))
+        if self._disk_path:
+            await asyncio.to_thread(self.put, cell, value)
+        else:
+            self.put(cell, value)
+        return value
+
+    def get(self, cell):
+        """Unexpired value for a cell (memory, then disk) or None."""
+        value = self.get_memory(cell)
+        if value is None and self._disk_path:
+            value = self.get_disk(cell)
+        return value
+
+    def get_memory(self, cell):
+        """Unexpired value for a cell from the memory tier, never touches the disk."""
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(cell)
+            if entry is not None:
+                if entry[0] > now:
+                    self._entries.move_to_end(cell)
+                    self.hits += 1
+                    return entry[1]
+                del self._entries[cell]
+            return None
+
+    def get_disk(self, cell):
+        """Unexpired value for a cell from the sqlite tier (blocking), kept in memory after."""
+        now = time.time()
+        # sqlite (up to its busy timeout) never runs under self._lock, which the loop takes
+        with self._disk_lock:
+            try:
+                stored = self._disk_get(cell, now)
+            except sqlite3.Error as e:
+                self._disk_failed(f"read failed, treating {cell} as a miss", e)
+                return None
+        if stored is None:
+            return None
+        with self._lock:
+            self._remember(cell, *stored)
+            self.hits += 1
+        return stored[1]
+
+    def put(self, cell, value):
+        """A failing disk tier only loses the disk copy, the lookup result is still served."""
+        expires_at = time.time() + self.ttl
+        with self._lock:
+            self._remember(cell, expires_at, value)
+        if not self._disk_path:
+            return
+        with self._disk_lock:
+            try:
+                self._disk_put(cell, expires_at, value)
+            except sqlite3.Error as e:
+                self._disk_failed(f"write failed for {cell}", e)
+
+    def stats(self):
+        lookups = self.hits + self.misses + self.coalesced
+        return {
+            "entries": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "coalesced": self.coalesced,
+            "hit_rate": (self.hits + self.coalesced) / lookups if lookups else 0.0,
+        }
+
+    def _remember(self, cell, expires_at, value):
+        self._entries[cell] = (expires_at, value)
+        self._entries.move_to_end(cell)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def _connection(self):
+        # Opened lazily so importing this module never touches the filesystem
+        if self._db is None and self._disk_path:
+            self._db = sqlite3.connect(self._disk_path, check_same_thread=False)
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS reverse_geocode ("
+                "cell TEXT PRIMARY KEY, value TEXT NOT NULL, expires_at REAL NOT NULL, last_access REAL NOT NULL)"
+            )
+            self._db.execute("CREATE INDEX IF NOT EXISTS reverse_geocode_last_access ON reverse_geocode(last_access)")
+            self._db.commit()
+        return self._db
+
+    def _disk_failed(self, what, error):
+        # Locked or read-only file, full disk...: log it and drop the half-done transaction
+        logger.warning(f"[GEOCACHE] Disk tier {what}: {error}")
+        if self._db is not None:
+            try:
+                self._db.rollback()
+            except sqlite3.Error:
+                pass
+
+    def _disk_get(self, cell, now):
+        db = self._connection()
+        if db is None:
+            return None
+        row = db.execute("SELECT value, expires_at FROM reverse_geocode WHERE cell = ?", (cell,)).fetchone()
+        if row is None:
+            return None
+        if row[1] <= now:
+            db.execute("DELETE FROM reverse_geocode WHERE cell = ?", (cell,))
+            db.commit()
+            return None
+        db.execute("UPDATE reverse_geocode SET last_access = ? WHERE cell = ?", (now, cell))
+        db.commit()
+        return row[1], json.loads(row[0])
+
+    def _disk_put(self, cell, expires_at, value):
+        db = self._connection()
+        if db is None:
+            return
+        db.execute(
+            "INSERT OR REPLACE INTO reverse_geocode (cell, value, expires_at, last_access) VALUES (?, ?, ?, ?)",
+            (cell, json.dumps(value), expires_at, time.time()),
+        )
+        db.execute(
+            "DELETE FROM reverse_geocode WHERE cell IN ("
+            "SELECT cell FROM reverse_geocode ORDER BY last_access DESC LIMIT -1 OFFSET ?)",
+            (self.max_disk_entries,),
+        )
+        db.commit()
+
+geocache = ReverseGeocodeCache(
+    precision=settings.GEOCACHE_PRECISION,
+    ttl=settings.GEOCACHE_TTL,
+    max_entries=settings.GEOCACHE_SIZE,
+    disk_path=settings.GEOCACHE_PATH,
+)
+
+def reverse_geocode(latitude, longitude):
+    """
+    Reverse-geocoding response for a point: the offline dataset when it covers the point
+    (geo/offline.py), otherwise LocationIQ through the cell cache.
+    Raises locationiq.GeocodingError when LocationIQ is needed and unreachable.
+    """
+    data = offline.reverse_geocode(latitude, longitude)
+    if data is not None:
+        return data
+    data = geocache.lookup(latitude, longitude, locationiq.fetch)
+    logger.debug(f"[GEOCACHE] {geocache.stats()}")
+    return data
+
+async def areverse_geocode(latitude, longitude):
+    data = await offline.areverse_geocode(latitude, longitude)
+    if data is not None:
+        return data
+    data = await geocache.alookup(latitude, longitude, locationiq.afetch)
+    logger.debug(f"[GEOCACHE] {geocache.stats()}")
+    return data
@@ -0,0 +1,110 @@
+from math import cos, pi, radians
+
+# Geohash cells used as a coarse spatial index (see grouping/index.py)
+BASE32 = "0123456789bcdefghjkmnpqrstuvwxyz"
+DECODE_MAP = {c: i for i, c in enumerate(BASE32)}
+EARTH_RADIUS_M = 6371000
+METERS_PER_DEGREE = pi * EARTH_RADIUS_M / 180
+
+def encode(latitude, longitude, precision=5):
+    """Encode a lat/lng point into a geohash string of `precision` characters."""
+    lat_lo, lat_hi = -90.0, 90.0
+    lon_lo, lon_hi = -180.0, 180.0
+    chars = []
+    bits, value, even = 0, 0, True
+    while len(chars) < precision:
+        if even:  # even bits refine longitude, odd bits refine latitude
+            mid = (lon_lo + lon_hi) / 2
+            if longitude >= mid:
+                value = (value << 1) | 1
+                lon_lo = mid
+            else:
+                value <<= 1
+                lon_hi = mid
+        else:
+            mid = (lat_lo + lat_hi) / 2
+            if latitude >= mid:
+                value = (value << 1) | 1
+                lat_lo = mid
+            else:
+                value <<= 1
+                lat_hi = mid
+        even = not even
+        bits += 1
+        if bits == 5:
+            chars.append(BASE32[value])
+            bits, value = 0, 0
+    return "".join(chars)
+
+def bounds(cell):
+    """Return (lat_lo, lat_hi, lon_lo, lon_hi) of a geohash cell."""
+    lat_lo, lat_hi = -90.0, 90.0
+    lon_lo, lon_hi = -180.0, 180.0
+    even = True
+    for c in cell:
+        value = DECODE_MAP[c]
+        for shift in range(4, -1, -1):
+            bit = (value >> shift) & 1
+            if even:
+                mid = (lon_lo + lon_hi) / 2
+                if bit:
+                    lon_lo = mid
+                else:
+                    lon_hi = mid
+            else:
+                mid = (lat_lo + lat_hi) / 2
+                if bit:
+                    lat_lo = mid
+                else:
+                    lat_hi = mid
+            even = not even
+    return lat_lo, lat_hi, lon_lo, lon_hi
+
+def center(cell):
+    """(latitude, longitude) of the middle of a geohash cell."""
+    lat_lo, lat_hi, lon_lo, lon_hi = bounds(cell)
+    return (lat_lo + lat_hi) / 2, (lon_lo + lon_hi) / 2
+
+def cell_size_degrees(precision):
+    """(lat_height, lon_width) of a cell in degrees for the given precision."""
+    total_bits = precision * 5
+    lon_bits = (total_bits + 1) // 2
+    lat_bits = total_bits // 2
+    return 180.0 / (1 << lat_bits), 360.0 / (1 << lon_bits)
+
+def neighbours(cell):
+    """
+    Return the cell itself and its (up to) 8 surrounding cells.
+    Longitude wraps around the antimeridian, latitude is clamped at the poles.
+    """
+    precision = len(cell)
+    lat_lo, lat_hi, lon_lo, lon_hi = bounds(cell)
+    d_lat, d_lon = cell_size_degrees(precision)
+    lat_c = (lat_lo + lat_hi) / 2
+    lon_c = (lon_lo + lon_hi) / 2
+
+    cells = []
+    for dy in (-1, 0, 1):
+        lat = lat_c + dy * d_lat
+        if lat <= -90.0 or lat >= 90.0:
+            continue
+        for dx in (-1, 0, 1):
+            lon = lon_c + dx * d_lon
+            lon = (lon + 180.0) % 360.0 - 180.0
+            code = encode(lat, lon, precision)
+            if code not in cells:
+                cells.append(code)
+    return cells
+
+def covered_radius_meters(latitude, precision):
+    """
+    Distance (meters) from any point inside a cell that is guaranteed to be
+    covered by the 3x3 block returned by `neighbours`. Anything farther away may
+    live outside the block. Longitude cells shrink towards the poles so the
+    narrowest row of the block decides the width.
+    """
+    d_lat, d_lon = cell_size_degrees(precision)
+    worst_lat = min(abs(latitude) + 2 * d_lat, 90.0)
+    height = d_lat * METERS_PER_DEGREE
+    width = d_lon * METERS_PER_DEGREE * cos(radians(worst_lat))
+    return max(0.0, min(height, width))
@@ -0,0 +1,69 @@
+import asyncio
+
+import httpx
+import requests
+from django.conf import settings
+
+# LocationIQ reverse geocoding, shared by citizens.helper and admins' GeoTestAPIView
+# through the cache in geo/geocache.py
+LOCATIONIQ_URL = "https://us1.locationiq.com/v1/reverse"
+LOCATIONIQ_KEY = "pk.371a6630b5644f04659e2e3a616ca5c2"
+
+class GeocodingError(Exception):
+    """LocationIQ could not be reached or returned an error."""
+
+def params(latitude, longitude):
+    return {
+        "key": LOCATIONIQ_KEY,
+        "lat": latitude,
+        "lon": longitude,
+        "format": "json"
+    }
+
+def fetch(latitude, longitude):
+    """Raw LocationIQ reverse-geocoding response (JSON dict)."""
+    try:
+        response = requests.get(LOCATIONIQ_URL, params=params(latitude, longitude), timeout=settings.LOCATIONIQ_TIMEOUT)
+        response.raise_for_status()
+        return response.json()
+    except requests.RequestException as e:
+        raise GeocodingError(str(e)) from e
+
+# One client per live loop: a client only works on the loop that opened its connections
+_http_clients = {}
+
+def http_client():
+    """
+    One httpx.AsyncClient (connection pool + keep-alive) per event loop,
+    shared by every async view instead of a new TCP/TLS handshake per request.
+    """
+    loop = asyncio.get_running_loop()
+    client = _http_clients.get(loop)
+    if client is None:
+        drop_closed_loops()
+        client = _http_clients[loop] = httpx.AsyncClient(
+            timeout=httpx.Timeout(settings.LOCATIONIQ_TIMEOUT),
+            limits=httpx.Limits(
+                max_connections=settings.LOCATIONIQ_MAX_CONNECTIONS,
+                max_keepalive_connections=settings.LOCATIONIQ_MAX_CONNECTIONS,
+            ),
+        )
+    return client
+
+def drop_closed_loops():
+    """
+    Forget the clients of loops that have closed (a per-request async_to_sync loop):
+    nothing can be awaited on them anymore, their sockets close with the transports.
+    Clients of loops still running elsewhere are kept.
+    """
+    for loop in [loop for loop in _http_clients if loop.is_closed()]:
+        del _http_clients[loop]
+
+async def afetch(latitude, longitude):
+    """fetch without blocking the event loop."""
+    try:
+        response = await http_client().get(LOCATIONIQ_URL, params=params(latitude, longitude))
+        response.raise_for_status()
+        return response.json()
+    except httpx.HTTPError as e:
+        raise GeocodingError(str(e)) from e
@@ -0,0 +1,209 @@
+import asyncio
+import json
+import threading
+from math import floor
+
+import numpy as np
+from django.conf import settings
+from loguru import logger
+
+# Offline reverse geocoding from a GeoJSON FeatureCollection of ward / pincode polygons
+# (settings.OFFLINE_GEOCODER_PATH). Lookups return LocationIQ-shaped responses so
+# citizens.helper.location_from_response and GeoTestAPIView work on either source.
+GRID_DEGREES = 0.01  # ~1.1km grid cells for the polygon index
+
+# address field -> feature properties tried in order (first non-empty wins)
+ADDRESS_PROPERTIES = {
+    "suburb": ("suburb", "ward_name", "ward", "name"),
+    "city": ("city", "district"),
+    "state": ("state",),
+    "postcode": ("postcode", "pincode", "pin"),
+    "jurisdiction_code": ("jurisdiction_code", "code"),
+}
+
+class Ring:
+    """Closed polygon ring prepared for vectorised ray casting."""
+    __slots__ = ("xs", "ys", "y_next", "slope")
+
+    def __init__(self, coordinates):
+        points = np.asarray(coordinates, dtype=np.float64)
+        self.xs = points[:, 0]
+        self.ys = points[:, 1]
+        x_next = np.roll(self.xs, -1)
+        self.y_next = np.roll(self.ys, -1)
+        dy = self.y_next - self.ys
+        # Horizontal edges never cross the ray, their slope is never used
+        self.slope = np.divide(x_next - self.xs, dy, out=np.zeros_like(dy), where=dy != 0)
+
+    def contains(self, x, y):
+        crosses = ((self.ys > y) != (self.y_next > y)) & (x < self.slope * (y - self.ys) + self.xs)
+        return np.count_nonzero(crosses) % 2 == 1
+
+    def area(self):
+        return abs(np.dot(self.xs, np.roll(self.ys, -1)) - np.dot(self.ys, np.roll(self.xs, -1))) / 2
+
+class Region:
+    """One feature: (outer ring, holes) parts, bounding box and its address fields."""
+    __slots__ = ("address", "parts", "bbox", "area")
+
+    def __init__(self, address, polygons):
+        self.address = address
+        self.parts = [(Ring(polygon[0]), [Ring(hole) for hole in polygon[1:]]) for polygon in polygons]
+        xs = np.concatenate([outer.xs for outer, _ in self.parts])
+        ys = np.concatenate([outer.ys for outer, _ in self.parts])
+        self.bbox = (xs.min(), ys.min(), xs.max(), ys.max())
+        self.area = sum(outer.area() - sum(hole.area() for hole in holes) for outer, holes in self.parts)
+
+    def contains(self, x, y):
+        min_x, min_y, max_x, max_y = self.bbox
+        if not (min_x <= x <= max_x and min_y <= y <= max_y):
+            return False
+        for outer, holes in self.parts:
+            if outer.contains(x, y) and not any(hole.contains(x, y) for hole in holes):
+                return True
+        return False
+
+def feature_address(properties):
+    address = {}
+    for field, keys in ADDRESS_PROPERTIES.items():
+        for key in keys:
+            value = properties.get(key)
+            if value not in (None, ""):
+                address[field] = str(value)
+                break
+    return address
+
+def feature_polygons(geometry):
+    if geometry is None:
+        return []
+    if geometry["type"] == "Polygon":
+        return [geometry["coordinates"]]
+    if geometry["type"] == "MultiPolygon":
+        return geometry["coordinates"]
+    return []
+
+class OfflineGeocoder:
+    """
+    Point-in-polygon reverse geocoder over a uniform grid index.
+    Each grid cell lists the regions whose bounding box overlaps it, so a lookup only
+    ray-casts the few polygons around the point. Nested regions (ward inside city)
+    are ordered smallest first.
+    """
+
+    def __init__(self, regions, grid_degrees=GRID_DEGREES):
+        self.grid_degrees = grid_degrees
+        # Smallest first, so the first match is the most specific region
+        self.regions = sorted(regions, key=lambda region: region.area)
+        self.grid = {}
+        for index, region in enumerate(self.regions):
+            min_x, min_y, max_x, max_y = region.bbox
+            for ix in range(self._grid(min_x), self._grid(max_x) + 1):
+                for iy in range(self._grid(min_y), self._grid(max_y) + 1):
+                    self.grid.setdefault((ix, iy), []).append(index)
+
+    @classmethod
+    def from_geojson(cls, path, grid_degrees=GRID_DEGREES):
+        with open(path, encoding="utf-8") as f:
+            collection = json.load(f)
+        regions = []
+        for feature in collection.get("features", []):
+            polygons = feature_polygons(feature.get("geometry"))
+            if polygons:
+                regions.append(Region(feature_address(feature.get("properties") or {}), polygons))
+        return cls(regions, grid_degrees)
+
+    def _grid(self, degrees):
+        return floor(degrees / self.grid_degrees)
+
+    def regions_at(self, latitude, longitude):
+        """Regions containing the point, smallest first."""
+        return [
+            self.regions[index]
+            for index in self.grid.get((self._grid(longitude), self._grid(latitude)), ())
+            if self.regions[index].contains(longitude, latitude)
+        ]
+
+    def region_at(self, latitude, longitude):
+        """Smallest region containing the point, or None."""
+        for index in self.grid.get((self._grid(longitude), self._grid(latitude)), ()):
+            region = self.regions[index]
+            if region.contains(longitude, latitude):
+                return region
+        return None
+
+    def reverse_geocode(self, latitude, longitude):
+        """
+        LocationIQ-shaped response for the point, or None when no region covers it.
+        Fields come from the smallest region, missing ones from the enclosing regions
+        (a ward polygon without city/state inside a city polygon).
+        """
+        latitude, longitude = float(latitude), float(longitude)
+        regions = self.regions_at(latitude, longitude)
+        if not regions:
+            return None
+        address = {}
+        for region in regions:
+            for field, value in region.address.items():
+                address.setdefault(field, value)
+        display_name = ", ".join(
+            address[field] for field in ("suburb", "city", "state", "postcode") if field in address
+        )
+        return {
+            "lat": str(latitude),
+            "lon": str(longitude),
+            "display_name": display_name,
+            "address": address,
+            "source": "offline",
+        }
+
+_geocoder = None
+_geocoder_loaded = False
+_geocoder_lock = threading.Lock()
+
+def offline_geocoder():
+    """The dataset from settings.OFFLINE_GEOCODER_PATH, loaded once; None when not configured."""
+    global _geocoder, _geocoder_loaded
+    if not _geocoder_loaded:
+        with _geocoder_lock:
+            if not _geocoder_loaded:
+                path = settings.OFFLINE_GEOCODER_PATH
+                if path:
+                    try:
+                        _geocoder = OfflineGeocoder.from_geojson(path)
+                        logger.success(f"[GEO] Offline geocoder loaded | regions={len(_geocoder.regions)} | path={path}")
+                    except (OSError, ValueError, KeyError) as e:
+                        logger.error(f"[GEO] Offline geocoder dataset unusable, using LocationIQ only: {e}")
+                _geocoder_loaded = True
+    return _geocoder
+
+def preload_offline_geocoder():
+    """Parse the dataset in a background thread at startup instead of on the first request."""
+    if settings.OFFLINE_GEOCODER_PATH and not _geocoder_loaded:
+        threading.Thread(target=offline_geocoder, name="offline-geocoder", daemon=True).start()
+
+async def aoffline_geocoder():
+    """offline_geocoder for async callers, a first load runs in a thread, not on the event loop."""
+    if _geocoder_loaded:
+        return _geocoder
+    return await asyncio.to_thread(offline_geocoder)
+
+def reverse_geocode(latitude, longitude):
+    """Offline lookup, None when there's no dataset or the point is outside it."""
+    geocoder = offline_geocoder()
+    return geocoder.reverse_geocode(latitude, longitude) if geocoder is not None else None
+
+async def areverse_geocode(latitude, longitude):
+    geocoder = await aoffline_geocoder()
+    return geocoder.reverse_geocode(latitude, longitude) if geocoder is not None else None
+
+def jurisdiction_code(latitude, longitude):
+    """
+    jurisdiction_code property of the region containing the point, when the dataset has one.
+    Not checked against the database, see DepartmentRouter.jurisdiction_id.
+    """
+    data = reverse_geocode(latitude, longitude)
+    return data["address"].get("jurisdiction_code") if data is not None else None
+
+async def ajurisdiction_code(latitude, longitude):
+    data = await areverse_geocode(latitude, longitude)
+    return data["address"].get("jurisdiction_code") if data is not None else None
@@ -0,0 +1,173 @@
+import numpy as np
+from django.db import connection, transaction
+from loguru import logger
+
+from entities.complaints import Complaint, ComplaintGroup
+from geo.distance import haversine_matrix, haversine_np
+from grouping.centroids import CENTROID_FIELDS, fold_member
+from grouping.index import NEW_GROUP_RADIUS_METERS, active_groups, group_cell
+
+# Upper bound on complaints x groups distances held in memory at once (float64)
+MATRIX_BUDGET = 2_000_000
+# Rows per chunk; every join rewrites one column over the rest of the chunk
+MAX_CHUNK = 1024
+
+def pending_complaints():
+    """Complaints the post_save signal would have grouped but that have no group yet."""
+    return (
+        Complaint.objects
+        .filter(group__isnull=True, latitude__isnull=False, longitude__isnull=False)
+        .exclude(status="DRAFT")
+        .order_by("pk")
+    )
+
+class _DepartmentGroups:
+    """Centroid/radius arrays of one department's active groups, in pk order."""
+
+    def __init__(self, department_id):
+        self.groups = list(active_groups(department_id).only("pk", "department_id", *CENTROID_FIELDS, "radius_meters"))
+        self.lat = np.array([g.centroid_latitude for g in self.groups], dtype=np.float64)
+        self.lon = np.array([g.centroid_longitude for g in self.groups], dtype=np.float64)
+        self.radius = np.array([g.radius_meters for g in self.groups], dtype=np.float64)
+        self.moved = set()  # indices of existing groups whose centroid changed
+
+    def __len__(self):
+        return len(self.groups)
+
+    def append(self, group):
+        self.groups.append(group)
+        self.lat = np.append(self.lat, group.centroid_latitude)
+        self.lon = np.append(self.lon, group.centroid_longitude)
+        self.radius = np.append(self.radius, group.radius_meters)
+
+    def join(self, idx, latitude, longitude):
+        group = fold_member(self.groups[idx], latitude, longitude)
+        self.lat[idx] = group.centroid_latitude
+        self.lon[idx] = group.centroid_longitude
+        if group.pk:
+            self.moved.add(idx)
+        return group
+
+    def distances(self, idx, lat, lon):
+        """Column of distances from group `idx` to the points, inf outside its radius."""
+        d = haversine_np(lat, lon, self.lat[idx], self.lon[idx])
+        d[d > self.radius[idx]] = np.inf
+        return d
+
+def _assign_department(department_id, complaints):
+    """
+    Replay the per-row signal for one department's complaints (pk order):
+    the nearest active group whose radius contains the complaint wins, ties go to
+    the older group, the joined group's centroid moves to the running mean, and an
+    unmatched complaint opens a new group that later complaints may join.
+    Returns (new groups, existing groups that moved, [(complaint, group)]).
+    """
+    state = _DepartmentGroups(department_id)
+    new_groups = []
+    assignments = []
+    start = 0
+    while start < len(complaints):
+        # The matrix is (chunk, known + chunk) and groups opened by earlier chunks widen it,
+        # so the chunk is sized from the current group count every time
+        chunk_size = max(1, min(MAX_CHUNK, MATRIX_BUDGET // (len(state) + MAX_CHUNK)))
+        chunk = complaints[start:start + chunk_size]
+        start += len(chunk)
+        lat = np.array([c.latitude for c in chunk], dtype=np.float64)
+        lon = np.array([c.longitude for c in chunk], dtype=np.float64)
+
+        # One NumPy pass over every (complaint, group) pair of the chunk, with room
+        # for the groups this chunk can open (at most one per complaint)
+        known = len(state)
+        distances = np.full((len(chunk), known + len(chunk)), np.inf)
+        if known:
+            distances[:, :known] = haversine_matrix(lat, lon, state.lat, state.lon)
+            distances[:, :known][distances[:, :known] > state.radius[None, :]] = np.inf
+
+        for i, complaint in enumerate(chunk):
+            row = distances[i, :len(state)]
+            idx = int(np.argmin(row)) if len(row) else -1  # first minimum == older group on ties
+            if idx >= 0 and np.isfinite(row[idx]):
+                group = state.join(idx, complaint.latitude, complaint.longitude)
+            else:
+                group = ComplaintGroup(
+                    title=complaint.title[:255],
+                    department_id=department_id,
+                    centroid_latitude=complaint.latitude,
+                    centroid_longitude=complaint.longitude,
+                    radius_meters=NEW_GROUP_RADIUS_METERS,
+                    geohash=group_cell(complaint.latitude, complaint.longitude),  # bulk_create skips pre_save
+                )
+                new_groups.append(group)
+                state.append(group)
+                idx = len(state) - 1
+            assignments.append((complaint, group))
+
+            # Only the touched group's column changes for the rest of the chunk
+            distances[i + 1:, idx] = state.distances(idx, lat[i + 1:], lon[i + 1:])
+
+    moved = [state.groups[idx] for idx in sorted(state.moved)]
+    return new_groups, moved, assignments
+
+def assign_complaints(complaints):
+    """
+    Group many complaints at once with the same result as running
+    assign_complaint_to_group on each of them in pk order.
+    All new groups and assignments are written in one transaction.
+    """
+    complaints = sorted(complaints, key=lambda c: c.pk)
+    by_department = {}
+    for complaint in complaints:
+        by_department.setdefault(complaint.department_id, []).append(complaint)
+
+    with transaction.atomic():
+        new_groups = []
+        moved_groups = []
+        assignments = []
+        for department_id, rows in by_department.items():
+            created, moved, assigned = _assign_department(department_id, rows)
+            new_groups.extend(created)
+            moved_groups.extend(moved)
+            assignments.extend(assigned)
+        ComplaintGroup.objects.bulk_create(new_groups, batch_size=1000)
+        ComplaintGroup.objects.bulk_update(moved_groups, CENTROID_FIELDS, batch_size=1000)
+        for complaint, group in assignments:
+            complaint.group_id = group.pk
+        Complaint.objects.bulk_update(complaints, ["group"], batch_size=1000)
+
+    logger.info(f"Batch grouped {len(complaints)} complaints | new groups={len(new_groups)} | moved groups={len(moved_groups)}")
+    return len(complaints), len(new_groups)
+
+def _lock_for_grouping():
+    """
+    SQLite has no row locks, select_for_update() is a no-op there: take the database write
+    lock before reading the pending rows instead (a write that touches nothing), so batches
+    run one at a time across threads and processes and never group a complaint twice.
+    """
+    if connection.vendor == "sqlite":
+        with connection.cursor() as cursor:
+            cursor.execute(f"UPDATE {Complaint._meta.db_table} SET group_id = group_id WHERE 0")
+
+def assign_pending(limit=None, pks=None, exclude=()):
+    """
+    Group pending complaints (bulk imports and the background queue), all of them or only
+    `pks`, leaving out `exclude`.
+    Rows are locked while they are grouped and skipped by concurrent workers (on SQLite
+    the whole batch is serialized instead), so re-running after a failure only picks up
+    complaints that still have no group.
+    """
+    with transaction.atomic():
+        _lock_for_grouping()
+        qs = (
+            pending_complaints()
+            .exclude(pk__in=exclude)
+            .select_for_update(skip_locked=True, of=("self",))
+            .only("pk", "title", "department_id", "latitude", "longitude", "group_id")
+        )
+        if pks is not None:
+            qs = qs.filter(pk__in=pks)
+        if limit:
+            qs = qs[:limit]
+        complaints = list(qs)
+        if not complaints:
+            return 0, 0
+        return assign_complaints(complaints)
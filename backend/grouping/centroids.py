@@ -0,0 +1,29 @@
+from django.db import transaction
+
+from entities.complaints import ComplaintGroup
+from grouping.index import group_cell
+
+CENTROID_FIELDS = ["centroid_latitude", "centroid_longitude", "member_count", "geohash"]
+
+def running_mean(mean, value, count):
+    """Mean of `count` values after folding in one more value."""
+    return mean + (value - mean) / count
+
+def fold_member(group, latitude, longitude):
+    """Move an in-memory group's centroid to include one more complaint."""
+    group.member_count += 1
+    group.centroid_latitude = running_mean(group.centroid_latitude, latitude, group.member_count)
+    group.centroid_longitude = running_mean(group.centroid_longitude, longitude, group.member_count)
+    group.geohash = group_cell(group.centroid_latitude, group.centroid_longitude)
+    return group
+
+def add_member(group, latitude, longitude):
+    """
+    Fold a joining complaint into the stored centroid.
+    The row is re-read under a lock so concurrent joins don't lose updates.
+    """
+    with transaction.atomic():
+        locked = ComplaintGroup.objects.select_for_update().get(pk=group.pk)
+        fold_member(locked, latitude, longitude)
+        locked.save(update_fields=CENTROID_FIELDS + ["updated_at"])
+    return locked
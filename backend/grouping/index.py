@@ -0,0 +1,51 @@
+from django.db.models import Q
+
+from entities.complaints import ComplaintGroup
+from geo import geohash
+from geo.distance import haversine
+
+GEOHASH_PRECISION = 5  # ~4.9km cells, wider than the default 3000m group radius
+ACTIVE_STATUSES = ["OPEN", "IN_PROGRESS"]
+NEW_GROUP_RADIUS_METERS = 3000
+
+def group_cell(latitude, longitude):
+    """Geohash cell stored on ComplaintGroup.geohash for a centroid."""
+    return geohash.encode(latitude, longitude, GEOHASH_PRECISION)
+
+def active_groups(department):
+    return ComplaintGroup.objects.filter(
+        department=department,
+        grouped_status__in=ACTIVE_STATUSES
+    ).order_by("pk")
+
+def candidate_groups(department, latitude, longitude):
+    """
+    Active groups that can possibly contain the point:
+    - groups whose centroid lies in the point's cell or one of its 8 neighbours
+    - groups whose radius reaches farther than the 3x3 block is guaranteed to cover
+    - rows saved before the cell column existed (empty geohash)
+    """
+    cells = geohash.neighbours(group_cell(latitude, longitude))
+    covered = geohash.covered_radius_meters(latitude, GEOHASH_PRECISION)
+    return active_groups(department).filter(
+        Q(geohash__in=cells) | Q(radius_meters__gt=covered) | Q(geohash="")
+    )
+
+def nearest_group(groups, latitude, longitude):
+    """Nearest group whose radius contains the point, first one wins on ties."""
+    nearest = None
+    nearest_distance = None
+    for group in groups:
+        distance = haversine(latitude, longitude, group.centroid_latitude, group.centroid_longitude)
+        if distance <= group.radius_meters:
+            if nearest_distance is None or distance < nearest_distance:
+                nearest = group
+                nearest_distance = distance
+    return nearest
+
+def find_nearest_group(department, latitude, longitude):
+    return nearest_group(candidate_groups(department, latitude, longitude), latitude, longitude)
+
+def find_nearest_group_linear(department, latitude, longitude):
+    """Reference full scan over every active group (used by benchmark_grouping)."""
+    return nearest_group(active_groups(department), latitude, longitude)
@@ -0,0 +1,79 @@
+import threading
+
+from django.db import close_old_connections
+from loguru import logger
+
+from grouping.batch import assign_pending, pending_complaints
+
+# The complaints table is the queue: a complaint is pending while group_id IS NULL
+BATCH_SIZE = 500
+POLL_SECONDS = 30  # also the retry delay after a failed batch
+
+def drain(batch_size=BATCH_SIZE, skipped=None):
+    """
+    Group pending complaints batch by batch until none are left. Returns how many were grouped.
+    A failing batch is retried one complaint at a time; complaints that fail on their own
+    are added to `skipped` (kept by the caller, so until it restarts) and left pending,
+    instead of blocking every complaint queued behind them.
+    """
+    skipped = set() if skipped is None else skipped
+    total = 0
+    while True:
+        try:
+            assigned, _ = assign_pending(limit=batch_size, exclude=skipped)
+            processed = assigned
+        except Exception as e:
+            logger.warning(f"[GROUPING] Batch failed, grouping it one complaint at a time: {e}")
+            assigned, processed = _drain_one_by_one(batch_size, skipped)
+        total += assigned
+        if processed < batch_size:
+            return total
+
+def _drain_one_by_one(batch_size, skipped):
+    """(grouped, processed) for the next `batch_size` pending complaints, one transaction each."""
+    pks = list(pending_complaints().exclude(pk__in=skipped).values_list("pk", flat=True)[:batch_size])
+    grouped = 0
+    for pk in pks:
+        try:
+            grouped += assign_pending(pks=[pk])[0]
+        except Exception as e:
+            skipped.add(pk)
+            logger.error(f"[GROUPING] Complaint {pk} can't be grouped, skipping it: {e}")
+    return grouped, len(pks)
+
+class GroupingQueue:
+    """
+    In-process background grouping (COMPLAINT_GROUPING = "thread").
+    Complaint creation only wakes the thread up; the thread drains pending complaints
+    in batches and keeps polling so failed batches are retried.
+    """
+
+    def __init__(self, batch_size=BATCH_SIZE, poll_seconds=POLL_SECONDS):
+        self.batch_size = batch_size
+        self.poll_seconds = poll_seconds
+        self._wake = threading.Event()
+        self._lock = threading.Lock()
+        self._thread = None
+        self.skipped = set()  # complaints that failed on their own, see drain()
+
+    def notify(self):
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="complaint-grouping", daemon=True)
+                self._thread.start()
+        self._wake.set()
+
+    def _run(self):
+        while True:
+            self._wake.wait(timeout=self.poll_seconds)
+            self._wake.clear()
+            try:
+                grouped = drain(self.batch_size, self.skipped)
+                if grouped:
+                    logger.info(f"[GROUPING] Background queue grouped {grouped} complaints")
+            except Exception as e:
+                logger.error(f"[GROUPING] Batch failed, retrying in {self.poll_seconds}s: {e}")
+            finally:
+                close_old_connections()
+
+grouping_queue = GroupingQueue()
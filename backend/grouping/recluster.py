@@ -0,0 +1,198 @@
+from collections import defaultdict, deque
+
+import numpy as np
+from django.db import transaction
+from django.db.models import Count, F, Q
+from loguru import logger
+
+from entities.complaints import Complaint, ComplaintGroup, GroupTimeline
+from entities.handlers import HandlerProfile
+from geo import geohash
+from geo.distance import haversine_np
+from grouping.centroids import CENTROID_FIELDS
+from grouping.index import group_cell
+
+STREAM_CHUNK = 10000  # complaint rows pulled from the DB cursor at a time
+
+def member_stats(groups, complaints, chunk_size=STREAM_CHUNK):
+    """
+    Exact centroid and member count of every group from its complaints.
+    `complaints` is streamed, only per-group sums are kept in memory.
+    """
+    position = {g.pk: i for i, g in enumerate(groups)}
+    sum_lat = np.zeros(len(groups))
+    sum_lon = np.zeros(len(groups))
+    counts = np.zeros(len(groups), dtype=np.int64)
+
+    rows = (
+        complaints
+        .filter(latitude__isnull=False, longitude__isnull=False)
+        .values_list("group_id", "latitude", "longitude")
+        .iterator(chunk_size=chunk_size)
+    )
+    buffer = []
+    for row in rows:
+        buffer.append(row)
+        if len(buffer) == chunk_size:
+            _accumulate(buffer, position, sum_lat, sum_lon, counts)
+            buffer.clear()
+    _accumulate(buffer, position, sum_lat, sum_lon, counts)
+
+    stats = {}
+    for g, i in position.items():
+        if counts[i]:
+            stats[g] = (sum_lat[i] / counts[i], sum_lon[i] / counts[i], int(counts[i]))
+    return stats
+
+def _accumulate(rows, position, sum_lat, sum_lon, counts):
+    if not rows:
+        return
+    data = np.array(rows, dtype=np.float64)
+    idx = np.array([position[int(g)] for g in data[:, 0]])
+    np.add.at(sum_lat, idx, data[:, 1])
+    np.add.at(sum_lon, idx, data[:, 2])
+    np.add.at(counts, idx, 1)
+
+def _cell_precision(max_abs_lat, eps_meters):
+    """Finest geohash precision whose 3x3 neighbourhood still covers eps."""
+    for precision in range(9, 0, -1):
+        if geohash.covered_radius_meters(max_abs_lat, precision) >= eps_meters:
+            return precision
+    return 1
+
+def dbscan(lat, lon, weights, eps_meters, min_members):
+    """
+    DBSCAN over group centroids, a group weighing as many points as it has members.
+    Neighbourhoods are looked up through geohash cells. Returns a cluster label per
+    group, -1 for noise.
+    """
+    n = len(lat)
+    labels = np.full(n, -1, dtype=np.int64)
+    if not n:
+        return labels
+    precision = _cell_precision(float(np.max(np.abs(lat))), eps_meters)
+    cells = defaultdict(list)
+    for i in range(n):
+        cells[geohash.encode(lat[i], lon[i], precision)].append(i)
+
+    def region(i):
+        candidates = []
+        for cell in geohash.neighbours(geohash.encode(lat[i], lon[i], precision)):
+            candidates.extend(cells.get(cell, ()))
+        candidates = np.array(candidates, dtype=np.int64)
+        d = haversine_np(lat[candidates], lon[candidates], lat[i], lon[i])
+        return candidates[d <= eps_meters]
+
+    visited = np.zeros(n, dtype=bool)
+    cluster = 0
+    for i in range(n):
+        if visited[i]:
+            continue
+        visited[i] = True
+        neighbours = region(i)
+        if weights[neighbours].sum() < min_members:
+            continue  # noise for now, may still become a border point
+        labels[i] = cluster
+        queue = deque(neighbours)
+        while queue:
+            j = queue.popleft()
+            if labels[j] == -1:
+                labels[j] = cluster
+            if visited[j]:
+                continue
+            visited[j] = True
+            reach = region(j)
+            if weights[reach].sum() >= min_members:
+                queue.extend(reach)
+        cluster += 1
+    return labels
+
+def _merge(survivor, others, stats):
+    """Move complaints, timeline and handlers of `others` into `survivor`."""
+    other_ids = [g.pk for g in others]
+    members = [survivor] + others
+    total = sum(stats[g.pk][2] for g in members)
+    survivor.centroid_latitude = sum(stats[g.pk][0] * stats[g.pk][2] for g in members) / total
+    survivor.centroid_longitude = sum(stats[g.pk][1] * stats[g.pk][2] for g in members) / total
+    survivor.member_count = total
+    survivor.geohash = group_cell(survivor.centroid_latitude, survivor.centroid_longitude)
+
+    Complaint.objects.filter(group_id__in=other_ids).update(group=survivor)
+    GroupTimeline.objects.filter(group_id__in=other_ids).update(group=survivor)
+    HandlerProfile.objects.filter(group_id__in=other_ids).update(group=survivor)
+    ComplaintGroup.objects.filter(pk__in=other_ids).delete()
+
+def refresh_member_counts():
+    """
+    Exact centroid and member_count of the groups whose stored count doesn't match their
+    located complaints, e.g. groups made before member_count existed (they all start at 1,
+    and add_member would give a joining complaint the weight of the whole group).
+    Returns how many groups were fixed.
+    """
+    located = Q(complaints__latitude__isnull=False, complaints__longitude__isnull=False)
+    stale = list(
+        ComplaintGroup.objects
+        .annotate(members=Count("complaints", filter=located))
+        .exclude(member_count=F("members"))
+        .order_by("pk")
+    )
+    if not stale:
+        return 0
+    stats = member_stats(stale, Complaint.objects.filter(group_id__in=[g.pk for g in stale]))
+    for group in stale:
+        if group.pk in stats:
+            group.centroid_latitude, group.centroid_longitude, group.member_count = stats[group.pk]
+            group.geohash = group_cell(group.centroid_latitude, group.centroid_longitude)
+        else:
+            group.member_count = 0  # the next complaint to join becomes the centroid
+    with transaction.atomic():
+        ComplaintGroup.objects.bulk_update(stale, CENTROID_FIELDS, batch_size=1000)
+    logger.info(f"Refreshed member counts and centroids of {len(stale)} groups")
+    return len(stale)
+
+def recluster_department(department_id, status, eps_meters, min_members, dry_run=False):
+    """
+    Refresh centroids/member counts of one department's groups with a given status,
+    then merge groups that DBSCAN puts in the same cluster into the oldest one.
+    Returns (groups seen, groups merged away).
+    """
+    groups = list(
+        ComplaintGroup.objects
+        .filter(department_id=department_id, grouped_status=status)
+        .order_by("pk")
+    )
+    stats = member_stats(groups, Complaint.objects.filter(group__department_id=department_id, group__grouped_status=status))
+    groups = [g for g in groups if g.pk in stats]  # empty groups have nothing to cluster
+    if not groups:
+        return 0, 0
+
+    lat = np.array([stats[g.pk][0] for g in groups])
+    lon = np.array([stats[g.pk][1] for g in groups])
+    weights = np.array([stats[g.pk][2] for g in groups])
+    labels = dbscan(lat, lon, weights, eps_meters, min_members)
+
+    clusters = defaultdict(list)
+    for group, label in zip(groups, labels):
+        if label >= 0:
+            clusters[label].append(group)
+
+    merged_away = set()
+    with transaction.atomic():
+        for group in groups:
+            group.centroid_latitude, group.centroid_longitude, group.member_count = stats[group.pk]
+            group.geohash = group_cell(group.centroid_latitude, group.centroid_longitude)
+        for members in clusters.values():
+            if len(members) < 2:
+                continue
+            survivor, others = members[0], members[1:]  # groups are in pk order, oldest survives
+            merged_away.update(g.pk for g in others)
+            if not dry_run:
+                _merge(survivor, others, stats)
+        if not dry_run:
+            ComplaintGroup.objects.bulk_update(
+                [g for g in groups if g.pk not in merged_away],
+                CENTROID_FIELDS,
+                batch_size=1000,
+            )
+    logger.info(f"Reclustered department={department_id} status={status} | groups={len(groups)} | merged={len(merged_away)}")
+    return len(groups), len(merged_away)
@@ -0,0 +1,154 @@
+import os
+import torch
+import torch.nn as nn
+from transformers import VisionEncoderDecoderModel, ViTImageProcessor, AutoTokenizer
+from transformers.modeling_outputs import BaseModelOutput
+from loguru import logger
+
+MODEL_NAME = "nlpconnect/vit-gpt2-image-captioning"
+MLP_CHECKPOINT_PATH = "models/complete_vit.pth"
+ONNX_DIR = "models/onnx"  # written by export_onnx.py
+CLASS_NAMES = ['BBMP (garbage)', 'BBMP (pothole)', 'BESCOM', 'BWSSB']
+GENERATE_KWARGS = {"max_length": 30, "num_beams": 4}
+
+class SimpleMLP(nn.Module):
+    def __init__(self, hidden_size, num_classes):
+        super().__init__()
+        self.fc = nn.Sequential(
+            nn.Linear(hidden_size, 256),
+            nn.ReLU(),
+            nn.Dropout(0.5),
+            nn.Linear(256, num_classes)
+        )
+
+    def forward(self, features):
+        return self.fc(features)
+
+def load_mlp(device):
+    checkpoint = torch.load(MLP_CHECKPOINT_PATH, map_location=device)
+    mlp_model = SimpleMLP(checkpoint['hidden_size'], checkpoint['num_classes']).to(device)
+    mlp_model.load_state_dict(checkpoint['model_state_dict'])
+    mlp_model.eval()
+    return mlp_model
+
+def load_tokenizer():
+    tokenizer = AutoTokenizer.from_pretrained(MODEL_NAME)
+    tokenizer.pad_token = tokenizer.eos_token
+    return tokenizer
+
+class TorchBackend:
+    """
+    fp32 PyTorch, CUDA when available.
+    Every backend exposes the same three steps used by server2.caption_batch:
+    encode(pixel_values) -> encoder output, classify(encoder output), caption(encoder output)
+    """
+    name = "torch"
+
+    def __init__(self):
+        self.device = "cuda" if torch.cuda.is_available() else "cpu"
+        self.image_processor = ViTImageProcessor.from_pretrained(MODEL_NAME)
+        self.tokenizer = load_tokenizer()
+        self.model = VisionEncoderDecoderModel.from_pretrained(MODEL_NAME).to(self.device)
+        self.model.config.pad_token_id = self.tokenizer.eos_token_id
+        self.model.eval()
+        self.mlp = load_mlp(self.device)
+
+    def preprocess(self, images):
+        return self.image_processor(images=images, return_tensors="pt").pixel_values.to(self.device)
+
+    def encode(self, pixel_values):
+        """Run the ViT encoder once, its output feeds both the MLP and GPT-2."""
+        return self.model.encoder(pixel_values=pixel_values)
+
+    def classify(self, encoder_outputs):
+        """Department prediction from the CLS token of the encoder output."""
+        cls_features = encoder_outputs.last_hidden_state[:, 0, :]
+        probs = torch.softmax(self.mlp(cls_features), dim=1)
+        confidences, pred_idx = torch.max(probs, dim=1)
+        return [CLASS_NAMES[i] for i in pred_idx.tolist()], confidences.tolist()
+
+    def caption(self, encoder_outputs):
+        """Beam-search captions, reusing the encoder output instead of re-encoding."""
+        output_ids = self.model.generate(
+            encoder_outputs=encoder_outputs,
+            pad_token_id=self.tokenizer.eos_token_id,
+            **GENERATE_KWARGS
+        ) # type: ignore
+        return self.tokenizer.batch_decode(output_ids, skip_special_tokens=True)
+
+    def select(self, encoder_outputs, rows):
+        """Encoder output restricted to some rows of the batch."""
+        index = torch.tensor(rows, device=self.device)
+        return BaseModelOutput(last_hidden_state=encoder_outputs.last_hidden_state.index_select(0, index))
+
+    def synchronize(self):
+        if self.device == "cuda":
+            torch.cuda.synchronize()
+
+def conv1d_to_linear(module):
+    """Swap transformers Conv1D layers (y = x @ W + b) for the equivalent nn.Linear, in place."""
+    from transformers.pytorch_utils import Conv1D
+    for name, child in module.named_children():
+        if isinstance(child, Conv1D):
+            in_features, out_features = child.weight.shape
+            linear = nn.Linear(in_features, out_features)
+            linear.weight.data = child.weight.data.t().contiguous()
+            linear.bias.data = child.bias.data
+            setattr(module, name, linear)
+        else:
+            conv1d_to_linear(child)
+
+class QuantizedTorchBackend(TorchBackend):
+    """Dynamic int8 quantization of every nn.Linear (ViT, GPT-2 projections, MLP), CPU only."""
+    name = "torch-int8"
+
+    def __init__(self):
+        super().__init__()
+        if self.device != "cpu":
+            logger.warning("[BACKEND] int8 dynamic quantization runs on CPU, moving models off CUDA")
+            self.device = "cpu"
+            self.model.to("cpu")
+            self.mlp.to("cpu")
+        # GPT-2 projections are transformers Conv1D, which quantize_dynamic doesn't know
+        conv1d_to_linear(self.model)
+        self.model = torch.quantization.quantize_dynamic(self.model, {nn.Linear}, dtype=torch.qint8)
+        self.mlp = torch.quantization.quantize_dynamic(self.mlp, {nn.Linear}, dtype=torch.qint8)
+
+class OnnxBackend(TorchBackend):
+    """
+    ONNX Runtime graphs exported by export_onnx.py:
+    encoder_model.onnx, decoder_model.onnx + decoder_with_past_model.onnx (KV cache), mlp.onnx
+    Needs `pip install optimum[onnxruntime]`.
+    """
+    name = "onnx"
+
+    def __init__(self, onnx_dir=ONNX_DIR):
+        import onnxruntime as ort
+        from optimum.onnxruntime import ORTModelForVision2Seq
+
+        self.device = "cpu"
+        self.image_processor = ViTImageProcessor.from_pretrained(MODEL_NAME)
+        self.tokenizer = load_tokenizer()
+        self.model = ORTModelForVision2Seq.from_pretrained(onnx_dir, use_cache=True)
+        self.model.config.pad_token_id = self.tokenizer.eos_token_id
+        self.mlp_session = ort.InferenceSession(os.path.join(onnx_dir, "mlp.onnx"), providers=["CPUExecutionProvider"])
+
+    def classify(self, encoder_outputs):
+        cls_features = encoder_outputs.last_hidden_state[:, 0, :]
+        logits = self.mlp_session.run(None, {"features": cls_features.cpu().numpy()})[0]
+        probs = torch.softmax(torch.from_numpy(logits), dim=1)
+        confidences, pred_idx = torch.max(probs, dim=1)
+        return [CLASS_NAMES[i] for i in pred_idx.tolist()], confidences.tolist()
+
+BACKENDS = {
+    TorchBackend.name: TorchBackend,
+    QuantizedTorchBackend.name: QuantizedTorchBackend,
+    OnnxBackend.name: OnnxBackend,
+}
+
+def load_backend(name):
+    if name not in BACKENDS:
+        raise ValueError(f"Unknown caption backend '{name}', expected one of {sorted(BACKENDS)}")
+    backend = BACKENDS[name]()
+    logger.success(f"[BACKEND] Loaded {name} backend on {backend.device}")
+    return backend
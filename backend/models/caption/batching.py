@@ -0,0 +1,56 @@
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from loguru import logger
+
+class MicroBatcher:
+    """
+    Collects concurrent requests for up to `max_wait_ms` (or until `max_batch_size`
+    requests are waiting) and runs them through `process_batch` in one call.
+
+    - process_batch(items: list) -> list of results, same order
+    - submit(item) blocks the calling RPC thread until its own result is ready
+    - a single worker thread owns the model, so model calls never overlap
+    """
+
+    def __init__(self, process_batch, max_batch_size=8, max_wait_ms=10.0):
+        self.process_batch = process_batch
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000.0
+        self._queue = queue.Queue()
+        self._thread = threading.Thread(target=self._run, name="caption-batcher", daemon=True)
+        self._thread.start()
+
+    def submit(self, item):
+        future = Future()
+        self._queue.put((item, future))
+        return future.result()
+
+    def _collect(self):
+        batch = [self._queue.get()]
+        deadline = time.perf_counter() + self.max_wait
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.perf_counter()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._collect()
+            items = [item for item, _ in batch]
+            try:
+                results = self.process_batch(items)
+            except Exception as e:
+                logger.error(f"[BATCH] Batch of {len(batch)} failed: {e}")
+                for _, future in batch:
+                    future.set_exception(e)
+                continue
+            for (_, future), result in zip(batch, results):
+                future.set_result(result)
+            logger.debug(f"[BATCH] Processed batch size={len(batch)} queued={self._queue.qsize()}")
@@ -0,0 +1,59 @@
+"""
+Load test for the caption gRPC server.
+
+    python benchmark.py path/to/image.jpg --requests 64 --concurrency 1 8 16 --transfer pixels
+
+--transfer picks how the image is sent (see transfer.py), compare "original" with
+"pixels"/"jpeg" for request size and server decode time. Run it once against a server started with CAPTION_MAX_BATCH_SIZE=1 (no batching)
+and once with the default knobs to compare throughput.
+"""
+import argparse
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import grpc
+from caption_pb2 import ImageRequest  # type: ignore
+import caption_pb2_grpc
+from transfer import TRANSFER_MODES, request_fields
+
+def run(stub, request, requests, concurrency):
+    def call(_):
+        start = time.perf_counter()
+        stub.GenerateCaption(request)
+        return time.perf_counter() - start
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        latencies = sorted(pool.map(call, range(requests)))
+    wall = time.perf_counter() - start
+
+    p99 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))]
+    print(
+        f"concurrency={concurrency:<3} throughput={requests / wall:6.2f} img/s "
+        f"p50={statistics.median(latencies) * 1000:8.1f}ms p99={p99 * 1000:8.1f}ms"
+    )
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("image")
+    parser.add_argument("--target", default="localhost:50053")
+    parser.add_argument("--requests", type=int, default=64)
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 4, 8, 16])
+    parser.add_argument("--transfer", choices=TRANSFER_MODES, default="original")
+    args = parser.parse_args()
+
+    with open(args.image, "rb") as f:
+        start = time.perf_counter()
+        request = ImageRequest(**request_fields(f, args.transfer))
+        prepare = time.perf_counter() - start
+    print(f"transfer={args.transfer} request={request.ByteSize() / 1024:.1f}KB prepare={prepare * 1000:.1f}ms")
+    options = [('grpc.max_send_message_length', 50 * 1024 * 1024)]
+    with grpc.insecure_channel(args.target, options=options) as channel:
+        stub = caption_pb2_grpc.ImageCaptionServiceStub(channel)
+        stub.GenerateCaption(request)  # warm-up
+        for concurrency in args.concurrency:
+            run(stub, request, args.requests, concurrency)
+
+if __name__ == "__main__":
+    main()
@@ -24,7 +24,7 @@ _sym_db = _symbol_database.Default()
 
 
 
-DESCRIPTOR = _descriptor_pool.Default().AddSerializedFile(b'\n\rcaption.proto\x12\x07\x63\x61ption\"\x1d\n\x0cImageRequest\x12\r\n\x05image\x18\x01 \x01(\x0c\"l\n\x0f\x43\x61ptionResponse\x12\x0f\n\x07\x63\x61ption\x18\x01 \x01(\t\x12\x16\n\x0einference_time\x18\x02 \x01(\x02\x12\x1c\n\x14predicted_department\x18\x03 \x01(\t\x12\x12\n\nconfidence\x18\x04 \x01(\x02\x32Y\n\x13ImageCaptionService\x12\x42\n\x0fGenerateCaption\x12\x15.caption.ImageRequest\x1a\x18.caption.CaptionResponseb\x06proto3')
+DESCRIPTOR = _descriptor_pool.Default().AddSerializedFile(b'\n\rcaption.proto\x12\x07\x63\x61ption\"c\n\x0cImageRequest\x12\r\n\x05image\x18\x01 \x01(\x0c\x12\x15\n\rclassify_only\x18\x02 \x01(\x08\x12\x0e\n\x06pixels\x18\x03 \x01(\x0c\x12\r\n\x05width\x18\x04 \x01(\x05\x12\x0e\n\x06height\x18\x05 \x01(\x05\"l\n\x0f\x43\x61ptionResponse\x12\x0f\n\x07\x63\x61ption\x18\x01 \x01(\t\x12\x16\n\x0einference_time\x18\x02 \x01(\x02\x12\x1c\n\x14predicted_department\x18\x03 \x01(\t\x12\x12\n\nconfidence\x18\x04 \x01(\x02\x32Y\n\x13ImageCaptionService\x12\x42\n\x0fGenerateCaption\x12\x15.caption.ImageRequest\x1a\x18.caption.CaptionResponseb\x06proto3')
 
 _globals = globals()
 _builder.BuildMessageAndEnumDescriptors(DESCRIPTOR, _globals)
@@ -32,9 +32,9 @@ _builder.BuildTopDescriptorsAndMessages(DESCRIPTOR, 'caption_pb2', _globals)
 if not _descriptor._USE_C_DESCRIPTORS:
   DESCRIPTOR._loaded_options = None
   _globals['_IMAGEREQUEST']._serialized_start=26
-  _globals['_IMAGEREQUEST']._serialized_end=55
-  _globals['_CAPTIONRESPONSE']._serialized_start=57
-  _globals['_CAPTIONRESPONSE']._serialized_end=165
-  _globals['_IMAGECAPTIONSERVICE']._serialized_start=167
-  _globals['_IMAGECAPTIONSERVICE']._serialized_end=256
+  _globals['_IMAGEREQUEST']._serialized_end=125
+  _globals['_CAPTIONRESPONSE']._serialized_start=127
+  _globals['_CAPTIONRESPONSE']._serialized_end=235
+  _globals['_IMAGECAPTIONSERVICE']._serialized_start=237
+  _globals['_IMAGECAPTIONSERVICE']._serialized_end=326
 # @@protoc_insertion_point(module_scope)
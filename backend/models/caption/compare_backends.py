@@ -0,0 +1,95 @@
+"""
+Accuracy / latency / memory comparison of the caption backends on a folder of images.
+
+    python compare_backends.py path/to/images --backends torch torch-int8 onnx
+
+Each backend runs in its own subprocess so peak RSS is measured per backend.
+Agreement is reported against the first backend (fp32 "torch" by default).
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+IMAGE_EXTENSIONS = (".jpg", ".jpeg", ".png", ".webp")
+
+def peak_rss_mb():
+    try:
+        import resource
+        rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return rss / 1024 if sys.platform != "darwin" else rss / (1024 * 1024)
+    except ImportError:  # Windows
+        import psutil
+        return psutil.Process().memory_info().peak_wset / (1024 * 1024)
+
+def run_backend(name, image_paths):
+    """Runs inside the subprocess, prints one JSON document."""
+    import torch
+    from PIL import Image
+    from backends import load_backend
+
+    backend = load_backend(name)
+    results = []
+    for path in image_paths:
+        image = Image.open(path).convert("RGB")
+        start = time.perf_counter()
+        with torch.no_grad():
+            pixel_values = backend.preprocess([image])
+            encoder_outputs = backend.encode(pixel_values)
+            predicted, confidences = backend.classify(encoder_outputs)
+            caption = backend.caption(encoder_outputs)[0]
+        results.append({
+            "image": path,
+            "caption": caption,
+            "department": predicted[0],
+            "confidence": confidences[0],
+            "seconds": time.perf_counter() - start,
+        })
+    print(json.dumps({"backend": name, "peak_rss_mb": peak_rss_mb(), "results": results}))
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("images")
+    parser.add_argument("--backends", nargs="+", default=["torch", "torch-int8", "onnx"])
+    parser.add_argument("--worker", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    image_paths = sorted(
+        os.path.join(args.images, f) for f in os.listdir(args.images)
+        if f.lower().endswith(IMAGE_EXTENSIONS)
+    )
+    if args.worker:
+        run_backend(args.worker, image_paths)
+        return
+
+    reports = []
+    for name in args.backends:
+        proc = subprocess.run(
+            [sys.executable, __file__, args.images, "--worker", name],
+            capture_output=True, text=True,
+        )
+        if proc.returncode != 0:
+            print(f"{name}: failed\n{proc.stderr[-2000:]}")
+            continue
+        reports.append(json.loads(proc.stdout.strip().splitlines()[-1]))
+
+    if not reports:
+        return
+    reference = reports[0]["results"]
+    print(f"{'backend':<12}{'mean ms':>10}{'p50 ms':>10}{'peak MB':>10}{'dept agree':>12}{'caption agree':>15}{'max conf diff':>15}")
+    for report in reports:
+        results = report["results"]
+        ms = [r["seconds"] * 1000 for r in results[1:] or results]  # first image includes warm-up
+        dept = sum(a["department"] == b["department"] for a, b in zip(results, reference)) / len(results)
+        caption = sum(a["caption"] == b["caption"] for a, b in zip(results, reference)) / len(results)
+        conf = max(abs(a["confidence"] - b["confidence"]) for a, b in zip(results, reference))
+        print(
+            f"{report['backend']:<12}{statistics.mean(ms):>10.1f}{statistics.median(ms):>10.1f}"
+            f"{report['peak_rss_mb']:>10.0f}{dept:>12.0%}{caption:>15.0%}{conf:>15.4f}"
+        )
+
+if __name__ == "__main__":
+    main()
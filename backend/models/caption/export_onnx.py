@@ -0,0 +1,55 @@
+"""
+Export the caption models for the "onnx" backend (CAPTION_BACKEND=onnx).
+
+    pip install optimum[onnxruntime]
+    python export_onnx.py [--quantize]
+
+Writes to models/onnx/: encoder_model.onnx, decoder_model.onnx,
+decoder_with_past_model.onnx (KV cache for beam search) and mlp.onnx.
+--quantize additionally rewrites every graph with int8 dynamic quantization.
+"""
+import argparse
+import os
+
+import torch
+from optimum.onnxruntime import ORTModelForVision2Seq
+from backends import MODEL_NAME, ONNX_DIR, load_mlp
+from loguru import logger
+
+def export_mlp(onnx_dir):
+    mlp_model = load_mlp("cpu")
+    hidden_size = mlp_model.fc[0].in_features
+    torch.onnx.export(
+        mlp_model,
+        torch.zeros(1, hidden_size),
+        os.path.join(onnx_dir, "mlp.onnx"),
+        input_names=["features"],
+        output_names=["logits"],
+        dynamic_axes={"features": {0: "batch"}, "logits": {0: "batch"}},
+        opset_version=17,
+    )
+
+def quantize(onnx_dir):
+    from onnxruntime.quantization import QuantType, quantize_dynamic
+    for name in sorted(os.listdir(onnx_dir)):
+        if name.endswith(".onnx"):
+            path = os.path.join(onnx_dir, name)
+            quantize_dynamic(path, path, weight_type=QuantType.QInt8)
+            logger.info(f"[EXPORT] Quantized {name}")
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--out", default=ONNX_DIR)
+    parser.add_argument("--quantize", action="store_true")
+    args = parser.parse_args()
+
+    os.makedirs(args.out, exist_ok=True)
+    model = ORTModelForVision2Seq.from_pretrained(MODEL_NAME, export=True, use_cache=True)
+    model.save_pretrained(args.out)
+    export_mlp(args.out)
+    if args.quantize:
+        quantize(args.out)
+    logger.success(f"[EXPORT] ONNX graphs written to {args.out}: {sorted(os.listdir(args.out))}")
+
+if __name__ == "__main__":
+    main()
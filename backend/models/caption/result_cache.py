@@ -0,0 +1,152 @@
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+# Shared by the caption server (models/caption/server2.py) and citizens/itt_client.py,
+# so this module only depends on the standard library (+ PIL for perceptual hashes).
+
+def content_hash(data: bytes) -> str:
+    """Exact-duplicate key: SHA-256 of the uploaded bytes."""
+    return hashlib.sha256(data).hexdigest()
+
+def stream_content_hash(chunks) -> str:
+    """content_hash of a file given as an iterable of byte chunks, without joining them."""
+    digest = hashlib.sha256()
+    for chunk in chunks:
+        digest.update(chunk)
+    return digest.hexdigest()
+
+def perceptual_hash(image) -> int:
+    """
+    64-bit difference hash (dHash) of a PIL image.
+    Re-encoded / resized copies of the same photo land within a few bits of each other.
+    """
+    small = image.convert("L").resize((9, 8))
+    pixels = list(small.getdata())
+    bits = 0
+    for row in range(8):
+        for col in range(8):
+            left = pixels[row * 9 + col]
+            right = pixels[row * 9 + col + 1]
+            bits = (bits << 1) | (left > right)
+    return bits
+
+class CaptionCache:
+    """
+    LRU cache of caption results keyed by image content hash.
+
+    - Memory tier: OrderedDict bounded by `max_entries`
+    - Disk tier (optional): sqlite file bounded by `max_disk_entries`, survives restarts
+    - Near duplicates (optional): perceptual hashes within `max_distance` bits count as hits
+    - Values must be JSON serialisable
+    """
+
+    def __init__(self, max_entries=1024, disk_path=None, max_disk_entries=100000, max_distance=None):
+        self.max_entries = max_entries
+        self.max_disk_entries = max_disk_entries
+        self.max_distance = max_distance
+        self._entries = OrderedDict()  # digest -> (value, phash)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.near_hits = 0
+        self.misses = 0
+        self._db = None
+        if disk_path:
+            self._db = sqlite3.connect(str(disk_path), check_same_thread=False)
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS captions ("
+                "digest TEXT PRIMARY KEY, value TEXT NOT NULL, phash INTEGER, last_access REAL NOT NULL)"
+            )
+            self._db.execute("CREATE INDEX IF NOT EXISTS captions_last_access ON captions(last_access)")
+            self._db.commit()
+
+    def get(self, digest, usable=None):
+        """
+        Exact lookup by content hash (memory, then disk). A value `usable(value)` rejects is
+        returned as None and not counted: the caller computes it again and put() counts that
+        as the miss.
+        """
+        with self._lock:
+            entry = self._entries.get(digest)
+            if entry is not None:
+                self._entries.move_to_end(digest)
+                if usable is not None and not usable(entry[0]):
+                    return None
+                self.hits += 1
+                return entry[0]
+
+            stored = self._disk_get(digest)
+            if stored is not None:
+                self._remember(digest, *stored)
+                if usable is not None and not usable(stored[0]):
+                    return None
+                self.hits += 1
+                return stored[0]
+            return None
+
+    def get_similar(self, phash, usable=None):
+        """Near-duplicate lookup among the in-memory entries, None when disabled."""
+        if phash is None or self.max_distance is None:
+            return None
+        with self._lock:
+            for digest, (value, other_phash) in reversed(self._entries.items()):
+                if usable is not None and not usable(value):
+                    continue
+                if other_phash is not None and (phash ^ other_phash).bit_count() <= self.max_distance:
+                    self._entries.move_to_end(digest)
+                    self.near_hits += 1
+                    return value
+            return None
+
+    def put(self, digest, value, phash=None):
+        """Store a freshly computed result, every put is counted as a miss."""
+        with self._lock:
+            self.misses += 1
+            self._remember(digest, value, phash)
+            self._disk_put(digest, value, phash)
+
+    def stats(self):
+        lookups = self.hits + self.near_hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "hits": self.hits,
+            "near_hits": self.near_hits,
+            "misses": self.misses,
+            "hit_rate": (self.hits + self.near_hits) / lookups if lookups else 0.0,
+        }
+
+    def _remember(self, digest, value, phash):
+        self._entries[digest] = (value, phash)
+        self._entries.move_to_end(digest)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def _disk_get(self, digest):
+        if self._db is None:
+            return None
+        row = self._db.execute("SELECT value, phash FROM captions WHERE digest = ?", (digest,)).fetchone()
+        if row is None:
+            return None
+        self._db.execute("UPDATE captions SET last_access = ? WHERE digest = ?", (time.time(), digest))
+        self._db.commit()
+        phash = row[1] & ((1 << 64) - 1) if row[1] is not None else None
+        return json.loads(row[0]), phash
+
+    def _disk_put(self, digest, value, phash):
+        if self._db is None:
+            return
+        # sqlite integers are signed 64-bit
+        stored_phash = phash - (1 << 64) if phash is not None and phash >= (1 << 63) else phash
+        self._db.execute(
+            "INSERT OR REPLACE INTO captions (digest, value, phash, last_access) VALUES (?, ?, ?, ?)",
+            (digest, json.dumps(value), stored_phash, time.time()),
+        )
+        self._db.execute(
+            "DELETE FROM captions WHERE digest IN ("
+            "SELECT digest FROM captions ORDER BY last_access DESC LIMIT -1 OFFSET ?)",
+            (self.max_disk_entries,),
+        )
+        self._db.commit()
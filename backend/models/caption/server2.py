@@ -1,102 +1,108 @@
 import grpc
 from concurrent import futures
+import os
 import time
-import io
 import torch
-import torch.nn as nn
-from transformers import VisionEncoderDecoderModel, ViTImageProcessor, AutoTokenizer
-from PIL import Image
 from caption_pb2 import CaptionResponse  # type: ignore
 import caption_pb2_grpc
+from backends import load_backend
+from batching import MicroBatcher
+from result_cache import CaptionCache, content_hash, perceptual_hash
+from transfer import request_image, request_payload
 from loguru import logger
 
-MODEL_NAME = "nlpconnect/vit-gpt2-image-captioning"
-MLP_CHECKPOINT_PATH = "models/complete_vit.pth"
-MAX_WORKERS = 4
 PORT = "50053"
+# Inference backend: "torch" (fp32), "torch-int8" (dynamic quantization, CPU) or "onnx" (export_onnx.py first)
+BACKEND = os.environ.get("CAPTION_BACKEND", "torch")
+# Micro-batching knobs: a batch runs once MAX_BATCH_SIZE images wait or MAX_BATCH_WAIT_MS passed
+MAX_BATCH_SIZE = int(os.environ.get("CAPTION_MAX_BATCH_SIZE", 8))
+MAX_BATCH_WAIT_MS = float(os.environ.get("CAPTION_MAX_BATCH_WAIT_MS", 10))
+# RPC threads only decode images and wait on the batcher, keep enough to fill a batch
+MAX_WORKERS = int(os.environ.get("CAPTION_MAX_WORKERS", 2 * MAX_BATCH_SIZE))
+# Result cache: entries kept in memory, optional sqlite file for a disk tier,
+# perceptual-hash distance (bits) for near duplicates, negative (the default) disables them:
+# similar photos of different scenes (two potholes on one road) would share a caption
+CACHE_SIZE = int(os.environ.get("CAPTION_CACHE_SIZE", 2048))
+CACHE_PATH = os.environ.get("CAPTION_CACHE_PATH")
+CACHE_PHASH_DISTANCE = int(os.environ.get("CAPTION_CACHE_PHASH_DISTANCE", -1))
+
+backend = load_backend(BACKEND)
 
-device = "cuda" if torch.cuda.is_available() else "cpu"
-
-class SimpleMLP(nn.Module):
-    def __init__(self, hidden_size, num_classes):
-        super().__init__()
-        self.fc = nn.Sequential(
-            nn.Linear(hidden_size, 256),
-            nn.ReLU(),
-            nn.Dropout(0.5),
-            nn.Linear(256, num_classes)
-        )
-    
-    def forward(self, features):
-        return self.fc(features)
-
-checkpoint = torch.load(MLP_CHECKPOINT_PATH, map_location=device)
-num_classes = checkpoint['num_classes']
-hidden_size = checkpoint['hidden_size']
-
-class_names = ['BBMP (garbage)', 'BBMP (pothole)', 'BESCOM', 'BWSSB']
+logger.success("All models loaded successfully")
 
-mlp_model = SimpleMLP(hidden_size, num_classes).to(device)
-mlp_model.load_state_dict(checkpoint['model_state_dict'])
-mlp_model.eval()
+def caption_batch(items):
+    """
+    items: list of (PIL image, classify_only)
+    One processor + encoder + MLP pass for the whole batch, GPT-2 decoding only for
+    the images that asked for a caption.
+    """
+    pixel_values = backend.preprocess([image for image, _ in items])
+
+    backend.synchronize()
+    start = time.perf_counter()
+
+    with torch.no_grad():
+        encoder_outputs = backend.encode(pixel_values)
+        predicted, confidences = backend.classify(encoder_outputs)
+
+        captions = [""] * len(items)
+        wanted = [i for i, (_, classify_only) in enumerate(items) if not classify_only]
+        if wanted:
+            if len(wanted) < len(items):
+                encoder_outputs = backend.select(encoder_outputs, wanted)
+            for i, text in zip(wanted, backend.caption(encoder_outputs)):
+                captions[i] = text
+
+    backend.synchronize()
+    elapsed = time.perf_counter() - start
+
+    return [
+        (text, pred, conf, elapsed)
+        for text, pred, conf in zip(captions, predicted, confidences)
+    ]
 
-vit_gpt2_model = VisionEncoderDecoderModel.from_pretrained(MODEL_NAME).to(device)
-image_processor = ViTImageProcessor.from_pretrained(MODEL_NAME)
-tokenizer = AutoTokenizer.from_pretrained(MODEL_NAME)
-tokenizer.pad_token = tokenizer.eos_token
-vit_gpt2_model.config.pad_token_id = tokenizer.eos_token_id
-vit_gpt2_model.eval()
+batcher = MicroBatcher(caption_batch, max_batch_size=MAX_BATCH_SIZE, max_wait_ms=MAX_BATCH_WAIT_MS)
+cache = CaptionCache(
+    max_entries=CACHE_SIZE,
+    disk_path=CACHE_PATH,
+    max_distance=CACHE_PHASH_DISTANCE if CACHE_PHASH_DISTANCE >= 0 else None,
+)
 
-logger.success("All models loaded successfully")
+def cache_usable(cached, classify_only):
+    """A classify-only result has no caption, it can't answer a caption request."""
+    return cached is not None and (classify_only or cached["captioned"])
 
 class ImageCaptionService(caption_pb2_grpc.ImageCaptionServiceServicer):
 
     def GenerateCaption(self, request, context):
         try:
-            image = Image.open(io.BytesIO(request.image)).convert("RGB")
-            pixel_values = image_processor(images=image, return_tensors="pt").pixel_values.to(device)
-
-            if device == "cuda":
-                torch.cuda.synchronize()
-            start = time.perf_counter()
-
-            stored_encoder_output = None
-            
-            def capture_encoder_output(module, input, output):
-                nonlocal stored_encoder_output
-                stored_encoder_output = output.last_hidden_state
-            
-            hook = vit_gpt2_model.encoder.register_forward_hook(capture_encoder_output) #this stores the features while running whole pipeline in betwen
-
-            with torch.no_grad():
-                output_ids = vit_gpt2_model.generate(
-                    pixel_values=pixel_values,
-                    max_length=30,
-                    num_beams=4,
-                    pad_token_id=tokenizer.eos_token_id
-                ) # type: ignore
-                
-                caption = tokenizer.decode(output_ids[0], skip_special_tokens=True)
-                
-                cls_features = stored_encoder_output[:, 0, :]
-                logits = mlp_model(cls_features)
-                probs = torch.softmax(logits, dim=1)
-                confidence, pred_idx = torch.max(probs, dim=1)
-                
-                predicted_class = class_names[pred_idx.item()]
-                confidence_score = confidence.item()
-
-            hook.remove()
-
-            if device == "cuda":
-                torch.cuda.synchronize()
-            end = time.perf_counter()
+            digest = content_hash(request_payload(request))
+            usable = lambda value: cache_usable(value, request.classify_only)
+            cached = cache.get(digest, usable=usable)
+            if cached is not None:
+                return self._cached_response(cached)
+
+            # Decoding stays on the RPC thread, only the model call is batched.
+            # Clients sending `pixels` are already at model resolution, nothing to decode.
+            image = request_image(request)
+            phash = perceptual_hash(image) if cache.max_distance is not None else None
+            cached = cache.get_similar(phash, usable=usable)
+            if cached is not None:
+                return self._cached_response(cached)
+
+            caption_text, predicted_class, confidence_score, inference_time = batcher.submit((image, request.classify_only))
+            cache.put(digest, {
+                "caption": caption_text,
+                "predicted_department": predicted_class,
+                "confidence": confidence_score,
+                "captioned": not request.classify_only,
+            }, phash=phash)
 
             return CaptionResponse(
-                caption=caption,
+                caption=caption_text,
                 predicted_department=predicted_class,
                 confidence=confidence_score,
-                inference_time=end - start
+                inference_time=inference_time
             )
 
         except Exception as e:
@@ -104,6 +110,16 @@ class ImageCaptionService(caption_pb2_grpc.ImageCaptionServiceServicer):
             context.set_details(str(e))
             return CaptionResponse()
 
+    def _cached_response(self, cached):
+        stats = cache.stats()
+        logger.debug(f"[CACHE] hit | hit_rate={stats['hit_rate']:.2f} | entries={stats['entries']}")
+        return CaptionResponse(
+            caption=cached["caption"],
+            predicted_department=cached["predicted_department"],
+            confidence=cached["confidence"],
+            inference_time=0.0
+        )
+
 
 def serve():
     # Define options for larger message sizes (50MB)
@@ -121,7 +137,7 @@ def serve():
     )
     server.add_insecure_port(f"[::]:{PORT}")
     server.start()
-    logger.info(f"gRPC server running on port {PORT}")
+    logger.info(f"gRPC server running on port {PORT} | backend={BACKEND} | max_batch_size={MAX_BATCH_SIZE} | max_batch_wait_ms={MAX_BATCH_WAIT_MS}")
     server.wait_for_termination()
     
 if __name__ == "__main__":
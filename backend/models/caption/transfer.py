@@ -0,0 +1,45 @@
+import io
+from PIL import Image
+
+# Shared by the caption server (models/caption/server2.py) and citizens/itt_client.py,
+# like result_cache.py this only depends on PIL.
+
+MODEL_IMAGE_SIZE = (224, 224)  # ViTImageProcessor resizes every image to this anyway
+JPEG_QUALITY = 90
+# "pixels"   : raw RGB at model resolution (~150KB), the server skips decoding entirely
+# "jpeg"     : re-encoded at model resolution (~10KB), for slow links
+# "original" : the uploaded bytes as-is (up to the 20MB evidence limit)
+TRANSFER_MODES = ("pixels", "jpeg", "original")
+
+def downscale(fp, size=MODEL_IMAGE_SIZE):
+    """
+    Open an image file / stream and shrink it to the model input size.
+    JPEGs are decoded with libjpeg DCT scaling (Image.draft), so a large photo is never
+    fully decoded into memory. Same bilinear resize as the processor, which then has nothing to do.
+    """
+    image = Image.open(fp)
+    image.draft("RGB", size)
+    return image.convert("RGB").resize(size, Image.Resampling.BILINEAR)
+
+def request_fields(fp, mode="pixels"):
+    """ImageRequest keyword arguments for an image file / stream."""
+    if mode == "original":
+        return {"image": fp.read()}
+    image = downscale(fp)
+    if mode == "jpeg":
+        buffer = io.BytesIO()
+        image.save(buffer, format="JPEG", quality=JPEG_QUALITY)
+        return {"image": buffer.getvalue()}
+    if mode == "pixels":
+        return {"pixels": image.tobytes(), "width": image.width, "height": image.height}
+    raise ValueError(f"Unknown image transfer mode '{mode}', expected one of {TRANSFER_MODES}")
+
+def request_payload(request):
+    """The bytes that identify an ImageRequest's image (used as the cache key)."""
+    return request.pixels or request.image
+
+def request_image(request):
+    """PIL image of an ImageRequest, whichever way it was sent."""
+    if request.pixels:
+        return Image.frombytes("RGB", (request.width, request.height), request.pixels)
+    return Image.open(io.BytesIO(request.image)).convert("RGB")
@@ -0,0 +1,88 @@
+import threading
+import time
+from collections import deque
+
+from loguru import logger
+
+from vosk_stt import AudioTranscriber
+
+class PoolTimeout(Exception):
+    pass
+
+class RecognizerPool:
+    """
+    Bounded pool of AudioTranscribers (one KaldiRecognizer each) shared by the STT streams.
+
+    - `warm` recognizers are built at startup, so a new stream doesn't pay for one
+    - At most `max_size` exist; that is also the number of streams transcribing at once
+    - checkout() waits up to `timeout` seconds for a free one and raises PoolTimeout after
+    - checkin() resets the recognizer for the next stream; a broken one is dropped instead
+    """
+
+    def __init__(self, model_path, max_size, warm=0):
+        self.model_path = model_path
+        self.max_size = max_size
+        self._idle = deque()
+        self._created = 0
+        self._waiting = 0
+        self._cond = threading.Condition()
+        for _ in range(min(warm, max_size)):
+            self._idle.append(self._create())
+        logger.info(f"[STT] Recognizer pool ready | warm={len(self._idle)} max={max_size}")
+
+    def checkout(self, timeout=None):
+        """(transcriber, seconds spent waiting for it)"""
+        start = time.monotonic()
+        deadline = None if timeout is None else start + timeout
+        with self._cond:
+            self._waiting += 1
+            try:
+                while not self._idle and self._created >= self.max_size:
+                    remaining = None if deadline is None else deadline - time.monotonic()
+                    if remaining is not None and remaining <= 0:
+                        raise PoolTimeout(f"No recognizer free within {timeout}s")
+                    self._cond.wait(remaining)
+                waited = time.monotonic() - start
+                if self._idle:
+                    return self._idle.pop(), waited
+                self._created += 1
+            finally:
+                self._waiting -= 1
+        # Built outside the lock, the slot is already reserved
+        try:
+            return self._new(), waited
+        except Exception:
+            with self._cond:
+                self._created -= 1
+                self._cond.notify()
+            raise
+
+    def checkin(self, transcriber, broken=False):
+        if not broken:
+            try:
+                transcriber.reset()
+            except Exception as e:
+                logger.warning(f"[STT] Recognizer reset failed, dropping it: {e}")
+                broken = True
+        with self._cond:
+            if broken:
+                self._created -= 1
+            else:
+                self._idle.append(transcriber)
+            self._cond.notify()
+
+    def stats(self):
+        with self._cond:
+            return {
+                "busy": self._created - len(self._idle),
+                "idle": len(self._idle),
+                "waiting": self._waiting,
+                "max": self.max_size,
+            }
+
+    def _create(self):
+        self._created += 1
+        return self._new()
+
+    def _new(self):
+        return AudioTranscriber(self.model_path)
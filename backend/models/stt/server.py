@@ -1,20 +1,39 @@
 # pyright: reportAttributeAccessIssue=false
 import grpc
+import itertools
+import os
 from concurrent import futures
 import stt_pb2
 import stt_pb2_grpc
-from vosk_stt import AudioTranscriber
+from recognizer_pool import PoolTimeout, RecognizerPool
 from loguru import logger
 
 MODEL_PATH = "vosk-model-small-en-in-0.4"
+# Admission: STT_MAX_STREAMS streams transcribe at once (one pooled recognizer each, which
+# bounds memory), up to STT_MAX_QUEUED more wait for a recognizer for STT_QUEUE_TIMEOUT
+# seconds, anything beyond is refused with RESOURCE_EXHAUSTED right away
+MAX_STREAMS = int(os.environ.get("STT_MAX_STREAMS", 10))
+MAX_QUEUED = int(os.environ.get("STT_MAX_QUEUED", 20))
+QUEUE_TIMEOUT = float(os.environ.get("STT_QUEUE_TIMEOUT", 10))
+# Recognizers built at startup, the rest are created on demand up to STT_MAX_STREAMS
+WARM_RECOGNIZERS = int(os.environ.get("STT_WARM_RECOGNIZERS", 4))
+
 class SpeechToTextService(stt_pb2_grpc.SpeechToTextServicer):
 
+    def __init__(self):
+        self.pool = RecognizerPool(MODEL_PATH, MAX_STREAMS, warm=WARM_RECOGNIZERS)
+
     def StreamAudio(self, request_iterator, context):
-        """One gRPC stream = one recognizer instance"""
-        transcriber = AudioTranscriber(MODEL_PATH)
+        """One gRPC stream = one pooled recognizer, checked out once audio arrives"""
+        requests = iter(request_iterator)
+        first = next(requests, None)
+        if first is None or first.end_of_stream:
+            return
+        transcriber = self._admit(context)
         logger.info("[STT] New stream started")
+        broken = False
         try:
-            for audio_chunk in request_iterator:
+            for audio_chunk in itertools.chain([first], requests):
                 if audio_chunk.end_of_stream:
                     logger.info(f"[STT] End of stream received")
                     break
@@ -24,15 +43,15 @@ class SpeechToTextService(stt_pb2_grpc.SpeechToTextServicer):
 
                 # Process with Vosk
                 result = transcriber.accept_audio_chunk(audio_chunk.pcm)
-                
+
                 if result and result["text"]:  # Only send if there's actual text
                     logger.debug(f"[STT] Transcription ({result['type']}): '{result['text']}'")
                     if result["type"] == "partial":
                         yield stt_pb2.Transcript(text=result["text"],type=stt_pb2.PARTIAL)
-                        
+
                     elif result["type"] == "final":
                         yield stt_pb2.Transcript(text=result["text"],type=stt_pb2.FINAL)
-            
+
             # Flush remaining audio
             final = transcriber.flush()
             if final and final["text"]:
@@ -40,16 +59,41 @@ class SpeechToTextService(stt_pb2_grpc.SpeechToTextServicer):
                 yield stt_pb2.Transcript(text=final["text"],type=stt_pb2.FINAL)
             else:
                 logger.warning("[STT] No text in final FLUSH")
-                
+
+        except grpc.RpcError as e:
+            # Raised by the request iterator when the client cancels (every websocket
+            # disconnect does) or the call fails: the recognizer itself is fine
+            logger.info(f"[STT] Stream ended by the client: {e}")
         except Exception as e:
+            broken = True
             logger.error(f"[STT] Error in StreamAudio: {e}", exc_info=True)
+        finally:
+            # Also runs when the client cancels (the generator is closed); a recognizer that
+            # isn't broken is reset and goes back to the pool
+            self.pool.checkin(transcriber, broken=broken)
+
+    def _admit(self, context):
+        """Recognizer for a stream, telling the client how long it queued (initial metadata)."""
+        try:
+            transcriber, waited = self.pool.checkout(timeout=QUEUE_TIMEOUT)
+        except PoolTimeout:
+            logger.warning(f"[STT] Stream refused, all recognizers busy | {self.pool.stats()}")
+            context.abort(grpc.StatusCode.RESOURCE_EXHAUSTED, "All speech recognizers are busy")
+        if waited > 0.05:
+            logger.warning(f"[STT] Stream queued {waited * 1000:.0f}ms for a recognizer | {self.pool.stats()}")
+        context.send_initial_metadata((("stt-queue-ms", str(int(waited * 1000))),))
+        return transcriber
 
 def serve():
-    server = grpc.server(futures.ThreadPoolExecutor(max_workers=10))
+    # Queued streams hold an RPC thread while they wait, beyond that gRPC refuses new calls
+    server = grpc.server(
+        futures.ThreadPoolExecutor(max_workers=MAX_STREAMS + MAX_QUEUED),
+        maximum_concurrent_rpcs=MAX_STREAMS + MAX_QUEUED,
+    )
     stt_pb2_grpc.add_SpeechToTextServicer_to_server(SpeechToTextService(),server)
     server.add_insecure_port("[::]:50051")
     server.start()
-    logger.success("STT gRPC server running on port 50051")
+    logger.success(f"STT gRPC server running on port 50051 | streams={MAX_STREAMS} queued={MAX_QUEUED}")
     server.wait_for_termination()
 
 if __name__ == "__main__":
@@ -33,6 +33,11 @@ class AudioTranscriber:
                 partial = json.loads(self.recognizer.PartialResult())
                 return {"text": partial.get("partial", ""), "type": "partial"}
         
+    def reset(self):
+        """Forget the current utterance, so the recognizer can serve another stream."""
+        if self.recognizer:
+            self.recognizer.Reset()
+
     def flush(self):
         if self.recognizer:
             result = json.loads(self.recognizer.FinalResult())
@@ -0,0 +1,82 @@
+"""
+Load test for the TTS gRPC server: concurrent StreamTTS calls speaking service answers.
+
+    python benchmark.py --streams 32 --concurrency 1 4 16 --phrases 3
+
+Start the server with the phrase cache off (TTS_CACHE_DIR=) so every phrase is synthesized,
+once with TTS_WORKERS=0 (one in-process pipeline) and once with TTS_WORKERS=<cores / threads>
+to compare. "audio x" is seconds of audio produced per wall-clock second over all streams.
+"""
+import argparse
+import json
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
+from itertools import count
+from pathlib import Path
+
+import grpc
+from tts_pb2 import TTSRequest  # type: ignore
+import tts_pb2_grpc
+from sentences import split_sentences
+
+SERVICES_PATH = Path(__file__).resolve().parent.parent / "ttt" / "processed_data" / "services.json"
+
+def load_texts(services_path, phrases):
+    """First `phrases` phrases of every service answer."""
+    with open(services_path, encoding="utf-8") as f:
+        services = json.load(f)
+    return [" ".join(split_sentences(service["text"])[:phrases]) for service in services]
+
+def run(stub, texts, offset, streams, concurrency):
+    counter = count(offset)
+
+    def call(_):
+        text = texts[next(counter) % len(texts)]
+        requests = iter([TTSRequest(text=text), TTSRequest(end_of_stream=True)])
+        start = time.perf_counter()
+        first = None
+        audio_bytes = 0
+        sample_rate = 24000
+        for response in stub.StreamTTS(requests):
+            if response.audio and first is None:
+                first = time.perf_counter() - start
+            audio_bytes += len(response.audio)
+            sample_rate = response.sample_rate or sample_rate
+        return first or 0.0, audio_bytes / 2 / sample_rate
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        results = list(pool.map(call, range(streams)))
+    wall = time.perf_counter() - start
+
+    first_audio = sorted(first for first, _ in results)
+    audio_seconds = sum(seconds for _, seconds in results)
+    p99 = first_audio[min(len(first_audio) - 1, int(len(first_audio) * 0.99))]
+    return (
+        f"concurrency={concurrency:<3} streams/s={streams / wall:6.2f} audio x{audio_seconds / wall:6.2f} "
+        f"first audio p50={statistics.median(first_audio) * 1000:8.1f}ms p99={p99 * 1000:8.1f}ms"
+    )
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--target", default="localhost:50052")
+    parser.add_argument("--services", default=str(SERVICES_PATH))
+    parser.add_argument("--streams", type=int, default=32, help="streams per concurrency level")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 4, 16])
+    parser.add_argument("--phrases", type=int, default=3, help="phrases spoken per stream")
+    args = parser.parse_args()
+
+    texts = load_texts(args.services, args.phrases)
+    channel = grpc.insecure_channel(args.target)
+    stub = tts_pb2_grpc.TextToSpeechStub(channel)
+
+    # Warm up (model load, first-call allocations), then a fresh slice of services per level
+    run(stub, texts, 0, 2, 1)
+    offset = 2
+    for concurrency in args.concurrency:
+        print(run(stub, texts, offset, args.streams, concurrency))
+        offset += args.streams
+
+if __name__ == "__main__":
+    main()
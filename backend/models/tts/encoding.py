@@ -0,0 +1,134 @@
+import numpy as np
+from loguru import logger
+
+from tts_pb2 import OPUS, PCM16  # type: ignore
+
+# Output formats of the TTS server (models/tts/server.py), one encoder per stream.
+# Kokoro speaks at 24 kHz PCM16 (48 KB/s); 16 kHz PCM16 is a third smaller and
+# Opus at 24 kbit/s is ~3 KB/s, about 16x less than the raw stream.
+
+OPUS_RATES = (8000, 12000, 16000, 24000, 48000)
+OPUS_FRAME_MS = 20
+OPUS_BITRATE = 24000  # bit/s, plenty for a single speaking voice
+FILTER_TAPS = 31
+
+def lowpass_kernel(cutoff, taps=FILTER_TAPS):
+    """Hamming-windowed sinc, cutoff in cycles per input sample (< 0.5), unit DC gain."""
+    n = np.arange(taps) - (taps - 1) / 2
+    kernel = 2 * cutoff * np.sinc(2 * cutoff * n) * np.hamming(taps)
+    return (kernel / kernel.sum()).astype(np.float32)
+
+class Resampler:
+    """
+    Streaming sample-rate conversion of float32 mono audio: anti-alias FIR (when going down)
+    then linear interpolation, both vectorized per chunk. The filter tail and the fractional
+    read position carry over between chunks, so chunk boundaries don't click.
+    """
+
+    def __init__(self, source_rate, target_rate):
+        self.step = source_rate / target_rate
+        self.kernel = lowpass_kernel(0.45 * target_rate / source_rate) if target_rate < source_rate else None
+        self.tail = np.zeros(FILTER_TAPS - 1, dtype=np.float32)
+        self.pending = np.zeros(0, dtype=np.float32)  # input not fully interpolated yet
+        self.position = 0.0  # of the next output sample, in `pending` samples
+
+    def process(self, samples):
+        if self.kernel is not None:
+            padded = np.concatenate([self.tail, samples])
+            self.tail = padded[len(padded) - len(self.tail):]
+            samples = np.convolve(padded, self.kernel, mode="valid").astype(np.float32)
+        buffer = np.concatenate([self.pending, samples])
+        last = len(buffer) - 1
+        if last < self.position:
+            self.pending = buffer
+            return np.zeros(0, dtype=np.float32)
+
+        count = int((last - self.position) // self.step) + 1
+        positions = self.position + self.step * np.arange(count)
+        index = positions.astype(np.int64)
+        frac = (positions - index).astype(np.float32)
+        upper = np.minimum(index + 1, last)
+        out = buffer[index] * (1 - frac) + buffer[upper] * frac
+
+        consumed = int((self.position + self.step * count) // 1)
+        consumed = min(consumed, last)
+        self.pending = buffer[consumed:]
+        self.position = self.position + self.step * count - consumed
+        return out
+
+def to_float(pcm):
+    return np.frombuffer(pcm, dtype=np.int16).astype(np.float32) / 32768.0
+
+def to_pcm16(samples):
+    return (np.clip(samples, -1.0, 1.0) * 32767.0).astype(np.int16).tobytes()
+
+class PCM16Encoder:
+    encoding = PCM16
+
+    def __init__(self, source_rate, sample_rate):
+        self.sample_rate = sample_rate
+        self.resampler = Resampler(source_rate, sample_rate) if sample_rate != source_rate else None
+
+    def encode(self, pcm):
+        if self.resampler is None:
+            return pcm
+        return to_pcm16(self.resampler.process(to_float(pcm)))
+
+    def flush(self):
+        return b""
+
+class OpusEncoder:
+    """20 ms Opus frames, each prefixed with its length (uint16, big-endian)."""
+
+    encoding = OPUS
+
+    def __init__(self, source_rate, sample_rate, bitrate=OPUS_BITRATE):
+        import opuslib
+
+        self.sample_rate = sample_rate
+        self.frame_samples = sample_rate * OPUS_FRAME_MS // 1000
+        self.resampler = Resampler(source_rate, sample_rate) if sample_rate != source_rate else None
+        self.opus = opuslib.Encoder(sample_rate, 1, opuslib.APPLICATION_VOIP)
+        self.opus.bitrate = bitrate
+        self.pending = np.zeros(0, dtype=np.int16)
+
+    def encode(self, pcm):
+        samples = to_float(pcm)
+        if self.resampler is not None:
+            samples = self.resampler.process(samples)
+        self.pending = np.concatenate([self.pending, np.frombuffer(to_pcm16(samples), dtype=np.int16)])
+        frames = len(self.pending) // self.frame_samples
+        packed = self._pack(self.pending[:frames * self.frame_samples])
+        self.pending = self.pending[frames * self.frame_samples:]
+        return packed
+
+    def flush(self):
+        """The last partial frame, padded with silence."""
+        if not len(self.pending):
+            return b""
+        padding = np.zeros(self.frame_samples - len(self.pending), dtype=np.int16)
+        packed = self._pack(np.concatenate([self.pending, padding]))
+        self.pending = np.zeros(0, dtype=np.int16)
+        return packed
+
+    def _pack(self, samples):
+        out = bytearray()
+        for frame in samples.reshape(-1, self.frame_samples):
+            data = self.opus.encode(frame.tobytes(), self.frame_samples)
+            out += len(data).to_bytes(2, "big") + data
+        return bytes(out)
+
+_opus_error = None  # why Opus can't be encoded here, once known
+
+def audio_encoder(encoding, source_rate, sample_rate=0):
+    """Encoder for a requested format, PCM16 when Opus isn't available here."""
+    global _opus_error
+    sample_rate = sample_rate or source_rate
+    if encoding == OPUS and _opus_error is None:
+        try:
+            rate = next((rate for rate in OPUS_RATES if rate >= sample_rate), OPUS_RATES[-1])
+            return OpusEncoder(source_rate, rate)
+        except Exception as e:  # opuslib / libopus missing
+            _opus_error = e
+            logger.warning(f"[TTS] Opus unavailable, sending PCM16: {e}")
+    return PCM16Encoder(source_rate, sample_rate)
@@ -0,0 +1,168 @@
+import hashlib
+import mmap
+import os
+import threading
+from collections import OrderedDict
+from pathlib import Path
+
+# Phrase-level audio cache of the TTS server (models/tts/server.py) and precompute_cache.py.
+# One raw PCM16 file per phrase, named by the hash of (text, voice, speed, sample rate).
+# The directory is the index, so the precompute script and any number of servers can share it.
+
+# Read here rather than in server.py, so precompute_cache.py can use them without
+# importing the server. Fill the cache ahead of time with precompute_cache.py,
+# an empty TTS_CACHE_DIR disables it
+CACHE_DIR = os.environ.get("TTS_CACHE_DIR", "pcm_cache")
+CACHE_MAX_MB = int(os.environ.get("TTS_CACHE_MAX_MB", 2048))
+CHUNK_MS = 200  # cache hits are streamed in chunks of this much audio
+
+def cache_key(text, voice, speed, sample_rate):
+    """SHA-256 of the phrase and everything else that changes its audio."""
+    normalized = " ".join(text.split())
+    raw = f"{voice}\x1f{float(speed)!r}\x1f{int(sample_rate)}\x1f{normalized}"
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+def chunk_bytes(sample_rate, chunk_ms=CHUNK_MS):
+    """Bytes of PCM16 mono audio in one streamed chunk."""
+    return max(2, int(sample_rate * chunk_ms / 1000) * 2)
+
+class PCMCache:
+    """
+    LRU cache of synthesized phrases on disk, bounded by total bytes.
+
+    - get() memory-maps the file and returns a memoryview: chunks are slices of the mapping,
+      served straight from the page cache without reading the file into the heap
+    - put() writes a temp file and renames it, readers never see partial audio
+    - File mtimes record the last use, so the LRU order survives restarts
+    - The `max_open_maps` most recently used mappings stay open, evicted ones are closed as
+      soon as no stream holds a view of them
+    - Files added by another process are picked up on the first lookup that misses
+    """
+
+    def __init__(self, directory, max_bytes, max_open_maps=256):
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_bytes
+        self.max_open_maps = max_open_maps
+        self._files = OrderedDict()  # key -> size, least recently used first
+        self._maps = OrderedDict()  # key -> mmap
+        self._retired = []  # mappings dropped while a stream still had a view of them
+        self._lock = threading.Lock()
+        self.total_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self._scan()
+
+    def path(self, key):
+        return self.directory / f"{key}.pcm"
+
+    def get(self, key):
+        """memoryview of the cached PCM16 audio, None on a miss."""
+        with self._lock:
+            mapping = self._maps.get(key)
+            if mapping is None:
+                mapping = self._open(key)
+                if mapping is None:
+                    self.misses += 1
+                    return None
+            self._maps.move_to_end(key)
+            self._files.move_to_end(key)
+            self.hits += 1
+        self._touch(key)
+        return memoryview(mapping)
+
+    def put(self, key, pcm):
+        """Store the audio of a phrase; empty audio or audio bigger than the cache is skipped."""
+        size = len(pcm)
+        if not size or size > self.max_bytes:
+            return
+        path = self.path(key)
+        tmp = path.with_name(f"{key}.{os.getpid()}.{threading.get_ident()}.tmp")
+        with open(tmp, "wb") as f:
+            f.write(pcm)
+        os.replace(tmp, path)
+        with self._lock:
+            self._add(key, size)
+            self._evict()
+
+    def __contains__(self, key):
+        with self._lock:
+            return key in self._files or self.path(key).exists()
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._files),
+            "bytes": self.total_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+        }
+
+    def _scan(self):
+        entries = []
+        for path in self.directory.glob("*.pcm"):
+            stat = path.stat()
+            entries.append((stat.st_mtime, path.stem, stat.st_size))
+        for _, key, size in sorted(entries):
+            self._add(key, size)
+        self._evict()
+
+    def _open(self, key):
+        try:
+            with open(self.path(key), "rb") as f:
+                size = os.fstat(f.fileno()).st_size
+                if not size:
+                    return None
+                mapping = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except FileNotFoundError:
+            self._forget(key)
+            return None
+        if key not in self._files:
+            # Written by another process since the scan
+            self._add(key, size)
+            self._evict()
+        self._maps[key] = mapping
+        while len(self._maps) > self.max_open_maps:
+            self._close(self._maps.popitem(last=False)[1])
+        return mapping
+
+    def _close(self, mapping=None):
+        """Unmap now, or once the streams reading it have dropped their views (retried here)."""
+        if mapping is not None:
+            self._retired.append(mapping)
+        still_open = []
+        for retired in self._retired:
+            try:
+                retired.close()
+            except BufferError:
+                still_open.append(retired)
+        self._retired = still_open
+
+    def _touch(self, key):
+        try:
+            os.utime(self.path(key))
+        except FileNotFoundError:
+            pass
+
+    def _add(self, key, size):
+        self.total_bytes += size - self._files.get(key, 0)
+        self._files[key] = size
+        self._files.move_to_end(key)
+
+    def _forget(self, key):
+        self.total_bytes -= self._files.pop(key, 0)
+        mapping = self._maps.pop(key, None)
+        if mapping is not None:
+            self._close(mapping)
+
+    def _evict(self):
+        self._close()
+        while self.total_bytes > self.max_bytes and self._files:
+            key = next(iter(self._files))
+            self._forget(key)
+            try:
+                # Mappings still being streamed stay readable after the unlink
+                self.path(key).unlink()
+            except FileNotFoundError:
+                pass
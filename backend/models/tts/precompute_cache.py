@@ -0,0 +1,71 @@
+"""
+Render the answer of every service (TTT's processed_data/services.json) into the
+TTS phrase cache ahead of time, so the server answers them without running Kokoro.
+
+    python precompute_cache.py --services ../ttt/processed_data/services.json --cache-dir pcm_cache --max-mb 2048
+
+The TTS image doesn't ship the TTT corpus: in a container, mount services.json and pass
+its path.
+
+Phrases are split exactly like StreamTTS splits them, and phrases shared by several
+services (document lists, "Applicant logs into Seva Sindhu portal.") are rendered once.
+Already cached phrases are skipped, so an interrupted run can simply be restarted.
+Use the same voice / speed as the server, they are part of the cache key.
+"""
+import argparse
+import json
+import time
+
+from loguru import logger
+
+from kokoro_tts import KokoroTTS
+from pcm_cache import CACHE_DIR, CACHE_MAX_MB, PCMCache, cache_key
+from sentences import split_sentences
+
+def service_phrases(services_path):
+    """Unique phrases of all service texts, in corpus order."""
+    with open(services_path, encoding="utf-8") as f:
+        services = json.load(f)
+    phrases = {}
+    for service in services:
+        # StreamTTS feeds each text chunk followed by a space
+        for phrase in split_sentences(service["text"] + " "):
+            phrases[phrase] = None
+    return len(services), list(phrases)
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--services", required=True, help="path to TTT's services.json")
+    parser.add_argument("--cache-dir", default=CACHE_DIR or "pcm_cache")
+    parser.add_argument("--max-mb", type=int, default=CACHE_MAX_MB)
+    parser.add_argument("--voice", default="hf_alpha")
+    parser.add_argument("--speed", type=float, default=1.0)
+    args = parser.parse_args()
+
+    service_count, phrases = service_phrases(args.services)
+    cache = PCMCache(args.cache_dir, args.max_mb * 1024 * 1024)
+    tts = KokoroTTS(voice=args.voice, speed=args.speed)
+    logger.info(f"[TTS] {service_count} services -> {len(phrases)} unique phrases")
+
+    rendered = skipped = 0
+    start = time.perf_counter()
+    for i, phrase in enumerate(phrases, 1):
+        key = cache_key(phrase, tts.voice, tts.speed, tts.sr)
+        if key in cache:
+            skipped += 1
+            continue
+        cache.put(key, b"".join(tts.stream_pcm16(phrase)))
+        rendered += 1
+        if i % 100 == 0:
+            logger.info(f"[TTS] {i}/{len(phrases)} phrases | {cache.total_bytes / 1e6:.1f} MB")
+
+    elapsed = time.perf_counter() - start
+    logger.success(
+        f"[TTS] Rendered {rendered} phrases, {skipped} already cached, in {elapsed:.1f}s | "
+        f"cache={cache.stats()['entries']} files, {cache.total_bytes / 1e6:.1f} MB"
+    )
+    if cache.total_bytes >= cache.max_bytes * 0.95:
+        logger.warning("[TTS] Cache is full, raise --max-mb / TTS_CACHE_MAX_MB to keep every phrase")
+
+if __name__ == "__main__":
+    main()
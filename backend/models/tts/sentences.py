@@ -0,0 +1,57 @@
+import re
+
+# Phrase splitting of the TTS server (models/tts/server.py), also its cache unit (pcm_cache.py)
+# A sentence ends at . ! ? (plus closing quotes / brackets) followed by whitespace, or at a
+# line break: the service texts are lists ("Eligibility: ...", "1. Death Certificate")
+SENTENCE_END = re.compile(r"[.!?]+[\"')\]]*(?=\s)|\n")
+LIST_MARKER = re.compile(r"(?:^|\n)\s*\d{1,3}[.)]$")
+CLAUSE_END = re.compile(r"[,;:]\s")
+ABBREVIATIONS = {"dr", "mr", "mrs", "ms", "st", "no", "vs", "etc", "e.g", "i.e", "approx"}
+MAX_SENTENCE_CHARS = 250  # longer run-ons are cut at a clause boundary so audio isn't held back
+
+class SentenceBuffer:
+    """Accumulates streamed text and hands out each sentence as soon as it is complete."""
+
+    def __init__(self, max_chars=MAX_SENTENCE_CHARS):
+        self.max_chars = max_chars
+        self.buffer = ""
+
+    def feed(self, text):
+        """Add text, return the sentences it completed."""
+        self.buffer += text
+        sentences = []
+        start = 0
+        for match in SENTENCE_END.finditer(self.buffer):
+            sentence = self.buffer[start:match.end()].strip()
+            words = sentence.split()
+            if not words or words[-1].rstrip(".!?\"')]").lower() in ABBREVIATIONS:
+                continue
+            if LIST_MARKER.search(sentence):
+                # "2." opening a list item, not the end of one
+                continue
+            sentences.append(sentence)
+            start = match.end()
+        self.buffer = self.buffer[start:]
+
+        while len(self.buffer) > self.max_chars:
+            cut = self._cut(self.buffer[:self.max_chars])
+            sentences.append(self.buffer[:cut].strip())
+            self.buffer = self.buffer[cut:]
+        return [sentence for sentence in sentences if sentence]
+
+    def _cut(self, text):
+        clauses = list(CLAUSE_END.finditer(text))
+        if clauses:
+            return clauses[-1].end()
+        space = text.rfind(" ")
+        return space + 1 if space > 0 else len(text)
+
+    def flush(self):
+        """Whatever is left once the text is over."""
+        rest = self.buffer.strip()
+        self.buffer = ""
+        return [rest] if rest else []
+
+def split_sentences(text):
+    buffer = SentenceBuffer()
+    return buffer.feed(text) + buffer.flush()
@@ -1,52 +1,112 @@
 import grpc
+import os
 from concurrent import futures
 from loguru import logger
 
 from tts_pb2 import TTSResponse  # type: ignore
 import tts_pb2_grpc as tts_pb2_grpc
 from kokoro_tts import KokoroTTS
+from sentences import SentenceBuffer
+from pcm_cache import CACHE_DIR, CACHE_MAX_MB, PCMCache, cache_key, chunk_bytes
+from workers import SynthesisPool
+from encoding import audio_encoder
+
+# Synthesis: 0 runs one KokoroTTS inside the server process, N > 0 runs N worker processes
+# (workers.py) with WORKER_THREADS torch threads each, roughly one worker per
+# WORKER_THREADS cores
+WORKERS = int(os.environ.get("TTS_WORKERS", 0))
+WORKER_THREADS = int(os.environ.get("TTS_WORKER_THREADS", max(1, (os.cpu_count() or 1) // max(WORKERS, 1))))
+# Concurrent streams; a stream holds its RPC thread while waiting for text / audio
+MAX_STREAMS = int(os.environ.get("TTS_MAX_STREAMS", max(4, 4 * WORKERS)))
 
 class TextToSpeechService(tts_pb2_grpc.TextToSpeechServicer):
     def __init__(self):
-        self.tts = KokoroTTS()
+        if WORKERS > 0:
+            self.tts = SynthesisPool(WORKERS, threads=WORKER_THREADS)
+        else:
+            self.tts = KokoroTTS()
+        self.cache = PCMCache(CACHE_DIR, CACHE_MAX_MB * 1024 * 1024) if CACHE_DIR else None
+        self.chunk_bytes = chunk_bytes(self.tts.sr)
         logger.info("[TTS] Kokoro TTS initialized")
 
     def StreamTTS(self, request_iterator, context):
         """
         Bidirectional streaming:
-        - Client streams text
-        - Server streams PCM16 audio chunks
+        - Client streams text (parts are joined with spaces), the first message picks the
+          output format (encoding.py)
+        - Each phrase is synthesized as soon as it is complete, so the first audio
+          only waits for the first phrase
+        - Server streams audio chunks in that format
         """
-        text_parts = []
+        sentences = SentenceBuffer()
+        encoder = None
+        spoken = False
         for req in request_iterator:
+            if encoder is None:
+                encoder = audio_encoder(req.encoding, self.tts.sr, req.sample_rate)
             if req.text:
                 logger.debug(f"[TTS] Received text chunk: {req.text}")
-                text_parts.append(req.text)
+                for sentence in sentences.feed(req.text + " "):
+                    yield from self._encode(encoder, self._synthesize(sentence))
+                    spoken = True
             if req.end_of_stream:
                 break
 
-        text = " ".join(text_parts).strip()
-        if not text:
+        for sentence in sentences.flush():
+            yield from self._encode(encoder, self._synthesize(sentence))
+            spoken = True
+        if not spoken:
             logger.warning("[TTS] Empty text received")
             return
-        logger.info(f"[TTS] Synthesizing: {text}")
-
-        for pcm_chunk in self.tts.stream_pcm16(text):
-            yield TTSResponse(
-                audio=pcm_chunk,
-                sample_rate=self.tts.sr,
-                is_final=False,
-            )
 
+        yield from self._encode(encoder, [], flush=True)
         yield TTSResponse(
             audio=b"",
-            sample_rate=self.tts.sr,
+            sample_rate=encoder.sample_rate,
             is_final=True,
+            encoding=encoder.encoding,
         )
 
+    def _encode(self, encoder, pcm_chunks, flush=False):
+        for pcm_chunk in pcm_chunks:
+            audio = encoder.encode(pcm_chunk)
+            if audio:
+                yield TTSResponse(audio=audio, sample_rate=encoder.sample_rate, is_final=False, encoding=encoder.encoding)
+        if flush:
+            audio = encoder.flush()
+            if audio:
+                yield TTSResponse(audio=audio, sample_rate=encoder.sample_rate, is_final=False, encoding=encoder.encoding)
+
+    def _synthesize(self, sentence):
+        """PCM16 chunks of a phrase at the model's rate, from the cache when possible."""
+        if self.cache is None:
+            yield from self._render(sentence)
+            return
+        key = cache_key(sentence, self.tts.voice, self.tts.speed, self.tts.sr)
+        pcm = self.cache.get(key)
+        if pcm is not None:
+            logger.info(f"[TTS] Cached: {sentence}")
+            # Slices of the mapping, copied once each (protobuf bytes fields want bytes). The
+            # view is released when the stream ends, so an evicted mapping can be closed
+            with pcm:
+                for start in range(0, len(pcm), self.chunk_bytes):
+                    yield pcm[start:start + self.chunk_bytes].tobytes()
+            return
+
+        chunks = []
+        for pcm_chunk in self._render(sentence):
+            chunks.append(pcm_chunk)
+            yield pcm_chunk
+        # Only reached when the whole phrase was synthesized (a cancelled stream closes the generator)
+        self.cache.put(key, b"".join(chunks))
+
+    def _render(self, sentence):
+        logger.info(f"[TTS] Synthesizing: {sentence}")
+        yield from self.tts.stream_pcm16(sentence)
+
 
 def serve():
-    server = grpc.server(futures.ThreadPoolExecutor(max_workers=4))
+    server = grpc.server(futures.ThreadPoolExecutor(max_workers=MAX_STREAMS))
     tts_pb2_grpc.add_TextToSpeechServicer_to_server(TextToSpeechService(), server)
     server.add_insecure_port("[::]:50052")
     server.start()
@@ -24,17 +24,19 @@ _sym_db = _symbol_database.Default()
 
 
 
-DESCRIPTOR = _descriptor_pool.Default().AddSerializedFile(b'\n\ttts.proto\x12\x03tts\"1\n\nTTSRequest\x12\x0c\n\x04text\x18\x01 \x01(\t\x12\x15\n\rend_of_stream\x18\x02 \x01(\x08\"C\n\x0bTTSResponse\x12\r\n\x05\x61udio\x18\x01 \x01(\x0c\x12\x13\n\x0bsample_rate\x18\x02 \x01(\x05\x12\x10\n\x08is_final\x18\x03 \x01(\x08\x32\x42\n\x0cTextToSpeech\x12\x32\n\tStreamTTS\x12\x0f.tts.TTSRequest\x1a\x10.tts.TTSResponse(\x01\x30\x01\x62\x06proto3')
+DESCRIPTOR = _descriptor_pool.Default().AddSerializedFile(b'\n\ttts.proto\x12\x03tts\"l\n\nTTSRequest\x12\x0c\n\x04text\x18\x01 \x01(\t\x12\x15\n\rend_of_stream\x18\x02 \x01(\x08\x12$\n\x08\x65ncoding\x18\x03 \x01(\x0e\x32\x12.tts.AudioEncoding\x12\x13\n\x0bsample_rate\x18\x04 \x01(\x05\"i\n\x0bTTSResponse\x12\r\n\x05\x61udio\x18\x01 \x01(\x0c\x12\x13\n\x0bsample_rate\x18\x02 \x01(\x05\x12\x10\n\x08is_final\x18\x03 \x01(\x08\x12$\n\x08\x65ncoding\x18\x04 \x01(\x0e\x32\x12.tts.AudioEncoding*$\n\rAudioEncoding\x12\t\n\x05PCM16\x10\x00\x12\x08\n\x04OPUS\x10\x01\x32\x42\n\x0cTextToSpeech\x12\x32\n\tStreamTTS\x12\x0f.tts.TTSRequest\x1a\x10.tts.TTSResponse(\x01\x30\x01\x62\x06proto3')
 
 _globals = globals()
 _builder.BuildMessageAndEnumDescriptors(DESCRIPTOR, _globals)
 _builder.BuildTopDescriptorsAndMessages(DESCRIPTOR, 'tts_pb2', _globals)
 if not _descriptor._USE_C_DESCRIPTORS:
   DESCRIPTOR._loaded_options = None
+  _globals['_AUDIOENCODING']._serialized_start=235
+  _globals['_AUDIOENCODING']._serialized_end=271
   _globals['_TTSREQUEST']._serialized_start=18
-  _globals['_TTSREQUEST']._serialized_end=67
-  _globals['_TTSRESPONSE']._serialized_start=69
-  _globals['_TTSRESPONSE']._serialized_end=136
-  _globals['_TEXTTOSPEECH']._serialized_start=138
-  _globals['_TEXTTOSPEECH']._serialized_end=204
+  _globals['_TTSREQUEST']._serialized_end=126
+  _globals['_TTSRESPONSE']._serialized_start=128
+  _globals['_TTSRESPONSE']._serialized_end=233
+  _globals['_TEXTTOSPEECH']._serialized_start=273
+  _globals['_TEXTTOSPEECH']._serialized_end=339
 # @@protoc_insertion_point(module_scope)
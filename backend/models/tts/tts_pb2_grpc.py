@@ -38,7 +38,7 @@ class TextToSpeechStub(object):
         self.StreamTTS = channel.stream_stream(
                 '/tts.TextToSpeech/StreamTTS',
                 request_serializer=tts__pb2.TTSRequest.SerializeToString,
-                response_deserializer=tts__pb2.TTSResponse.FromString, 
+                response_deserializer=tts__pb2.TTSResponse.FromString,
                 _registered_method=True)
 
 
@@ -0,0 +1,163 @@
+import itertools
+import multiprocessing as mp
+import os
+import queue
+import threading
+from multiprocessing.connection import wait
+
+from loguru import logger
+
+# Process-pool serving for the TTS server (models/tts/server.py, TTS_WORKERS > 0).
+# Each worker process owns a KokoroTTS with a fixed number of torch threads, so concurrent
+# streams synthesize in parallel instead of taking turns on one pipeline under the GIL.
+# Every worker has its own duplex pipe: phrases go down it to the least busy worker, PCM
+# chunks come back up and a dispatcher thread hands them to the waiting stream.
+
+def _worker(threads, tts_options, conn):
+    # Before torch is imported, so OpenMP / MKL size their pools accordingly
+    for var in ("OMP_NUM_THREADS", "MKL_NUM_THREADS", "OPENBLAS_NUM_THREADS"):
+        os.environ[var] = str(threads)
+    import torch
+    torch.set_num_threads(threads)
+    torch.set_num_interop_threads(1)
+    from kokoro_tts import KokoroTTS
+
+    tts = KokoroTTS(**tts_options)
+    conn.send(("ready", None, None))
+    while True:
+        task = conn.recv()
+        if task is None:
+            break
+        job_id, text = task
+        try:
+            for pcm_chunk in tts.stream_pcm16(text):
+                conn.send(("audio", job_id, pcm_chunk))
+            conn.send(("done", job_id, None))
+        except Exception as e:
+            conn.send(("error", job_id, repr(e)))
+
+class WorkerError(RuntimeError):
+    pass
+
+class Worker:
+    def __init__(self, process, conn):
+        self.process = process
+        self.conn = conn
+        self.jobs = set()  # job ids sent to it that it hasn't reported done / failed yet
+        self.send_lock = threading.Lock()
+
+class SynthesisPool:
+    """
+    N KokoroTTS worker processes behind the KokoroTTS streaming interface: stream_pcm16(text)
+    yields the PCM16 chunks of the worker that took the phrase, voice / speed / sr match.
+    A worker that dies is restarted; the phrases it held fail with WorkerError.
+    """
+
+    def __init__(self, workers, threads=1, voice="hf_alpha", speed=1.0, sampling_rate=24000):
+        self.voice = voice
+        self.speed = speed
+        self.sr = sampling_rate
+        self.threads = threads
+        self._options = {"voice": voice, "speed": speed, "sampling_rate": sampling_rate}
+        # spawn: forked OpenMP thread pools deadlock torch
+        self._ctx = mp.get_context("spawn")
+        self._job_ids = itertools.count()
+        self._jobs = {}  # job_id -> queue.Queue of (kind, payload)
+        self._lock = threading.Lock()
+        self._ready = threading.Semaphore(0)
+        self._closed = False
+        self._workers = [self._spawn() for _ in range(workers)]
+
+        threading.Thread(target=self._dispatch, name="tts-dispatcher", daemon=True).start()
+        # Workers load their pipelines in parallel
+        for _ in range(workers):
+            self._ready.acquire()
+        logger.info(f"[TTS] {workers} synthesis workers ready | torch threads per worker={threads}")
+
+    def stream_pcm16(self, text):
+        job_id = next(self._job_ids)
+        job = queue.Queue()
+        with self._lock:
+            worker = min(self._workers, key=lambda w: len(w.jobs))
+            worker.jobs.add(job_id)
+            self._jobs[job_id] = job
+        try:
+            try:
+                with worker.send_lock:
+                    worker.conn.send((job_id, text))
+            except OSError as e:
+                with self._lock:
+                    worker.jobs.discard(job_id)
+                raise WorkerError(f"Worker {worker.process.pid} is gone: {e}")
+            while True:
+                kind, payload = job.get()
+                if kind == "audio":
+                    yield payload
+                elif kind == "done":
+                    return
+                else:
+                    raise WorkerError(f"Synthesis failed: {payload}")
+        finally:
+            # An abandoned phrase stays in worker.jobs while the worker is still synthesizing
+            # it, the dispatcher drops it when the worker reports it done
+            with self._lock:
+                self._jobs.pop(job_id, None)
+
+    def close(self):
+        self._closed = True
+        for worker in self._workers:
+            try:
+                with worker.send_lock:
+                    worker.conn.send(None)
+            except OSError:
+                pass
+        for worker in self._workers:
+            worker.process.join(timeout=5)
+            if worker.process.is_alive():
+                worker.process.terminate()
+
+    def _spawn(self):
+        conn, child_conn = self._ctx.Pipe()
+        process = self._ctx.Process(
+            target=_worker,
+            args=(self.threads, self._options, child_conn),
+            daemon=True,
+        )
+        process.start()
+        child_conn.close()
+        return Worker(process, conn)
+
+    def _dispatch(self):
+        while not self._closed:
+            with self._lock:
+                by_conn = {worker.conn: worker for worker in self._workers}
+            for conn in wait(list(by_conn), timeout=1.0):
+                worker = by_conn[conn]
+                try:
+                    kind, job_id, payload = conn.recv()
+                except (EOFError, OSError):
+                    if not self._closed:
+                        self._restart(worker)
+                    continue
+                if kind == "ready":
+                    self._ready.release()
+                    continue
+                with self._lock:
+                    if kind != "audio":
+                        worker.jobs.discard(job_id)
+                    job = self._jobs.get(job_id)
+                if job is not None:  # else the stream is gone, its leftover audio is dropped
+                    job.put((kind, payload))
+
+    def _restart(self, worker):
+        """Replace a dead worker, failing the phrases it held."""
+        worker.process.join(timeout=1)
+        logger.error(f"[TTS] Worker {worker.process.pid} died (exit code {worker.process.exitcode}), restarting")
+        worker.conn.close()
+        replacement = self._spawn()
+        with self._lock:
+            self._workers[self._workers.index(worker)] = replacement
+            for job_id in worker.jobs:
+                job = self._jobs.get(job_id)
+                if job is not None:
+                    job.put(("error", f"worker {worker.process.pid} died"))
@@ -0,0 +1,105 @@
+import threading
+import time
+from collections import OrderedDict
+
+from normalize import tokenize
+
+# Shared by the TTT server (models/ttt/server.py) and assistant/ttt_client.py, so this
+# module only depends on the standard library and normalize.py.
+
+def answer_key(question: str, top_k: int):
+    """
+    Cache key of a query: its clean_words terms (synonyms mapped, plurals stripped) and
+    top_k, so "Vidhava vethana?" and "widow pensions" share an answer. tokenize only keeps
+    ASCII letters, so a query with digits or other scripts ("form 16", Kannada words)
+    keys on its whitespace-normalized text, "form 16" and "form 26" must not collide.
+    """
+    question = question.lower()
+    words = tokenize(question)
+    if words and not any(c.isalnum() and not "a" <= c <= "z" for c in question):
+        text = " ".join(words)
+    else:
+        text = "raw:" + " ".join(question.split())
+    return f"{top_k}|{text}"
+
+class AnswerCache:
+    """
+    LRU cache of retrieval answers for one version of the index artifact (index_store.py).
+
+    - Bounded by `max_entries`, an entry older than `ttl` seconds counts as a miss
+    - set_version() drops every answer when the artifact changes (to a newer one, when
+      given its build time), put() ignores answers computed against another version
+    - Values are shared between callers and must not be modified
+    """
+
+    def __init__(self, max_entries=1024, ttl=3600):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.version = None
+        self.built_at = None
+        self._entries = OrderedDict()  # key -> (value, stored at)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.expired = 0
+        self.invalidations = 0
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and time.monotonic() - entry[1] >= self.ttl:
+                del self._entries[key]
+                self.expired += 1
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def put(self, key, value, version=None):
+        with self._lock:
+            if version != self.version:
+                return
+            self._entries[key] = (value, time.monotonic())
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def set_version(self, version, built_at=None):
+        """
+        Index artifact being answered from, a new one invalidates the cache. With `built_at`
+        (clients of several replicas) only a newer build does: during a rollout the replicas
+        still on the old one would otherwise flush the cache on every other answer.
+        """
+        with self._lock:
+            if version == self.version:
+                return
+            if (
+                built_at is not None
+                and self.built_at is not None
+                and (built_at, version) < (self.built_at, self.version)
+            ):
+                return
+            if self.version is not None:
+                self.invalidations += 1
+            self.version = version
+            self.built_at = built_at
+            self._entries.clear()
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "expired": self.expired,
+            "invalidations": self.invalidations,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "version": self.version,
+        }
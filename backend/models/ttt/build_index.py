@@ -0,0 +1,32 @@
+"""
+Build the TTT retrieval artifact offline (see index_store.py), so server replicas only
+memory-map it at startup instead of parsing services.json and building indexes.
+
+    python build_index.py --index-type auto
+
+Run it after services.json changes or with another TTT_EMBEDDING_MODEL (the Dockerfile runs
+it at image build time); the server refuses to start on a stale artifact unless
+TTT_BUILD_INDEX_ON_START=1.
+The new version becomes live atomically, running servers keep the version they mapped.
+"""
+import argparse
+
+from embeddings import QueryEncoder
+from index_store import EMBEDDINGS_FILE, INDEX_DIR, SERVICES_FILE, build_index
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--services", default=SERVICES_FILE)
+    parser.add_argument("--index-dir", default=INDEX_DIR)
+    parser.add_argument("--index-type", default="auto", choices=["auto", "flat", "ivf", "hnsw"])
+    parser.add_argument(
+        "--embeddings", default=EMBEDDINGS_FILE,
+        help="reused when made by the same model (embeddings.json), never rewritten; '' to always encode",
+    )
+    args = parser.parse_args()
+
+    encoder = QueryEncoder()
+    build_index(args.index_dir, args.services, encoder, args.embeddings or None, args.index_type)
+
+if __name__ == "__main__":
+    main()
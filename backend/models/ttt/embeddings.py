@@ -0,0 +1,138 @@
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+
+import numpy as np
+from loguru import logger
+
+from batching import MicroBatcher
+
+# Sentence encoder of the FAISS fallback in retrieve.py. The service embeddings record the
+# model that produced them (embeddings.json next to embeddings.npy) and are only reused by
+# the same model, so queries and services are always embedded by the same model. Files given
+# as input are never rewritten, re-encoded vectors go into the build output (index_store.py).
+# The Dockerfile downloads the model into the image, so startup never reaches Hugging Face.
+EMBEDDING_MODEL = os.environ.get("TTT_EMBEDDING_MODEL", "sentence-transformers/all-MiniLM-L6-v2")
+# Query embeddings remembered, keyed by the normalized query
+EMBEDDING_CACHE_SIZE = int(os.environ.get("TTT_EMBEDDING_CACHE_SIZE", 4096))
+# Concurrent queries from the RPC threads are encoded together
+EMBEDDING_MAX_BATCH = int(os.environ.get("TTT_EMBEDDING_MAX_BATCH", 16))
+EMBEDDING_MAX_WAIT_MS = float(os.environ.get("TTT_EMBEDDING_MAX_WAIT_MS", 2))
+
+def normalize_query(text: str):
+    return " ".join(text.lower().split())
+
+class QueryEncoder:
+    """
+    One SentenceTransformer loaded per process, L2-normalized float32 vectors
+    (inner product = cosine similarity).
+
+    - encode(query): LRU cache first, misses go through a MicroBatcher so concurrent
+      queries share one forward pass (duplicates within a batch are encoded once)
+    - encode_texts(texts): uncached bulk encoding, for the service corpus
+    """
+
+    def __init__(self, model_name=EMBEDDING_MODEL, cache_size=EMBEDDING_CACHE_SIZE,
+                 max_batch_size=EMBEDDING_MAX_BATCH, max_wait_ms=EMBEDDING_MAX_WAIT_MS):
+        from sentence_transformers import SentenceTransformer
+
+        start = time.perf_counter()
+        self.model_name = model_name
+        self.model = SentenceTransformer(model_name, device="cpu")
+        self.dim = self.model.get_sentence_embedding_dimension()
+        self.cache_size = cache_size
+        self._cache = OrderedDict()  # normalized query -> vector
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.batcher = MicroBatcher(self._encode_batch, max_batch_size=max_batch_size, max_wait_ms=max_wait_ms)
+        logger.success(f"[EMBED] Loaded {model_name}, dim={self.dim}, in {time.perf_counter() - start:.1f}s")
+
+    def encode(self, query: str):
+        key = normalize_query(query)
+        with self._lock:
+            vector = self._cache.get(key)
+            if vector is not None:
+                self._cache.move_to_end(key)
+                self.hits += 1
+                return vector
+            self.misses += 1
+
+        vector = self.batcher.submit(key)
+        with self._lock:
+            self._cache[key] = vector
+            self._cache.move_to_end(key)
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+        return vector
+
+    def encode_texts(self, texts, batch_size=32):
+        vectors = self.model.encode(
+            list(texts),
+            batch_size=batch_size,
+            normalize_embeddings=True,
+            convert_to_numpy=True,
+            show_progress_bar=False,
+        )
+        return np.ascontiguousarray(vectors, dtype=np.float32)
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._cache),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+        }
+
+    def _encode_batch(self, queries):
+        unique = list(dict.fromkeys(queries))
+        vectors = self.encode_texts(unique, batch_size=len(unique))
+        # Shared through the cache, nobody may modify them
+        vectors.flags.writeable = False
+        by_query = dict(zip(unique, vectors))
+        return [by_query[query] for query in queries]
+
+def service_texts(services):
+    return [service["text"] for service in services]
+
+def texts_sha256(texts):
+    digest = hashlib.sha256()
+    for text in texts:
+        digest.update(text.encode("utf-8") + b"\0")
+    return digest.hexdigest()
+
+def load_service_embeddings(path, services, encoder):
+    """
+    Embeddings of the services from `path`, None when they were made by another model than
+    `encoder`'s or from other service texts. Read only, see save_service_embeddings.
+    """
+    path = Path(path)
+    info_path = path.with_suffix(".json")
+    info = json.loads(info_path.read_text(encoding="utf-8")) if info_path.exists() else {}
+    if path.exists() and info.get("model") == encoder.model_name and info.get("texts_sha256") == texts_sha256(service_texts(services)):
+        embeddings = np.load(path)
+        if embeddings.shape == (len(services), encoder.dim):
+            return np.ascontiguousarray(embeddings, dtype=np.float32)
+
+    logger.warning(
+        f"[EMBED] {path} was not made by {encoder.model_name} for these {len(services)} services "
+        f"(recorded model: {info.get('model')}), not reusing it"
+    )
+    return None
+
+def save_service_embeddings(path, services, encoder, embeddings):
+    """Write embeddings.npy and its embeddings.json for load_service_embeddings."""
+    path = Path(path)
+    np.save(path, embeddings)
+    path.with_suffix(".json").write_text(json.dumps({
+        "model": encoder.model_name,
+        "count": len(services),
+        "dim": encoder.dim,
+        "normalized": True,
+        "texts_sha256": texts_sha256(service_texts(services)),
+    }, indent=2), encoding="utf-8")
@@ -0,0 +1,240 @@
+import hashlib
+import json
+import mmap
+import os
+import shutil
+import time
+from datetime import datetime
+from pathlib import Path
+
+import faiss
+import numpy as np
+from loguru import logger
+
+from embeddings import load_service_embeddings, save_service_embeddings
+from keyword_index import KeywordIndex
+from normalize import tokenize
+
+# Retrieval artifact of the TTT server: written offline by build_index.py (the Dockerfile runs
+# it at image build time) and memory-mapped by retrieve.py.
+#
+#   <index dir>/CURRENT                     name of the live version, replaced atomically
+#   <index dir>/<version>/manifest.json     model, dim, counts, FAISS index type, source hash
+#                        /services.faiss    FAISS index
+#                        /services.txt      service texts back to back, UTF-8
+#                        /services.offsets.npy  byte offset of each text, len = count + 1
+#                        /keyword/          BM25 postings, see keyword_index.py
+#                        /embeddings.npy    service vectors (+ embeddings.json), reusable by
+#                                           the next build with --embeddings
+#
+# Nothing is parsed or rebuilt at startup, and replicas on one host map the same files,
+# so the OS page cache holds a single copy of the corpus.
+
+SERVICES_FILE = "processed_data/services.json"
+EMBEDDINGS_FILE = "processed_data/embeddings.npy"
+INDEX_DIR = "processed_data/index"
+FORMAT = 1
+# Corpora up to FLAT_MAX services get an exact IndexFlatIP; above that an IVF index, whose
+# inverted lists are memory-mapped, or HNSW when asked for (faster, but loaded into RAM)
+FLAT_MAX = 20000
+IVF_NPROBE = 16  # lists visited per query
+HNSW_M = 32
+KEEP_VERSIONS = 2  # the live version and the one before it, older ones are deleted
+
+class IndexNotBuilt(RuntimeError):
+    pass
+
+def file_sha256(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+class ServiceStore:
+    """Read-only sequence of service texts, decoded from the mapped file when asked for."""
+
+    def __init__(self, directory):
+        directory = Path(directory)
+        self.offsets = np.load(directory / "services.offsets.npy", mmap_mode="r")
+        with open(directory / "services.txt", "rb") as f:
+            size = os.fstat(f.fileno()).st_size
+            self._data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) if size else b""
+
+    @staticmethod
+    def write(directory, texts):
+        encoded = [text.encode("utf-8") for text in texts]
+        offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+        np.cumsum([len(data) for data in encoded], out=offsets[1:])
+        with open(Path(directory) / "services.txt", "wb") as f:
+            f.writelines(encoded)
+        np.save(Path(directory) / "services.offsets.npy", offsets)
+
+    def text(self, idx):
+        return self._data[int(self.offsets[idx]):int(self.offsets[idx + 1])].decode("utf-8")
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+def make_faiss_index(embeddings, index_type="auto"):
+    """(index over the L2-normalized embeddings, resolved index type)"""
+    count, dim = embeddings.shape
+    if index_type == "auto":
+        index_type = "flat" if count <= FLAT_MAX else "ivf"
+    if index_type == "flat":
+        index = faiss.IndexFlatIP(dim)
+    elif index_type == "ivf":
+        nlist = max(1, min(int(4 * np.sqrt(count)), count // 39))  # >= 39 training points per list
+        index = faiss.IndexIVFFlat(faiss.IndexFlatIP(dim), dim, nlist, faiss.METRIC_INNER_PRODUCT)
+        index.train(embeddings)
+    elif index_type == "hnsw":
+        index = faiss.IndexHNSWFlat(dim, HNSW_M, faiss.METRIC_INNER_PRODUCT)
+    else:
+        raise ValueError(f"Unknown index type {index_type!r}, expected auto, flat, ivf or hnsw")
+    index.add(embeddings)
+    return index, index_type
+
+def read_faiss_index(path, index_type):
+    if index_type == "ivf":
+        # Inverted lists stay in the file (OnDiskInvertedLists over a mapping)
+        index = faiss.read_index(str(path), faiss.IO_FLAG_MMAP | faiss.IO_FLAG_READ_ONLY)
+        index.nprobe = IVF_NPROBE
+        return index
+    if index_type == "flat" and hasattr(faiss, "IO_FLAG_MMAP_IFC"):
+        # Newer FAISS maps the vectors of flat indexes too
+        return faiss.read_index(str(path), faiss.IO_FLAG_MMAP_IFC | faiss.IO_FLAG_READ_ONLY)
+    return faiss.read_index(str(path))
+
+class RetrievalIndex:
+    """One version of the artifact, opened read-only."""
+
+    def __init__(self, directory):
+        self.directory = Path(directory)
+        with open(self.directory / "manifest.json", encoding="utf-8") as f:
+            self.manifest = json.load(f)
+        self.version = self.manifest["version"]
+        self.built_at = int(datetime.strptime(self.manifest["built_at"], "%Y-%m-%dT%H:%M:%S%z").timestamp())
+        self.services = ServiceStore(self.directory)
+        self.faiss = read_faiss_index(self.directory / "services.faiss", self.manifest["index_type"])
+        self.keywords = KeywordIndex.load(self.directory / "keyword")
+
+def current_version(index_dir):
+    """Directory of the live version, None when nothing was built yet."""
+    try:
+        name = (Path(index_dir) / "CURRENT").read_text(encoding="utf-8").strip()
+    except FileNotFoundError:
+        return None
+    directory = Path(index_dir) / name
+    return directory if (directory / "manifest.json").exists() else None
+
+def stale_reason(directory, services_path, model_name):
+    """Why the artifact can't serve `services_path` with `model_name`, None when it can."""
+    if directory is None:
+        return "no index built yet"
+    with open(directory / "manifest.json", encoding="utf-8") as f:
+        manifest = json.load(f)
+    if manifest.get("format") != FORMAT:
+        return f"format {manifest.get('format')} != {FORMAT}"
+    if manifest.get("model") != model_name:
+        return f"built with {manifest.get('model')}, not {model_name}"
+    # Deployments may ship the artifact alone
+    if services_path and Path(services_path).exists() and manifest.get("source_sha256") != file_sha256(services_path):
+        return f"{services_path} changed"
+    return None
+
+def build_index(index_dir, services_path, encoder, embeddings_path=None, index_type="auto"):
+    """Build a new version of the artifact and make it the live one; returns its directory."""
+    start = time.perf_counter()
+    index_dir = Path(index_dir)
+    index_dir.mkdir(parents=True, exist_ok=True)
+    source_sha256 = file_sha256(services_path)
+    with open(services_path, encoding="utf-8") as f:
+        services = json.load(f)
+    texts = [service["text"] for service in services]
+
+    embeddings = load_service_embeddings(embeddings_path, services, encoder) if embeddings_path else None
+    if embeddings is None:
+        start_encoding = time.perf_counter()
+        embeddings = encoder.encode_texts(texts)
+        logger.success(f"[EMBED] Encoded {len(texts)} services in {time.perf_counter() - start_encoding:.1f}s")
+    index, index_type = make_faiss_index(embeddings, index_type)
+    keywords = KeywordIndex.build([tokenize(text) for text in texts])
+
+    version = hashlib.sha256(
+        f"{FORMAT}:{source_sha256}:{encoder.model_name}:{index_type}".encode()
+    ).hexdigest()[:16]
+    building = index_dir / f".build-{version}-{os.getpid()}"
+    shutil.rmtree(building, ignore_errors=True)
+    building.mkdir()
+    faiss.write_index(index, str(building / "services.faiss"))
+    ServiceStore.write(building, texts)
+    keywords.save(building / "keyword")
+    # The input embeddings (tracked in git) are never rewritten, fresh ones live here
+    save_service_embeddings(building / "embeddings.npy", services, encoder, embeddings)
+    manifest = {
+        "format": FORMAT,
+        "version": version,
+        "model": encoder.model_name,
+        "dim": int(embeddings.shape[1]),
+        "count": len(texts),
+        "index_type": index_type,
+        "terms": len(keywords.vocabulary),
+        "source": str(services_path),
+        "source_sha256": source_sha256,
+        "built_at": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+    }
+    with open(building / "manifest.json", "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2)
+
+    target = index_dir / version
+    if target.exists():
+        # Same inputs, same artifact: keep the one replicas may have mapped
+        shutil.rmtree(building)
+    else:
+        os.replace(building, target)
+    pointer = index_dir / f".CURRENT-{os.getpid()}"
+    pointer.write_text(version, encoding="utf-8")
+    os.replace(pointer, index_dir / "CURRENT")
+    prune_versions(index_dir, keep=KEEP_VERSIONS)
+
+    logger.success(
+        f"[INDEX] Built {version}: {len(texts)} services, {index_type} index, "
+        f"{len(keywords.vocabulary)} terms, in {time.perf_counter() - start:.1f}s"
+    )
+    return target
+
+def prune_versions(index_dir, keep=KEEP_VERSIONS):
+    """Delete all but the newest `keep` versions (the live one always stays)."""
+    live = current_version(index_dir)
+    versions = sorted(
+        (d for d in Path(index_dir).iterdir() if d.is_dir() and not d.name.startswith(".")),
+        key=lambda d: d.stat().st_mtime,
+        reverse=True,
+    )
+    for directory in versions[keep:]:
+        if directory != live:
+            # Processes still mapping it keep their pages until they exit
+            shutil.rmtree(directory, ignore_errors=True)
+
+def open_index(index_dir, services_path, encoder, embeddings_path=None, build=False):
+    """
+    The live artifact. A missing or stale one raises IndexNotBuilt, unless `build` asks to
+    (re)build it first (development, see TTT_BUILD_INDEX_ON_START in retrieve.py).
+    """
+    directory = current_version(index_dir)
+    reason = stale_reason(directory, services_path, encoder.model_name)
+    if reason and not build:
+        raise IndexNotBuilt(
+            f"{index_dir} can't be served ({reason}): run build_index.py, "
+            f"or set TTT_BUILD_INDEX_ON_START=1 to build it at startup"
+        )
+    if reason:
+        logger.warning(f"[INDEX] Rebuilding {index_dir}: {reason}")
+        directory = build_index(index_dir, services_path, encoder, embeddings_path)
+    start = time.perf_counter()
+    artifact = RetrievalIndex(directory)
+    logger.success(
+        f"[INDEX] Mapped {artifact.version} ({artifact.manifest['index_type']}, "
+        f"{len(artifact.services)} services) in {(time.perf_counter() - start) * 1000:.1f}ms"
+    )
+    return artifact
@@ -0,0 +1,98 @@
+import json
+from pathlib import Path
+
+import numpy as np
+
+# BM25 over an inverted index of the service texts, see retrieve.py.
+# Postings are stored CSR style (one array per field, `offsets` delimiting each term) with
+# the BM25 weight of every (term, document) pair precomputed, so a query only touches the
+# postings of its own terms: cost grows with matched postings, not with the corpus.
+
+K1 = 1.2
+B = 0.75
+
+class KeywordIndex:
+    def __init__(self, vocabulary, offsets, docs, weights, doc_count):
+        self.vocabulary = vocabulary  # token -> term id
+        self.offsets = offsets  # term id -> start of its postings, len = terms + 1
+        self.docs = docs  # document ids, ascending within a term
+        self.weights = weights  # BM25 weight of the term in that document
+        self.doc_count = doc_count
+
+    @classmethod
+    def build(cls, tokenized_docs, k1=K1, b=B):
+        """tokenized_docs: one list of tokens per document (document id = position)."""
+        vocabulary = {}
+        term_ids, doc_ids = [], []
+        doc_lengths = np.zeros(len(tokenized_docs), dtype=np.float32)
+        for doc_id, tokens in enumerate(tokenized_docs):
+            doc_lengths[doc_id] = len(tokens)
+            for token in tokens:
+                term_ids.append(vocabulary.setdefault(token, len(vocabulary)))
+                doc_ids.append(doc_id)
+
+        term_ids = np.asarray(term_ids, dtype=np.int64)
+        doc_ids = np.asarray(doc_ids, dtype=np.int64)
+        # One posting per (term, document), its count is the term frequency
+        pairs, tf = np.unique(term_ids * len(tokenized_docs) + doc_ids, return_counts=True)
+        posting_terms = pairs // len(tokenized_docs)
+        posting_docs = (pairs % len(tokenized_docs)).astype(np.int32)
+
+        df = np.bincount(posting_terms, minlength=len(vocabulary))
+        offsets = np.zeros(len(vocabulary) + 1, dtype=np.int64)
+        np.cumsum(df, out=offsets[1:])
+
+        n = len(tokenized_docs)
+        idf = np.log(1 + (n - df + 0.5) / (df + 0.5))
+        avgdl = doc_lengths.mean() if n else 1.0
+        norm = k1 * (1 - b + b * doc_lengths[posting_docs] / max(avgdl, 1e-9))
+        weights = (idf[posting_terms] * tf * (k1 + 1) / (tf + norm)).astype(np.float32)
+        return cls(vocabulary, offsets, posting_docs, weights, n)
+
+    def save(self, directory):
+        """Arrays as .npy (memory-mappable by load()), terms in id order as JSON."""
+        directory = Path(directory)
+        directory.mkdir(parents=True, exist_ok=True)
+        np.save(directory / "offsets.npy", self.offsets)
+        np.save(directory / "docs.npy", self.docs)
+        np.save(directory / "weights.npy", self.weights)
+        terms = sorted(self.vocabulary, key=self.vocabulary.get)
+        with open(directory / "vocabulary.json", "w", encoding="utf-8") as f:
+            json.dump({"doc_count": self.doc_count, "terms": terms}, f, ensure_ascii=False)
+
+    @classmethod
+    def load(cls, directory, mmap_mode="r"):
+        directory = Path(directory)
+        with open(directory / "vocabulary.json", encoding="utf-8") as f:
+            vocabulary = json.load(f)
+        return cls(
+            {term: term_id for term_id, term in enumerate(vocabulary["terms"])},
+            np.load(directory / "offsets.npy", mmap_mode=mmap_mode),
+            np.load(directory / "docs.npy", mmap_mode=mmap_mode),
+            np.load(directory / "weights.npy", mmap_mode=mmap_mode),
+            vocabulary["doc_count"],
+        )
+
+    def search(self, tokens, k=1):
+        """[(document id, score)] best first, only documents sharing a term with the query."""
+        term_ids = sorted({self.vocabulary[t] for t in tokens if t in self.vocabulary})
+        if not term_ids:
+            return []
+        slices = [slice(self.offsets[t], self.offsets[t + 1]) for t in term_ids]
+        docs = np.concatenate([self.docs[s] for s in slices])
+        weights = np.concatenate([self.weights[s] for s in slices])
+
+        candidates, inverse = np.unique(docs, return_inverse=True)
+        scores = np.bincount(inverse, weights=weights)
+        if k == 1:
+            top = np.array([np.argmax(scores)])  # first maximum = lowest document id
+        elif k < len(scores):
+            top = np.argpartition(-scores, k - 1)[:k]
+        else:
+            top = np.arange(len(scores))
+        # Best score first, ties to the lower document id
+        top = top[np.lexsort((candidates[top], -scores[top]))]
+        return [(int(candidates[i]), float(scores[i])) for i in top]
+
+    def __len__(self):
+        return self.doc_count
@@ -0,0 +1,51 @@
+import re
+from loguru import logger
+
+# Query / service text normalization shared by the retriever (retrieve.py), the offline
+# index build (build_index.py) and anything keying on normalized queries.
+
+# -------- DOMAIN SYNONYMS --------
+SYNONYMS = {
+    "vidhava": "widow",
+    "vethana": "pension",
+    "vetana": "pension",
+    "pension": "pension",
+    "widow": "widow",
+    "freedom": "freedom",
+    "fighter": "fighter",
+    "blind": "blind",
+    "kurudu": "blind",
+    "pass": "pass",
+    "bus": "bus",
+    "license": "license",
+    "licence": "license",
+    "renew": "renew",
+    "madabeku": "renew",
+    "beku": "required",
+    "certificate": "certificate",
+    "marks": "marks",
+    "migration": "migration",
+    "duplicate": "duplicate"
+}
+
+logger.info(f"[INIT] Synonyms loaded, count={len(SYNONYMS)}")
+
+# -------- TEXT CLEANING --------
+WORD = re.compile(r"[a-z]+")
+
+def stem(word: str):
+    """Plural -> singular, so "pensions" meets "pension" like the old substring match did."""
+    if len(word) > 4 and word.endswith("s") and not word.endswith("ss"):
+        return word[:-1]
+    return word
+
+def tokenize(text: str):
+    """Index terms of a text: lowercase words, synonyms mapped, longer than 2 letters."""
+    words = (SYNONYMS.get(w, w) for w in WORD.findall(text.lower()))
+    return [stem(w) for w in words if len(w) > 2]
+
+def clean_words(text: str):
+    logger.debug(f"[CLEAN] Raw input text='{text}'")
+    filtered = tokenize(text)
+    logger.debug(f"[CLEAN] Final normalized words={filtered}")
+    return filtered
@@ -1,125 +1,123 @@
-import json
-import faiss
-import numpy as np
-import re
+import os
+import threading
+import time
 from loguru import logger
+from embeddings import QueryEncoder
+from index_store import EMBEDDINGS_FILE, INDEX_DIR, SERVICES_FILE, RetrievalIndex, current_version, open_index, stale_reason
+from normalize import clean_words
 
 # -------- CONFIG --------
-EMBEDDINGS_FILE = "processed_data/embeddings.npy"
-SERVICES_FILE = "processed_data/services.json"
-TOP_K = 1   # best service only
-
-logger.info(f"[INIT] EMBEDDINGS_FILE={EMBEDDINGS_FILE}")
+TOP_K = 3   # results returned when the request doesn't ask for a number
+CANDIDATES = 20   # taken from each retriever before fusion
+RRF_K = 60   # reciprocal-rank fusion: score = sum of 1 / (RRF_K + rank)
+INDEX_CHECK_INTERVAL = 30   # seconds between looks for a newer build of the index artifact
+# Startup fails when the artifact is missing or stale; 1 builds it instead (development only,
+# every replica would pay for the full build)
+BUILD_INDEX_ON_START = os.environ.get("TTT_BUILD_INDEX_ON_START", "0") == "1"
+
+logger.info(f"[INIT] INDEX_DIR={INDEX_DIR}")
 logger.info(f"[INIT] SERVICES_FILE={SERVICES_FILE}")
-logger.info(f"[INIT] TOP_K={TOP_K}")
-
-# -------- LOAD DATA --------
-embeddings = np.load(EMBEDDINGS_FILE)
-logger.info(f"[LOAD] Embeddings loaded with shape={embeddings.shape}, dtype={embeddings.dtype}")
-
-with open(SERVICES_FILE, "r", encoding="utf-8") as f:
-    services = json.load(f)
-
-logger.info(f"[LOAD] Services loaded, count={len(services)}")
-
-# -------- BUILD FAISS INDEX --------
-dim = embeddings.shape[1]
-logger.info(f"[FAISS] Creating IndexFlatL2 with dim={dim}")
-
-index = faiss.IndexFlatL2(dim)
-index.add(embeddings)
-
-logger.success(f"[FAISS] Index built successfully, total_vectors={index.ntotal}")
-
-# -------- DOMAIN SYNONYMS --------
-SYNONYMS = {
-    "vidhava": "widow",
-    "vethana": "pension",
-    "vetana": "pension",
-    "pension": "pension",
-    "widow": "widow",
-    "freedom": "freedom",
-    "fighter": "fighter",
-    "blind": "blind",
-    "kurudu": "blind",
-    "pass": "pass",
-    "bus": "bus",
-    "license": "license",
-    "licence": "license",
-    "renew": "renew",
-    "madabeku": "renew",
-    "beku": "required",
-    "certificate": "certificate",
-    "marks": "marks",
-    "migration": "migration",
-    "duplicate": "duplicate"
-}
-
-logger.info(f"[INIT] Synonyms loaded, count={len(SYNONYMS)}")
-
-# -------- TEXT CLEANING --------
-def clean_words(text: str):
-    logger.debug(f"[CLEAN] Raw input text='{text}'")
-
-    words = re.findall(r"[a-zA-Z]+", text.lower())
-    logger.debug(f"[CLEAN] Tokenized words={words}")
-
-    normalized = []
-    for w in words:
-        mapped = SYNONYMS.get(w, w)
-        normalized.append(mapped)
-        if mapped != w:
-            logger.debug(f"[CLEAN] Synonym mapped '{w}' -> '{mapped}'")
-
-    filtered = [w for w in normalized if len(w) > 2]
-    logger.debug(f"[CLEAN] Final normalized words={filtered}")
-
-    return filtered
+logger.info(f"[INIT] TOP_K={TOP_K}, CANDIDATES={CANDIDATES}, RRF_K={RRF_K}")
+
+# -------- LOAD INDEX --------
+# Memory-mapped: FAISS index, BM25 postings and service texts (decoded per result)
+encoder = QueryEncoder()
+artifact = open_index(INDEX_DIR, SERVICES_FILE, encoder, embeddings_path=EMBEDDINGS_FILE, build=BUILD_INDEX_ON_START)
+_checked_at = time.monotonic()
+_reload_lock = threading.Lock()
+
+def refresh_index():
+    """
+    Artifact being served (RetrievalIndex: version, built_at...). At most every
+    INDEX_CHECK_INTERVAL seconds, switches to the build CURRENT points at when
+    build_index.py made a new one for this encoder.
+    """
+    global artifact, _checked_at
+    if time.monotonic() - _checked_at < INDEX_CHECK_INTERVAL:
+        return artifact
+    with _reload_lock:
+        if time.monotonic() - _checked_at >= INDEX_CHECK_INTERVAL:
+            _checked_at = time.monotonic()
+            directory = current_version(INDEX_DIR)
+            # The new build may come with a services.json this replica doesn't have yet
+            if (
+                directory is not None
+                and directory.name != artifact.version
+                and stale_reason(directory, None, encoder.model_name) is None
+            ):
+                artifact = RetrievalIndex(directory)
+                logger.success(f"[INDEX] Switched to {artifact.version} ({len(artifact.services)} services)")
+    return artifact
 
 # -------- RETRIEVAL LOGIC --------
-def retrieve_service(question: str):
-    logger.info(f"[RETRIEVE] New query received='{question}'")
+def keyword_candidates(current, words, k=CANDIDATES):
+    """[(service index, BM25 score)] best first, empty when no word is in the index"""
+    return current.keywords.search(words, k=k)
+
+def semantic_candidates(current, question: str, k=CANDIDATES):
+    """[(service index, cosine similarity)] best first"""
+    start = time.perf_counter()
+    query_embedding = encoder.encode(question).reshape(1, -1)
+    logger.debug(f"[FAISS] Query encoded in {(time.perf_counter() - start) * 1000:.1f}ms | {encoder.stats()}")
+
+    similarities, indices = current.faiss.search(query_embedding, min(k, current.faiss.ntotal))
+    return [(int(i), float(s)) for i, s in zip(indices[0], similarities[0]) if i >= 0]
+
+def fuse(rankings, k=RRF_K):
+    """
+    Reciprocal-rank fusion: {service index: (score, [1-based rank per ranking, 0 = absent])}.
+    Only ranks count, so BM25 scores and cosine similarities need no common scale.
+    """
+    fused = {}
+    for position, ranking in enumerate(rankings):
+        for rank, (idx, _) in enumerate(ranking, start=1):
+            score, ranks = fused.setdefault(idx, (0.0, [0] * len(rankings)))
+            ranks[position] = rank
+            fused[idx] = (score + 1.0 / (k + rank), ranks)
+    return fused
+
+def search(question: str, top_k=TOP_K):
+    """
+    Top `top_k` services for a question as dicts (index, text, score, keyword_rank,
+    semantic_rank), best first. BM25 and the dense index both run and are fused, so a query
+    whose transliterated words miss the keyword index still ranks by meaning, and a
+    keyword hit the encoder doesn't understand still ranks by its words.
+    """
+    logger.info(f"[RETRIEVE] New query received='{question}', top_k={top_k}")
 
     words = clean_words(question)
     logger.info(f"[RETRIEVE] Normalized keywords={words}")
 
-    best_score = 0
-    best_service = None
-
-    # 1️⃣ Keyword scoring
-    for idx, service in enumerate(services):
-        text = service["text"].lower()
-        score = sum(1 for w in words if w in text)
-
-        if score > 0:
-            logger.debug(f"[KEYWORD] Service[{idx}] matched score={score}")
-
-        if score > best_score:
-            best_score = score
-            best_service = service
-            logger.debug(f"[KEYWORD] New best service idx={idx}, score={score}")
-
-    # 2️⃣ Keyword match success
-    if best_service and best_score > 0:
-        logger.success(f"[RETRIEVE] Keyword match found with score={best_score}")
-        return best_service["text"]
-
-    # 3️⃣ FAISS fallback
-    logger.warning("[RETRIEVE] No keyword match found, falling back to FAISS")
-
-    logger.debug(f"[FAISS] Attempting to encode query='{question}'")
-    logger.debug(f"[FAISS] embeddings object type={type(embeddings)}")
+    current = artifact  # one version for the whole query, refresh_index() may swap it
+    keyword = keyword_candidates(current, words)
+    semantic = semantic_candidates(current, question)
+    if not keyword:
+        logger.warning("[RETRIEVE] No keyword match found, ranking by FAISS alone")
+
+    fused = fuse([keyword, semantic])
+    # Best fused score first, ties to the better BM25 rank, then the lower service index
+    ranked = sorted(
+        fused.items(),
+        key=lambda item: (-item[1][0], item[1][1][0] or len(keyword) + 1, item[0]),
+    )[:top_k]
+
+    results = [
+        {
+            "index": idx,
+            "text": current.services.text(idx),
+            "score": score,
+            "keyword_rank": ranks[0],
+            "semantic_rank": ranks[1],
+        }
+        for idx, (score, ranks) in ranked
+    ]
+    logger.success(
+        "[RETRIEVE] Fused results "
+        + ", ".join(f"idx={r['index']} rrf={r['score']:.4f} (bm25 #{r['keyword_rank']}, faiss #{r['semantic_rank']})" for r in results)
+    )
+    return results
 
-    # ⚠️ This is intentionally logged because this is where it breaks
-    query_embedding = embeddings.encode(question).reshape(1, -1)
-
-    logger.debug(f"[FAISS] Query embedding shape={query_embedding.shape}")
-
-    distances, indices = index.search(query_embedding, TOP_K)
-
-    logger.info(f"[FAISS] Search completed indices={indices.tolist()}, distances={distances.tolist()}")
-
-    selected = services[indices[0][0]]
-    logger.success(f"[RETRIEVE] FAISS selected service")
-
-    return selected["text"]
+def retrieve_service(question: str):
+    """Text of the best service"""
+    results = search(question, top_k=1)
+    return results[0]["text"] if results else ""
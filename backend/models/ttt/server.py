@@ -1,17 +1,63 @@
 import grpc
+import os
 from concurrent import futures
 from loguru import logger
-from retrieve import retrieve_service
-from ttt_pb2 import TextResponse  # type: ignore
+from answer_cache import AnswerCache, answer_key
+from retrieve import TOP_K, refresh_index, search
+from ttt_pb2 import ServiceResult, TextResponse  # type: ignore
 import ttt_pb2_grpc as ttt_pb2_grpc
 
+# Answers remembered per normalized query (answer_cache.py), dropped when the index
+# artifact changes; TTT_CACHE_SIZE=0 disables the cache
+CACHE_SIZE = int(os.environ.get("TTT_CACHE_SIZE", 4096))
+CACHE_TTL = float(os.environ.get("TTT_CACHE_TTL", 3600))  # seconds
+# Cache stats are logged every this many requests
+STATS_EVERY = int(os.environ.get("TTT_STATS_EVERY", 100))
+
 class RetrieveContext(ttt_pb2_grpc.RetrieveContextServicer):
     def __init__(self):
         logger.info("Initialized FAISS")
+        self.cache = AnswerCache(max_entries=CACHE_SIZE, ttl=CACHE_TTL) if CACHE_SIZE > 0 else None
+        self.requests = 0
 
     def RetrieveText(self, request, context):
         logger.debug(f"[REQUEST] : {request.text}")
-        return TextResponse(text=retrieve_service(str(request.text)))
+        top_k = request.top_k or TOP_K
+        current = refresh_index()
+        if self.cache is None:
+            return self._retrieve(request.text, top_k, current)
+
+        self.cache.set_version(current.version)
+        key = answer_key(request.text, top_k)
+        response = self.cache.get(key)
+        if response is None:
+            response = self._retrieve(request.text, top_k, current)
+            self.cache.put(key, response, current.version)
+        else:
+            logger.debug(f"[CACHE] Hit for {key!r}")
+
+        self.requests += 1
+        if self.requests % STATS_EVERY == 0:
+            logger.info(f"[CACHE] {self.cache.stats()}")
+        return response
+
+    def _retrieve(self, text, top_k, current):
+        results = search(str(text), top_k=top_k)
+        return TextResponse(
+            text=results[0]["text"] if results else "",
+            results=[
+                ServiceResult(
+                    text=r["text"],
+                    score=r["score"],
+                    service_index=r["index"],
+                    keyword_rank=r["keyword_rank"],
+                    semantic_rank=r["semantic_rank"],
+                )
+                for r in results
+            ],
+            index_version=current.version,
+            index_built_at=current.built_at,
+        )
 
 def serve():
     server = grpc.server(futures.ThreadPoolExecutor(max_workers=4))
@@ -24,7 +24,7 @@ _sym_db = _symbol_database.Default()
 
 
 
-DESCRIPTOR = _descriptor_pool.Default().AddSerializedFile(b'\n\tttt.proto\x12\x03tts\"\x1c\n\x0cQueryRequest\x12\x0c\n\x04text\x18\x01 \x01(\t\"\x1c\n\x0cTextResponse\x12\x0c\n\x04text\x18\x01 \x01(\t2G\n\x0fRetrieveContext\x12\x34\n\x0cRetrieveText\x12\x11.tts.QueryRequest\x1a\x11.tts.TextResponseb\x06proto3')
+DESCRIPTOR = _descriptor_pool.Default().AddSerializedFile(b'\n\tttt.proto\x12\x03tts\"+\n\x0cQueryRequest\x12\x0c\n\x04text\x18\x01 \x01(\t\x12\r\n\x05top_k\x18\x02 \x01(\x05\"p\n\rServiceResult\x12\x0c\n\x04text\x18\x01 \x01(\t\x12\r\n\x05score\x18\x02 \x01(\x02\x12\x15\n\rservice_index\x18\x03 \x01(\x05\x12\x14\n\x0ckeyword_rank\x18\x04 \x01(\x05\x12\x15\n\rsemantic_rank\x18\x05 \x01(\x05\"p\n\x0cTextResponse\x12\x0c\n\x04text\x18\x01 \x01(\t\x12#\n\x07results\x18\x02 \x03(\x0b\x32\x12.tts.ServiceResult\x12\x15\n\rindex_version\x18\x03 \x01(\t\x12\x16\n\x0eindex_built_at\x18\x04 \x01(\x03\x32G\n\x0fRetrieveContext\x12\x34\n\x0cRetrieveText\x12\x11.tts.QueryRequest\x1a\x11.tts.TextResponseb\x06proto3')
 
 _globals = globals()
 _builder.BuildMessageAndEnumDescriptors(DESCRIPTOR, _globals)
@@ -32,9 +32,11 @@ _builder.BuildTopDescriptorsAndMessages(DESCRIPTOR, 'ttt_pb2', _globals)
 if not _descriptor._USE_C_DESCRIPTORS:
   DESCRIPTOR._loaded_options = None
   _globals['_QUERYREQUEST']._serialized_start=18
-  _globals['_QUERYREQUEST']._serialized_end=46
-  _globals['_TEXTRESPONSE']._serialized_start=48
-  _globals['_TEXTRESPONSE']._serialized_end=76
-  _globals['_RETRIEVECONTEXT']._serialized_start=78
-  _globals['_RETRIEVECONTEXT']._serialized_end=149
+  _globals['_QUERYREQUEST']._serialized_end=61
+  _globals['_SERVICERESULT']._serialized_start=63
+  _globals['_SERVICERESULT']._serialized_end=175
+  _globals['_TEXTRESPONSE']._serialized_start=177
+  _globals['_TEXTRESPONSE']._serialized_end=289
+  _globals['_RETRIEVECONTEXT']._serialized_start=291
+  _globals['_RETRIEVECONTEXT']._serialized_end=362
 # @@protoc_insertion_point(module_scope)
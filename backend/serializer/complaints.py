@@ -8,6 +8,9 @@ from entities.complaints import ComplaintCount
 
 class ImageCaptionSerializer(serializers.Serializer):
     file = serializers.ImageField()
+    # Optional, picks the department of the complaint's jurisdiction
+    latitude = serializers.FloatField(required=False)
+    longitude = serializers.FloatField(required=False)
 
 class ResolveLocationSerializer(serializers.Serializer):
     latitude = serializers.FloatField()
@@ -0,0 +1,15 @@
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.dispatch import receiver
+from citizens.routing import department_router
+from entities.governance import Department, Domain, Jurisdiction
+
+@receiver(post_save, sender=Department)
+@receiver(post_delete, sender=Department)
+@receiver(post_save, sender=Domain)
+@receiver(post_delete, sender=Domain)
+@receiver(post_save, sender=Jurisdiction)
+@receiver(post_delete, sender=Jurisdiction)
+@receiver(m2m_changed, sender=Department.domains.through)
+def invalidate_department_routing(sender, **kwargs):
+    """Any governance change rebuilds the routing index on the next lookup."""
+    department_router.invalidate()
@@ -10,6 +10,14 @@ import EmptyState from "@/components/reusables/forms/EmptyState"
 import { cn } from "@/lib/utils"
 
 const WS_URL = "ws://localhost:8000/chat/"
+// Opus needs WebCodecs, otherwise the server sends PCM16
+const SUPPORTS_OPUS = typeof window !== "undefined" && "AudioDecoder" in window
+const OPUS_FRAME_US = 20000
+
+interface AudioFormat {
+  encoding: "pcm16" | "opus"
+  sampleRate: number
+}
 
 interface Message {
   id: string
@@ -25,7 +33,11 @@ export default function ChatPage() {
   const [textInput, setTextInput] = useState("")
   const msgIdRef = useRef(0)
   const audioContextRef = useRef<AudioContext | null>(null)
-  const audioQueueRef = useRef<ArrayBuffer[]>([])
+  const nextStartRef = useRef(0)
+  const activeSourcesRef = useRef(0)
+  const audioFormatRef = useRef<AudioFormat>({ encoding: "pcm16", sampleRate: 24000 })
+  const opusDecoderRef = useRef<AudioDecoder | null>(null)
+  const opusTimestampRef = useRef(0)
   const scrollRef = useRef<HTMLDivElement>(null)
 
   // Auto-scroll on new messages
@@ -60,6 +72,10 @@ export default function ChatPage() {
           addMessage("bot", data.text, true)
           break
 
+        case "audio_format":
+          setAudioFormat({ encoding: data.encoding, sampleRate: data.sample_rate })
+          break
+
         default:
           console.warn("Unknown WS message:", data)
       }
@@ -67,52 +83,90 @@ export default function ChatPage() {
     [addMessage],
   )
 
-  const handleAudioBinary = useCallback(
-    async (audioData: ArrayBuffer) => {
-      audioQueueRef.current.push(audioData)
-      if (!isAudioPlaying) playAudioQueue()
-    },
-    [isAudioPlaying],
-  )
+  // ==================== AUDIO PLAYBACK ====================
 
-  const playAudioQueue = async () => {
-    if (audioQueueRef.current.length === 0) {
-      setIsAudioPlaying(false)
-      return
-    }
-    setIsAudioPlaying(true)
+  // Chunks are scheduled back to back on the context's clock, so short Opus frames play gapless
+  const playAudio = async (samples: Float32Array, sampleRate: number) => {
     try {
       if (!audioContextRef.current || audioContextRef.current.state === "closed") {
         audioContextRef.current = new AudioContext({ sampleRate: 24000 })
       }
-      if (audioContextRef.current.state === "suspended") {
-        await audioContextRef.current.resume()
+      const context = audioContextRef.current
+      if (context.state === "suspended") {
+        await context.resume()
       }
-      const audioData = audioQueueRef.current.shift()!
-      const pcm16 = new Int16Array(audioData)
-      const float32 = new Float32Array(pcm16.length)
-      for (let i = 0; i < pcm16.length; i++) {
-        float32[i] = pcm16[i] / 32768.0
-      }
-      const audioBuffer = audioContextRef.current.createBuffer(1, float32.length, 24000)
-      audioBuffer.copyToChannel(float32, 0)
-      const source = audioContextRef.current.createBufferSource()
+      // The context resamples buffers of other rates on playback
+      const audioBuffer = context.createBuffer(1, samples.length, sampleRate)
+      audioBuffer.copyToChannel(samples, 0)
+      const source = context.createBufferSource()
       source.buffer = audioBuffer
-      source.connect(audioContextRef.current.destination)
+      source.connect(context.destination)
+      const startAt = Math.max(context.currentTime, nextStartRef.current)
+      nextStartRef.current = startAt + audioBuffer.duration
+      activeSourcesRef.current += 1
+      setIsAudioPlaying(true)
       source.onended = () => {
-        audioQueueRef.current.length > 0 ? playAudioQueue() : setIsAudioPlaying(false)
+        activeSourcesRef.current -= 1
+        if (activeSourcesRef.current === 0) setIsAudioPlaying(false)
       }
-      source.start()
+      source.start(startAt)
     } catch {
-      setIsAudioPlaying(false)
+      setIsAudioPlaying(activeSourcesRef.current > 0)
     }
   }
 
+  const setAudioFormat = (format: AudioFormat) => {
+    audioFormatRef.current = format
+    opusDecoderRef.current?.close()
+    opusDecoderRef.current = null
+    if (format.encoding !== "opus") return
+    const decoder = new AudioDecoder({
+      output: (audio) => {
+        const samples = new Float32Array(audio.numberOfFrames)
+        audio.copyTo(samples, { planeIndex: 0, format: "f32-planar" })
+        playAudio(samples, audio.sampleRate)
+        audio.close()
+      },
+      error: (err) => console.error("Opus decoding failed:", err),
+    })
+    decoder.configure({ codec: "opus", sampleRate: format.sampleRate, numberOfChannels: 1 })
+    opusDecoderRef.current = decoder
+  }
+
+  const handleAudioBinary = useCallback((audioData: ArrayBuffer) => {
+    const { encoding, sampleRate } = audioFormatRef.current
+    if (encoding === "opus") {
+      // Opus frames, each prefixed with its length (uint16, big-endian)
+      const view = new DataView(audioData)
+      let offset = 0
+      while (offset + 2 <= audioData.byteLength) {
+        const length = view.getUint16(offset)
+        opusDecoderRef.current?.decode(new EncodedAudioChunk({
+          type: "key",
+          timestamp: opusTimestampRef.current,
+          data: new Uint8Array(audioData, offset + 2, length),
+        }))
+        opusTimestampRef.current += OPUS_FRAME_US
+        offset += 2 + length
+      }
+      return
+    }
+    const pcm16 = new Int16Array(audioData)
+    const float32 = new Float32Array(pcm16.length)
+    for (let i = 0; i < pcm16.length; i++) {
+      float32[i] = pcm16[i] / 32768.0
+    }
+    playAudio(float32, sampleRate)
+  }, [])
+
   const { isConnected, connect, disconnect, sendMessage, sendBinary } = useWebSocket({
     url: WS_URL,
     onMessage: handleTranscript,
     onBinary: handleAudioBinary,
-    onOpen: () => addMessage("system", "Connected to server"),
+    onOpen: () => {
+      addMessage("system", "Connected to server")
+      sendMessage({ action: "audio_format", encodings: SUPPORTS_OPUS ? ["opus", "pcm16"] : ["pcm16"] })
+    },
     onClose: () => addMessage("system", "Disconnected"),
     onError: () => addMessage("system", "Connection error"),
     autoConnect: false,
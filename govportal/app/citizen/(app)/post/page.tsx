@@ -123,6 +123,11 @@ export default function CitizenPostPage() {
     try {
       const fd = new FormData()
       fd.append("file", file)
+      // Lets the backend suggest the department of this jurisdiction
+      if (form.latitude && form.longitude) {
+        fd.append("latitude", String(form.latitude))
+        fd.append("longitude", String(form.longitude))
+      }
 
       const ai = await REQUEST("POST", "citizens/ai/caption_image/", fd, {
         isMultipart: true,